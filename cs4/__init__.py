@@ -5,23 +5,27 @@ A modular framework for evaluating LLM creativity through structured
 constraint satisfaction across multiple domains (blogs, stories, news).
 """
 
-# Expose key classes and functions at package level
-from cs4.core.constraint_generator import ConstraintGenerator
-from cs4.core.constraint_expander import ConstraintExpander
-from cs4.core.base_generator import BaseGenerator
-from cs4.core.constraint_fitter import ConstraintFitter
-from cs4.core.content_summarizer import ContentSummarizer
-from cs4.core.evaluator import ConstraintEvaluator
-from cs4.core.blog_merger import BlogMerger
-from cs4.utils.llm_client import OpenAIClient, AnthropicClient
-from cs4.schemas import (
-    RawBlogsSchema,
-    MergedBlogsSchema,
-    ConstraintsSchema,
-    BaseGeneratedSchema,
-    FittedContentSchema,
-    EvaluationResultsSchema,
-)
+import importlib
+
+# Key classes exposed at package level, imported on first access (PEP 562)
+# so that `import cs4` does not pull in pandas, the LLM SDKs, etc.
+_LAZY = {
+    "ConstraintGenerator": "cs4.core.constraint_generator",
+    "ConstraintExpander": "cs4.core.constraint_expander",
+    "BaseGenerator": "cs4.core.base_generator",
+    "ConstraintFitter": "cs4.core.constraint_fitter",
+    "ContentSummarizer": "cs4.core.content_summarizer",
+    "ConstraintEvaluator": "cs4.core.evaluator",
+    "BlogMerger": "cs4.core.blog_merger",
+    "OpenAIClient": "cs4.utils.llm_client",
+    "AnthropicClient": "cs4.utils.llm_client",
+    "RawBlogsSchema": "cs4.schemas",
+    "MergedBlogsSchema": "cs4.schemas",
+    "ConstraintsSchema": "cs4.schemas",
+    "BaseGeneratedSchema": "cs4.schemas",
+    "FittedContentSchema": "cs4.schemas",
+    "EvaluationResultsSchema": "cs4.schemas",
+}
 
 __all__ = [
     "ConstraintGenerator",
@@ -40,3 +44,16 @@ __all__ = [
     "FittedContentSchema",
     "EvaluationResultsSchema",
 ]
+
+
+def __getattr__(name):
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -3,15 +3,39 @@ Central configuration management for CS4.
 """
 
 import os
+import copy
+import functools
 from pathlib import Path
 from typing import Dict, Any, Optional
 import yaml
 from dotenv import load_dotenv
 
+# Prefer the libyaml-backed loader; fall back to the pure-Python one
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 # Load environment variables
 load_dotenv()
 
 
+@functools.lru_cache(maxsize=32)
+def _load_yaml_cached(path: Path, mtime_ns: int) -> Any:
+    """Parse a YAML file once per (path, mtime)."""
+    return yaml.load(path.read_bytes(), Loader=_YamlLoader)
+
+
+def _load_yaml(path: Path) -> Dict[str, Any]:
+    """Load a YAML file, re-parsing only when it changes on disk.
+    
+    Callers get their own deep copy, so mutating the result (including
+    nested dicts and lists) never touches the cached parse.
+    """
+    path = path.resolve()
+    return copy.deepcopy(_load_yaml_cached(path, path.stat().st_mtime_ns))
+
+
 class Config:
     """Central configuration manager."""
     
@@ -48,29 +72,34 @@ class Config:
     MAX_RETRIES = 3
     RETRY_DELAY = 1.0  # seconds
     
+    # Set once ensure_directories() has run in this process
+    _dirs_ready = False
+    
     @classmethod
     def load_domain_config(cls, domain: str) -> Dict[str, Any]:
-        """Load domain-specific configuration."""
+        """Load domain-specific configuration (parsed once per file version)."""
+        cls.ensure_directories()
         config_path = cls.CONFIGS_DIR / "domains" / f"{domain}.yaml"
         if not config_path.exists():
             raise FileNotFoundError(f"Domain config not found: {config_path}")
         
-        with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
+        return _load_yaml(config_path)
     
     @classmethod
     def load_config(cls, config_path: str) -> Dict[str, Any]:
-        """Load configuration from YAML file."""
+        """Load configuration from YAML file (parsed once per file version)."""
+        cls.ensure_directories()
         path = Path(config_path)
         if not path.exists():
             raise FileNotFoundError(f"Config file not found: {config_path}")
         
-        with open(path, 'r') as f:
-            return yaml.safe_load(f)
+        return _load_yaml(path)
     
     @classmethod
     def ensure_directories(cls):
-        """Ensure all required directories exist."""
+        """Ensure all required directories exist (runs once per process)."""
+        if cls._dirs_ready:
+            return
         cls.DATA_DIR.mkdir(exist_ok=True)
         cls.LOGS_DIR.mkdir(exist_ok=True)
         cls.JOBS_DIR.mkdir(exist_ok=True)
@@ -78,6 +107,7 @@ class Config:
         (cls.DATA_DIR / "raw").mkdir(exist_ok=True)
         (cls.DATA_DIR / "processed").mkdir(exist_ok=True)
         (cls.DATA_DIR / "embeddings").mkdir(exist_ok=True)
+        cls._dirs_ready = True
     
     @classmethod
     def get_api_key(cls, provider: str) -> Optional[str]:
@@ -96,7 +126,3 @@ class Config:
             raise ValueError("OPENAI_API_KEY not set in environment")
         if not cls.CLAUDE_API_KEY:
             raise ValueError("CLAUDE_API_KEY not set in environment")
-
-
-# Initialize directories on import
-Config.ensure_directories()
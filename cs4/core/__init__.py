@@ -1,14 +1,20 @@
 """Core logic modules for CS4."""
 
-from cs4.core.constraint_generator import ConstraintGenerator
-from cs4.core.common_constraint_generator import CommonConstraintGenerator
-from cs4.core.constraint_expander import ConstraintExpander
-from cs4.core.base_generator import BaseGenerator
-from cs4.core.constraint_fitter import ConstraintFitter
-from cs4.core.content_summarizer import ContentSummarizer
-from cs4.core.evaluator import ConstraintEvaluator
-from cs4.core.blog_merger import BlogMerger
-from cs4.core.constraint_replacer import ConstraintReplacer
+import importlib
+
+# Classes are imported on first access (PEP 562) so that importing one
+# pipeline stage does not import every other stage.
+_LAZY = {
+    "ConstraintGenerator": "cs4.core.constraint_generator",
+    "CommonConstraintGenerator": "cs4.core.common_constraint_generator",
+    "ConstraintExpander": "cs4.core.constraint_expander",
+    "BaseGenerator": "cs4.core.base_generator",
+    "ConstraintFitter": "cs4.core.constraint_fitter",
+    "ContentSummarizer": "cs4.core.content_summarizer",
+    "ConstraintEvaluator": "cs4.core.evaluator",
+    "BlogMerger": "cs4.core.blog_merger",
+    "ConstraintReplacer": "cs4.core.constraint_replacer",
+}
 
 __all__ = [
     "ConstraintGenerator",
@@ -21,3 +27,16 @@ __all__ = [
     "BlogMerger",
     "ConstraintReplacer",
 ]
+
+
+def __getattr__(name):
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
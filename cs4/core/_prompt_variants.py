@@ -0,0 +1,103 @@
+"""
+Archived prompt variants.
+
+Earlier wordings of the pipeline prompts, kept for reference and for
+reproducing older runs. Nothing in the pipeline imports this module.
+"""
+
+# Alternate CONSTRAINT_GENERATION_PROMPT ("The blog should ..." constraints)
+ALTERNATE_CONSTRAINT_GENERATION_PROMPT = """You are a writing expert. I will give you a blog as input.  
+You can assume that a large language model created the blog.
+
+Your task has two parts:
+
+1. Identify the main task of the blog in one sentence.
+   Phrase it as an instruction.
+   Example: "Write a blog about strategies for successful remote working."
+
+2. Generate a set of thirty nine constraints that a writer could follow to create a new blog that covers the same central ideas, structure, and reasoning as the input without recreating the original text.
+
+Rules for the constraints:
+
+1. Constraints must be atomic. Each constraint must contain exactly one requirement.  
+2. Avoid all proper nouns. Do not use names of people, cities, courts, organizations, or case titles.  
+3. Avoid constraints that simply restate one sentence or one paragraph. Each constraint must influence at least two sentences in different parts of the blog.  
+4. Constraints must not allow reconstruction of the original blog. Do not follow the blog order. Do not outline the events in sequence.  
+5. Constraints must mix the following types:  
+   a. Content constraints about ideas or arguments that should appear.  
+   b. Structural constraints describing how the blog should be organized.  
+   c. Reasoning constraints that require inference or comparison.  
+   d. Stylistic constraints only if needed to reach thirty nine items.  
+6. Constraints must reflect realistic settings.  
+7. Constraints must span multiple parts of the blog whenever possible.  
+8. Do not copy phrases from the input.  
+9. Write all constraints as instructions that begin with "The blog should".  
+10. Randomize the order so the list does not follow the blog structure.
+
+If and only if you cannot reach thirty nine atomic content and structure constraints, fill the remaining slots with stylistic constraints that describe tone or level of detail.
+
+Output format:
+
+Main Task: <one sentence instruction>
+
+Constraints:
+1. <constraint one>
+2. <constraint two>
+...
+39. <constraint thirty nine>
+
+
+FEW SHOT EXAMPLE ONE  
+
+Input Blog:
+Working from home has become common worldwide and while it brings flexibility it also brings challenges. A well planned workspace can reduce distractions. Clear working hours help protect personal time. Regular breaks prevent burnout. Staying connected with colleagues reduces feelings of isolation. Caring for health through exercise, good sleep, and mindful habits supports long term productivity.
+
+Output:
+Main Task: Write a blog about strategies for successful remote working.
+
+Constraints:
+1. The blog should explain the value of defined working hours.
+2. The blog should describe why regular breaks sustain performance.
+3. The blog should connect poor boundaries to loss of personal time.
+4. The blog should emphasize how social connection reduces isolation.
+5. The blog should show how workspace planning limits distractions.
+6. The blog should describe how exercise supports mental clarity.
+7. The blog should mention that hydration influences daily focus.
+8. The blog should link sleep quality to sustained productivity.
+9. The blog should identify productivity as a central theme.
+10. The blog should explain how mindful habits reduce stress.
+11. The blog should show how good lighting supports energy.
+12. The blog should discuss how essential tools should be accessible.
+13. The blog should encourage informal digital conversations.
+14. The blog should contrast benefits and challenges of remote work.
+15. The blog should explain how nutrition influences cognitive strength.
+16. The blog should advise keeping a consistent daily routine.
+17. The blog should connect emotional well being to job performance.
+18. The blog should describe a structured time management method.
+19. The blog should argue that remote work requires deliberate planning.
+20. The blog should promote stretching or movement during pauses.
+21. The blog should discuss the importance of sleep hygiene.
+22. The blog should connect hydration to reduced fatigue.
+23. The blog should recommend a physically separate workspace.
+24. The blog should explain how interruptions reduce productivity.
+25. The blog should suggest instant messaging for quick collaboration.
+26. The blog should mention that natural light boosts mood.
+27. The blog should emphasize consistency in work boundaries.
+28. The blog should mention virtual team bonding activities.
+29. The blog should argue for intentional self care routines.
+30. The blog should tie physical comfort to long term health.
+31. The blog should combine workspace, schedule, and health advice into a unified approach.
+32. The blog should recommend communicating work hours to household members.
+33. The blog should encourage readers to adopt concrete changes.
+34. The blog should warn that poor boundaries cause personal time erosion.
+35. The blog should highlight how home work flexibility introduces new challenges.
+36. The blog should advise placing water near the workspace.
+37. The blog should discuss how visual cues help create a work zone.
+38. The blog should promote balanced nutrition for sustained energy.
+39. The blog should conclude by urging a proactive approach to remote work.
+
+
+
+
+Now apply this full process to the next input blog.
+"""
@@ -4,16 +4,19 @@ Base content generation module - generates content from task descriptions only.
 
 import pandas as pd
 import logging
-from time import sleep
 from typing import Optional
 from datetime import datetime
 
 from cs4.core.prompts import get_base_generation_prompt
-from cs4.utils.llm_client import OpenAIClient, AnthropicClient
+from cs4.utils.llm_client import OpenAIClient, get_adapter
+from cs4.utils.concurrency import run_concurrently, in_input_order
+from cs4.utils.llm_cache import LLMCache, make_cache_key
+from cs4.utils.retry import RetryMixin
+from cs4.utils.record_writer import JsonlWriter, is_jsonl_path
 from cs4.config import Config
 
 
-class BaseGenerator:
+class BaseGenerator(RetryMixin):
     """Generate base content from task descriptions (without constraints)."""
     
     def __init__(
@@ -22,25 +25,36 @@ class BaseGenerator:
         model: str = None,
         content_type: str = "blog",
         retry_attempts: int = 3,
-        delay: float = 1.0
+        delay: float = 1.0,
+        max_concurrency: int = 8,
+        use_cache: bool = False,
+        max_output_tokens: int = 4096
     ):
         """
         Initialize base content generator.
         
         Args:
-            llm_client: LLM client (OpenAI or Anthropic)
+            llm_client: LLM client (OpenAI, Anthropic or an LLMAdapter)
             model: Model identifier
             content_type: Type of content (blog, story, news)
             temperature: Generation temperature
             max_tokens: Maximum tokens to generate
             retry_attempts: Number of retry attempts on failure
-            delay: Delay in seconds between retries
+            delay: Base delay in seconds for exponential backoff between retries
+            max_concurrency: Maximum number of concurrent LLM requests in batch mode
+            use_cache: Reuse responses for identical prompts from the on-disk
+                       LLM cache
+            max_output_tokens: Completion token cap per request
         """
         self.llm_client = llm_client or OpenAIClient(log_usage=True)
         self.model = model or Config.DEFAULT_BASE_GEN_MODEL
         self.content_type = content_type
         self.retry_attempts = retry_attempts
         self.delay = delay
+        self.max_concurrency = max_concurrency
+        self.cache = LLMCache() if use_cache else None
+        self.max_output_tokens = max_output_tokens
+        self.llm = get_adapter(self.llm_client)
         self.system_prompt = get_base_generation_prompt(content_type)
         
         self.logger = logging.getLogger("CS4Generator")
@@ -58,48 +72,91 @@ class BaseGenerator:
             log: Whether to log token usage
             
         Returns:
-            Tuple of (generated_content, tokens_used)
+            Tuple of (generated_content, tokens_used) (tokens_used is 0 on a cache hit)
         """
-        user_input = f"Task: {task}"
+        user_input = "Task: " + str(task)
         
-        for attempt in range(1, self.retry_attempts + 1):
-            try:
-                if isinstance(self.llm_client, OpenAIClient):
-                    response = self.llm_client.chat_completion(
-                        messages=[
-                            {"role": "system", "content": self.system_prompt},
-                            {"role": "user", "content": user_input}
-                        ],
-                        model=self.model,
-                    )
-                    content = response.choices[0].message.content.strip()
-                    tokens = response.usage.total_tokens
-                elif isinstance(self.llm_client, AnthropicClient):
-                    response = self.llm_client.create_message(
-                        messages=[{"role": "user", "content": user_input}],
-                        model=self.model,
-                        system=self.system_prompt,
-                        )
-                    content = response.content[0].text
-                    tokens = response.usage.input_tokens + response.usage.output_tokens
-                else:
-                    raise ValueError("Unknown client type")
-                
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(self.model, self.system_prompt, user_input)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
                 if log:
-                    self.logger.info(f"Total tokens used: {tokens}")
-                
-                return content, tokens
-                
+                    self.logger.info("Cache hit, skipping API call")
+                return cached["text"], 0
+        
+        def attempt():
+            content, tokens = self.llm.chat(
+                system=self.system_prompt,
+                user=user_input,
+                model=self.model,
+                max_tokens=self.max_output_tokens
+            )
+            
+            if log:
+                self.logger.info(f"Total tokens used: {tokens}")
+            
+            if cache_key is not None:
+                self.cache.set(cache_key, {"text": content, "tokens": tokens})
+            
+            return content, tokens
+        
+        return self._retry(attempt)
+    
+    def _generate_columns(
+        self,
+        instruction_nums: list,
+        tasks: list,
+        writer: Optional[JsonlWriter] = None
+    ) -> dict:
+        """
+        Generate base content for each task concurrently.
+        
+        Args:
+            instruction_nums: Instruction number for each task
+            tasks: Task descriptions
+            writer: Optional JSONL writer that receives each row as it completes
+            
+        Returns:
+            Dict of column name -> list of values, in the same order as tasks
+        """
+        n = len(tasks)
+        # Every row is stamped with the batch start time
+        out = {
+            "instruction_number": list(instruction_nums),
+            "main_task": list(tasks),
+            "base_content": [""] * n,
+            "content_length": [0] * n,
+            "model_used": [self.model] * n,
+            "tokens_used": [0] * n,
+            "timestamp": [datetime.now().isoformat()] * n,
+        }
+        
+        def process(i):
+            instruction_num = out["instruction_number"][i]
+            self.logger.info(f"Processing task #{instruction_num}")
+            
+            try:
+                content, tokens = self.generate_base_content(out["main_task"][i], log=True)
             except Exception as e:
-                self.logger.warning(
-                    f"Attempt {attempt}/{self.retry_attempts} failed: {e}"
+                self.logger.error(
+                    f"Failed to generate base content for task {instruction_num}: {e}"
                 )
-                if attempt < self.retry_attempts:
-                    sleep(self.delay)
-                else:
-                    raise
+                content, tokens = "", 0
+            
+            return content, tokens
         
-        raise RuntimeError("Failed to generate base content")
+        # The writer receives rows in task order, matching the returned columns
+        for i, (content, tokens) in in_input_order(
+            run_concurrently(process, range(n), self.max_concurrency)
+        ):
+            out["base_content"][i] = content
+            out["content_length"][i] = len(content)
+            out["tokens_used"][i] = tokens
+            if writer:
+                writer.write({name: values[i] for name, values in out.items()})
+        
+        return out
     
     def generate_batch(
         self,
@@ -114,7 +171,8 @@ class BaseGenerator:
         Args:
             df: Input DataFrame with tasks (typically from constraints.csv)
             task_column: Name of column containing task descriptions
-            output_path: Optional path to save results
+            output_path: Optional path to save results (a .jsonl path writes
+                         JSON Lines, streamed row by row when not deduplicating)
             deduplicate_by_instruction: If True and instruction_number exists with duplicates,
                                        generate base content once per unique instruction_number
                                        and replicate across all rows (for expanded constraints)
@@ -132,65 +190,35 @@ class BaseGenerator:
             has_instruction_num = False
             self.logger.warning("No 'instruction_number' column found, using index")
         
-        # Check if deduplication is needed (expanded constraints with subset_size)
-        needs_deduplication = (
-            deduplicate_by_instruction and 
-            has_instruction_num and 
-            df["instruction_number"].duplicated().any()
-        )
+        # Check if deduplication is needed (expanded constraints with subset_size).
+        # A single groupby pass finds the first row of every instruction_number.
+        unique_df = None
+        num_dupes = 0
+        if deduplicate_by_instruction and has_instruction_num:
+            unique_df = df.groupby("instruction_number", sort=False, dropna=False).head(1)
+            num_dupes = len(df) - len(unique_df)
+        needs_deduplication = num_dupes > 0
         
         if needs_deduplication:
-            self.logger.info(f"Detected {df['instruction_number'].duplicated().sum()} duplicate instruction_numbers")
+            self.logger.info(f"Detected {num_dupes} duplicate instruction_numbers")
             self.logger.info("Will generate base content once per unique instruction_number")
-            
-            # Get unique tasks by instruction_number
-            unique_df = df.drop_duplicates(subset=["instruction_number"]).copy()
             self.logger.info(f"Generating base content for {len(unique_df)} unique tasks (from {len(df)} total rows)")
             
             # Generate for unique tasks
-            base_results = []
-            for idx, row in unique_df.iterrows():
-                task = row[task_column]
-                instruction_num = row["instruction_number"]
-                
-                self.logger.info(f"Processing task #{instruction_num}")
-                
-                try:
-                    content, tokens = self.generate_base_content(task, log=True)
-                    
-                    base_results.append({
-                        "instruction_number": instruction_num,
-                        "main_task": task,
-                        "base_content": content,
-                        "content_length": len(content),
-                        "model_used": self.model,
-                        "tokens_used": tokens,
-                        "timestamp": datetime.now().isoformat()
-                    })
-                    
-                except Exception as e:
-                    self.logger.error(
-                        f"Failed to generate base content for task {instruction_num}: {e}"
-                    )
-                    base_results.append({
-                        "instruction_number": instruction_num,
-                        "main_task": task,
-                        "base_content": "",
-                        "content_length": 0,
-                        "model_used": self.model,
-                        "tokens_used": 0,
-                        "timestamp": datetime.now().isoformat()
-                    })
-            
-            base_df = pd.DataFrame(base_results)
+            base_df = pd.DataFrame(self._generate_columns(
+                unique_df["instruction_number"].tolist(),
+                unique_df[task_column].tolist()
+            ))
             
-            # Merge back to original df to replicate base content across all rows
-            result_df = df.merge(
-                base_df[["instruction_number", "base_content", "content_length", 
-                         "model_used", "tokens_used", "timestamp"]],
+            # Join back on the unique key to replicate base content across all rows
+            result_df = df.join(
+                base_df.set_index("instruction_number")[
+                    ["base_content", "content_length", "model_used", "tokens_used", "timestamp"]
+                ],
                 on="instruction_number",
-                how="left"
-            )
+                lsuffix="_x",
+                rsuffix="_y"
+            ).reset_index(drop=True)
             
             self.logger.info(f"Replicated base content across {len(result_df)} rows")
             
@@ -198,44 +226,38 @@ class BaseGenerator:
             # Original behavior for backward compatibility
             self.logger.info(f"Generating base content for {len(df)} tasks")
             
-            results = []
-            for idx, row in df.iterrows():
-                task = row[task_column]
-                instruction_num = row["instruction_number"] if has_instruction_num else idx + 1
-                
-                self.logger.info(f"Processing task #{instruction_num}")
-                
-                try:
-                    content, tokens = self.generate_base_content(task, log=True)
-                    
-                    results.append({
-                        "instruction_number": instruction_num,
-                        "main_task": task,
-                        "base_content": content,
-                        "content_length": len(content),
-                        "model_used": self.model,
-                        "tokens_used": tokens,
-                        "timestamp": datetime.now().isoformat()
-                    })
-                    
-                except Exception as e:
-                    self.logger.error(
-                        f"Failed to generate base content for task {instruction_num}: {e}"
-                    )
-                    results.append({
-                        "instruction_number": instruction_num,
-                        "main_task": task,
-                        "base_content": "",
-                        "content_length": 0,
-                        "model_used": self.model,
-                        "tokens_used": 0,
-                        "timestamp": datetime.now().isoformat()
-                    })
+            if has_instruction_num:
+                instruction_nums = df["instruction_number"]
+            else:
+                instruction_nums = df.index + 1
             
-            result_df = pd.DataFrame(results)
+            # Rows map 1:1 to output, so JSONL output is written as calls complete
+            writer = None
+            if output_path and is_jsonl_path(output_path):
+                Config.ensure_directories()
+                writer = JsonlWriter(output_path)
+            try:
+                result_df = pd.DataFrame(self._generate_columns(
+                    list(instruction_nums), df[task_column].tolist(), writer
+                ))
+            finally:
+                if writer:
+                    writer.close()
+        
+        # Counters comfortably fit in 32 bits; narrow them from the int64 default
+        int_columns = {
+            col: "int32" for col in ("content_length", "tokens_used", "instruction_number")
+            if pd.api.types.is_integer_dtype(result_df[col])
+        }
+        result_df = result_df.astype(int_columns)
         
         if output_path:
-            result_df.to_csv(output_path, index=False, encoding="utf-8")
+            if not is_jsonl_path(output_path):
+                Config.ensure_directories()
+                result_df.to_csv(output_path, index=False, encoding="utf-8")
+            elif needs_deduplication:
+                Config.ensure_directories()
+                result_df.to_json(output_path, orient="records", lines=True, force_ascii=False)
             self.logger.info(f"Base content saved to {output_path}")
         
         return result_df
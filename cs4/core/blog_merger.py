@@ -4,16 +4,24 @@ Blog merging module - merges blog pairs using LLM.
 
 import pandas as pd
 import logging
-from time import sleep
+from pathlib import Path
 from typing import Optional
 from datetime import datetime
 
 from cs4.core.prompts import get_merge_prompt
-from cs4.utils.llm_client import OpenAIClient, AnthropicClient
+from cs4.utils.llm_client import OpenAIClient, get_adapter
+from cs4.utils.concurrency import run_concurrently, in_input_order
+from cs4.utils.llm_cache import LLMCache, make_cache_key
+from cs4.utils.retry import RetryMixin
+from cs4.utils.record_writer import JsonlWriter, is_jsonl_path
 from cs4.config import Config
 
+# Fixed parts of the merge user prompt, joined with the blog texts in one pass
+_MERGE_PROMPT_PREFIX = "Merge the two blogs below.\n\nBlog 1:\n"
+_MERGE_PROMPT_SEPARATOR = "\n\nBlog 2:\n"
 
-class BlogMerger:
+
+class BlogMerger(RetryMixin):
     """Merge blog pairs into single coherent blogs using LLM."""
     
     def __init__(
@@ -21,21 +29,32 @@ class BlogMerger:
         llm_client: Optional[object] = None,
         model: str = None,
         retry_attempts: int = 3,
-        delay: float = 1.0
+        delay: float = 1.0,
+        max_concurrency: int = 8,
+        use_cache: bool = False,
+        max_output_tokens: int = 4096
     ):
         """
         Initialize blog merger.
         
         Args:
-            llm_client: LLM client (OpenAI or Anthropic)
+            llm_client: LLM client (OpenAI, Anthropic or an LLMAdapter)
             model: Model identifier
             retry_attempts: Number of retry attempts on failure
-            delay: Delay in seconds between retries
+            delay: Base delay in seconds for exponential backoff between retries
+            max_concurrency: Maximum number of concurrent LLM requests in batch mode
+            use_cache: Reuse responses for identical prompts from the on-disk
+                       LLM cache
+            max_output_tokens: Completion token cap per request
         """
         self.llm_client = llm_client or OpenAIClient(log_usage=True)
         self.model = model or Config.DEFAULT_MERGE_MODEL
         self.retry_attempts = retry_attempts
         self.delay = delay
+        self.max_concurrency = max_concurrency
+        self.cache = LLMCache() if use_cache else None
+        self.max_output_tokens = max_output_tokens
+        self.llm = get_adapter(self.llm_client)
         self.system_prompt = get_merge_prompt()
         
         self.logger = logging.getLogger("CS4Generator")
@@ -55,47 +74,36 @@ class BlogMerger:
             log: Whether to log progress
             
         Returns:
-            Tuple of (merged_text, tokens_used)
+            Tuple of (merged_text, tokens_used) (tokens_used is 0 on a cache hit)
         """
-        user_prompt = f"Merge the two blogs below.\n\nBlog 1:\n{blog1}\n\nBlog 2:\n{blog2}"
+        user_prompt = "".join((_MERGE_PROMPT_PREFIX, blog1, _MERGE_PROMPT_SEPARATOR, blog2))
         
-        for attempt in range(1, self.retry_attempts + 1):
-            try:
-                if isinstance(self.llm_client, OpenAIClient):
-                    response = self.llm_client.chat_completion(
-                        messages=[
-                            {"role": "system", "content": self.system_prompt},
-                            {"role": "user", "content": user_prompt}
-                        ],
-                        model=self.model
-                    )
-                    merged_text = response.choices[0].message.content.strip()
-                    tokens = response.usage.total_tokens
-                elif isinstance(self.llm_client, AnthropicClient):
-                    response = self.llm_client.create_message(
-                        messages=[{"role": "user", "content": user_prompt}],
-                        model=self.model,
-                        system=self.system_prompt   
-                    )
-                    merged_text = response.content[0].text
-                    tokens = response.usage.input_tokens + response.usage.output_tokens
-                else:
-                    raise ValueError("Unknown client type")
-                
-                if log:
-                    self.logger.info(f"Merged successfully ({tokens} tokens)")
-                
-                return merged_text, tokens
-                
-            except Exception as e:
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(self.model, self.system_prompt, user_prompt)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
                 if log:
-                    self.logger.warning(f"Attempt {attempt}/{self.retry_attempts} failed: {e}")
-                if attempt < self.retry_attempts:
-                    sleep(self.delay)
-                else:
-                    raise
+                    self.logger.info("Cache hit, skipping API call")
+                return cached["text"], 0
+        
+        def attempt():
+            merged_text, tokens = self.llm.chat(
+                system=self.system_prompt,
+                user=user_prompt,
+                model=self.model,
+                max_tokens=self.max_output_tokens
+            )
+            
+            if log:
+                self.logger.info(f"Merged successfully ({tokens} tokens)")
+            
+            if cache_key is not None:
+                self.cache.set(cache_key, {"text": merged_text, "tokens": tokens})
+            
+            return merged_text, tokens
         
-        raise RuntimeError("Failed to merge blogs")
+        return self._retry(attempt)
     
     def merge_pairs(
         self,
@@ -108,8 +116,11 @@ class BlogMerger:
         
         Args:
             pairs_df: DataFrame with blog_1_text and blog_2_text columns
-            output_path: Path to save results (saves incrementally if provided)
-            save_interval: Save progress every N pairs
+            output_path: Path to save results. A .jsonl path is written
+                         directly as pairs complete; otherwise progress is
+                         streamed to a sibling .jsonl file and the final
+                         results are written as CSV
+            save_interval: Flush progress to disk every N pairs
             
         Returns:
             DataFrame with merged blogs and metadata
@@ -121,61 +132,71 @@ class BlogMerger:
         
         self.logger.info(f"Merging {len(pairs_df)} blog pairs...")
         
-        merged_data = []
+        total = len(pairs_df)
         
-        for idx, row in pairs_df.iterrows():
-            blog1 = str(row['blog_1_text'])
-            blog2 = str(row['blog_2_text'])
-            
-            self.logger.info(f"Merging pair {idx + 1}/{len(pairs_df)}")
+        def optional_column(name):
+            if name in pairs_df.columns:
+                return pairs_df[name].tolist()
+            return [None] * total
+        
+        # Results are accumulated column-wise and turned into a DataFrame once;
+        # every row is stamped with the batch start time
+        out = {
+            'Original Blog 1': [str(b) for b in pairs_df['blog_1_text'].tolist()],
+            'Original Blog 2': [str(b) for b in pairs_df['blog_2_text'].tolist()],
+            'Merged Blog': [""] * total,
+            'Similarity': optional_column('similarity'),
+            'blog_1_id': optional_column('blog_1_id'),
+            'blog_2_id': optional_column('blog_2_id'),
+            'merged_length': [0] * total,
+            'model_used': [self.model] * total,
+            'tokens_used': [0] * total,
+            'timestamp': [datetime.now().isoformat()] * total,
+        }
+        
+        def process(i):
+            self.logger.info(f"Merging pair {i + 1}/{total}")
             
             try:
                 merged_text, tokens = self.merge_pair(
-                    blog1=blog1,
-                    blog2=blog2,
+                    blog1=out['Original Blog 1'][i],
+                    blog2=out['Original Blog 2'][i],
                     log=True
                 )
-                
-                merged_data.append({
-                    'Original Blog 1': blog1,
-                    'Original Blog 2': blog2,
-                    'Merged Blog': merged_text,
-                    'Similarity': row.get('similarity', None),
-                    'blog_1_id': row.get('blog_1_id', None),
-                    'blog_2_id': row.get('blog_2_id', None),
-                    'merged_length': len(merged_text),
-                    'model_used': self.model,
-                    'tokens_used': tokens,
-                    'timestamp': datetime.now().isoformat()
-                })
-                
                 self.logger.info(f"  Merged length: {len(merged_text)} characters")
                 self.logger.info(f"  Tokens used: {tokens}")
-                
             except Exception as e:
-                self.logger.error(f"Failed to merge pair {idx}: {e}")
-                merged_data.append({
-                    'Original Blog 1': blog1,
-                    'Original Blog 2': blog2,
-                    'Merged Blog': "",
-                    'Similarity': row.get('similarity', None),
-                    'blog_1_id': row.get('blog_1_id', None),
-                    'blog_2_id': row.get('blog_2_id', None),
-                    'merged_length': 0,
-                    'model_used': self.model,
-                    'tokens_used': 0,
-                    'timestamp': datetime.now().isoformat()
-                })
+                self.logger.error(f"Failed to merge pair {i}: {e}")
+                merged_text, tokens = "", 0
             
-            # Save incrementally
-            if output_path and (idx + 1) % save_interval == 0:
-                temp_df = pd.DataFrame(merged_data)
-                temp_df.to_csv(output_path, index=False, encoding="utf-8")
-                self.logger.info(f"  Progress saved to {output_path}")
-        
-        result_df = pd.DataFrame(merged_data)
+            return merged_text, tokens
         
+        # Results are collected on this thread only, so no locking is needed.
+        # Completed merges are appended to a JSONL progress file in pair order
+        # instead of rewriting the whole CSV every save_interval pairs.
+        progress = None
         if output_path:
+            progress_path = Path(output_path).with_suffix(".jsonl")
+            progress = JsonlWriter(progress_path, flush_interval=save_interval)
+            self.logger.info(f"  Streaming progress to {progress_path}")
+        
+        try:
+            for i, (merged_text, tokens) in in_input_order(
+                run_concurrently(process, range(total), self.max_concurrency)
+            ):
+                out['Merged Blog'][i] = merged_text
+                out['merged_length'][i] = len(merged_text)
+                out['tokens_used'][i] = tokens
+                if progress:
+                    progress.write({name: values[i] for name, values in out.items()})
+        finally:
+            if progress:
+                progress.close()
+        
+        result_df = pd.DataFrame(out).astype({'merged_length': 'int32', 'tokens_used': 'int32'})
+        
+        if output_path and not is_jsonl_path(output_path):
+            Config.ensure_directories()
             result_df.to_csv(output_path, index=False, encoding="utf-8")
             self.logger.info(f"Final results saved to {output_path}")
         
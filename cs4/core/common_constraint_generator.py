@@ -3,17 +3,34 @@ Common constraint generation module - extracts constraints common to two pieces
 """
 
 import pandas as pd
+import re
 import logging
-from time import sleep
 from typing import Optional
 from datetime import datetime
 
-from cs4.core.prompts import get_common_constraint_generation_prompt
-from cs4.utils.llm_client import OpenAIClient, AnthropicClient
+from cs4.core.prompts import get_common_constraint_generation_prompt, compile_template
+from cs4.utils.llm_client import OpenAIClient, get_adapter
+from cs4.utils.batch_api import run_batch_job
+from cs4.utils.concurrency import run_concurrently, in_input_order
+from cs4.utils.llm_cache import LLMCache, make_cache_key
+from cs4.utils.rate_limiter import RateLimiter
+from cs4.utils.frame_utils import compact_dtypes, is_parquet_path, stream_records, write_parquet
+from cs4.utils.retry import RetryMixin
+from cs4.utils.tokens import context_limit, count_static_tokens, count_tokens, truncate_middle
 from cs4.config import Config
 
+# Common response shape: a "Main Task: ..." line, then a line mentioning
+# constraints followed by the constraint list
+_RESPONSE_RE = re.compile(
+    r"^[ \t]*main task[ \t]*:(?P<task>[^\n]*)\n"
+    r"(?P<between>.*?)"
+    r"^[^\n]*constraints[^\n]*(?:\n|\Z)"
+    r"(?P<rest>.*)\Z",
+    re.IGNORECASE | re.MULTILINE | re.DOTALL
+)
 
-class CommonConstraintGenerator:
+
+class CommonConstraintGenerator(RetryMixin):
     """Generate constraints common to two pieces of content."""
     
     def __init__(
@@ -21,22 +38,45 @@ class CommonConstraintGenerator:
         llm_client: Optional[object] = None,
         model: str = None,
         retry_attempts: int = 3,
-        delay: float = 1.0
+        delay: float = 1.0,
+        max_concurrency: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        use_cache: bool = False,
+        cache_ttl: Optional[float] = None,
+        max_output_tokens: int = 4096
     ):
         """
         Initialize common constraint generator.
         
         Args:
-            llm_client: LLM client (OpenAI or Anthropic)
+            llm_client: LLM client (OpenAI, Anthropic or an LLMAdapter)
             model: Model identifier
             retry_attempts: Number of retry attempts on failure
-            delay: Delay in seconds between retries
+            delay: Base delay in seconds for exponential backoff between retries
+            max_concurrency: Maximum number of concurrent LLM requests in batch mode
+            rate_limiter: Optional RPM/TPM limiter, which may be shared between
+                          generator and fitter instances
+            use_cache: Reuse responses for identical prompts from the on-disk
+                       LLM cache
+            cache_ttl: Seconds before a cached response expires (None to
+                       keep responses indefinitely)
+            max_output_tokens: Completion token cap per request, also reserved
+                               when checking the prompt against the model's
+                               context window
         """
         self.llm_client = llm_client or OpenAIClient(log_usage=True)
         self.model = model or Config.DEFAULT_CONSTRAINT_MODEL
         self.retry_attempts = retry_attempts
         self.delay = delay
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter
+        self.cache = LLMCache() if use_cache else None
+        self.cache_ttl = cache_ttl
+        self.max_output_tokens = max_output_tokens
+        self.llm = get_adapter(self.llm_client)
         self.system_prompt = get_common_constraint_generation_prompt()
+        # Template is split once; each pair is filled in by concatenation
+        self._format_prompt = compile_template(self.system_prompt)
         
         self.logger = logging.getLogger("CS4Generator")
     
@@ -55,61 +95,107 @@ class CommonConstraintGenerator:
             log: Whether to log token usage
             
         Returns:
-            Tuple of (main_task, constraints, tokens_used)
+            Tuple of (main_task, constraints, tokens_used) (tokens_used is 0
+            on a cache hit)
         """
         # Format the prompt with both blogs
-        user_input = self.system_prompt.format(blog1=blog1, blog2=blog2)
+        user_input = self._build_prompt(blog1, blog2)
         
-        for attempt in range(1, self.retry_attempts + 1):
-            try:
-                if isinstance(self.llm_client, OpenAIClient):
-                    response = self.llm_client.chat_completion(
-                        messages=[
-                            {"role": "user", "content": user_input}
-                        ],
-                        model=self.model
-                    )
-                    response_text = response.choices[0].message.content.strip()
-                    tokens = response.usage.total_tokens
-                elif isinstance(self.llm_client, AnthropicClient):
-                    response = self.llm_client.create_message(
-                        messages=[{"role": "user", "content": user_input}],
-                        model=self.model
-                    )
-                    response_text = response.content[0].text
-                    tokens = response.usage.input_tokens + response.usage.output_tokens
-                else:
-                    raise ValueError("Unknown client type")
-                
-                # Parse response to extract main task and constraints
-                main_task, constraints = self._parse_response(response_text)
-
-                if not constraints:
-                    self.logger.error(
-                        f"""
-                        EMPTY CONSTRAINTS PARSED
-                        ------------------------
-                        Raw LLM response:
-                        {response_text}
-                        ------------------------
-                        """
-                    )
-                
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(self.model, user_input)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
                 if log:
-                    self.logger.info(f"Total tokens used: {tokens}")
-                
-                return main_task, constraints, tokens
-                
-            except Exception as e:
-                self.logger.warning(
-                    f"Attempt {attempt}/{self.retry_attempts} failed: {e}"
+                    self.logger.debug("Cache hit, skipping API call")
+                return cached["main_task"], cached["constraints"], 0
+        
+        def attempt():
+            estimated_tokens = len(user_input) // 4
+            if self.rate_limiter:
+                self.rate_limiter.acquire(estimated_tokens=estimated_tokens)
+            
+            # The filled-in template is sent as the user turn, without a system prompt
+            response_text, tokens = self.llm.chat(
+                system=None,
+                user=user_input,
+                model=self.model,
+                max_tokens=self.max_output_tokens
+            )
+            
+            if self.rate_limiter:
+                self.rate_limiter.reconcile(estimated_tokens, tokens)
+            
+            # Parse response to extract main task and constraints
+            main_task, constraints = self._parse_response(response_text)
+            
+            if not constraints:
+                self.logger.error(
+                    f"""
+                    EMPTY CONSTRAINTS PARSED
+                    ------------------------
+                    Raw LLM response:
+                    {response_text}
+                    ------------------------
+                    """
                 )
-                if attempt < self.retry_attempts:
-                    sleep(self.delay)
-                else:
-                    raise
+            
+            if log and self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Total tokens used: {tokens}")
+            
+            if cache_key is not None and constraints:
+                self.cache.set(
+                    cache_key,
+                    {"main_task": main_task, "constraints": constraints, "tokens": tokens},
+                    ttl=self.cache_ttl
+                )
+            
+            return main_task, constraints, tokens
         
-        raise RuntimeError("Failed to generate common constraints")
+        return self._retry(attempt)
+    
+    def _build_prompt(self, blog1: str, blog2: str) -> str:
+        """
+        Format the prompt for a pair, keeping it inside the model's context window.
+        
+        If the prompt plus max_output_tokens would exceed the context window,
+        the middle of each blog is dropped in proportion to its length.
+        
+        Args:
+            blog1: First blog content
+            blog2: Second blog content
+            
+        Returns:
+            Prompt text
+        """
+        prompt = self._format_prompt(blog1=blog1, blog2=blog2)
+        
+        limit = context_limit(self.model)
+        if limit is None:
+            return prompt
+        # The template is counted once per process; only the blogs are
+        # tokenized here
+        blog1, blog2 = str(blog1), str(blog2)
+        tokens1 = count_tokens(blog1, self.model)
+        tokens2 = count_tokens(blog2, self.model)
+        prompt_tokens = (
+            count_static_tokens(self._format_prompt(blog1="", blog2=""), self.model)
+            + tokens1 + tokens2
+        )
+        overflow = prompt_tokens + self.max_output_tokens - limit
+        if overflow <= 0:
+            return prompt
+        
+        cut1 = -(-overflow * tokens1 // max(tokens1 + tokens2, 1))
+        blog1 = truncate_middle(blog1, tokens1 - cut1, self.model)
+        blog2 = truncate_middle(blog2, tokens2 - (overflow - cut1), self.model)
+        prompt = self._format_prompt(blog1=blog1, blog2=blog2)
+        self.logger.warning(
+            f"Pair prompt of {prompt_tokens} tokens exceeds the {limit}-token context "
+            f"of {self.model}; dropped the middle of both blogs (now "
+            f"{count_tokens(prompt, self.model)} tokens)"
+        )
+        return prompt
     
     def _parse_response(self, response_text: str) -> tuple[str, str]:
         """
@@ -121,7 +207,25 @@ class CommonConstraintGenerator:
         Returns:
             Tuple of (main_task, constraints)
         """
-        lines = response_text.strip().split('\n')
+        text = response_text.strip()
+        
+        # Fast path for well-formed responses without markdown emphasis; any
+        # text the line walker below would treat differently falls through
+        if "*" not in text:
+            m = _RESPONSE_RE.search(text)
+            if (
+                m
+                and "constraints" not in text[:m.start()].lower()
+                and "main task" not in m.group("between").lower()
+                and "main task" not in m.group("rest").lower()
+            ):
+                constraints = "\n".join(
+                    line.strip() for line in m.group("rest").split("\n")
+                    if line.strip() and "constraints" not in line.lower()
+                )
+                return m.group("task").strip(), constraints
+        
+        lines = text.split('\n')
         main_task = ""
         constraints_lines = []
 
@@ -152,7 +256,8 @@ class CommonConstraintGenerator:
         df: pd.DataFrame,
         blog1_column: str = "Blog A",
         blog2_column: str = "Blog B",
-        output_path: Optional[str] = None
+        output_path: Optional[str] = None,
+        use_batch_api: bool = False
     ) -> pd.DataFrame:
         """
         Generate common constraints for a batch of blog pairs.
@@ -161,7 +266,11 @@ class CommonConstraintGenerator:
             df: Input DataFrame with blog pairs
             blog1_column: Name of column containing first blog
             blog2_column: Name of column containing second blog
-            output_path: Optional path to save results
+            output_path: Optional path to save results. CSV rows are streamed
+                         as they complete; a .parquet path is written once at
+                         the end (requires pyarrow)
+            use_batch_api: Submit all pairs as one provider batch job (half
+                           price, completes within 24h) instead of realtime calls
             
         Returns:
             DataFrame with constraints
@@ -173,20 +282,54 @@ class CommonConstraintGenerator:
         
         self.logger.info(f"Processing {len(df)} blog pairs")
         
-        results = []
-        for idx, row in df.iterrows():
-            blog1 = row[blog1_column]
-            blog2 = row[blog2_column]
-            instruction_num = row.get("instruction_number", idx + 1)
+        # Plain tuples are much cheaper than a Series per row; column names may
+        # contain spaces ("Blog A"), so fields are read by position.
+        # Position 0 of each tuple is the index.
+        blog1_pos = df.columns.get_loc(blog1_column) + 1
+        blog2_pos = df.columns.get_loc(blog2_column) + 1
+        num_pos = (
+            df.columns.get_loc("instruction_number") + 1
+            if "instruction_number" in df.columns else None
+        )
+        pairs = [
+            (row[num_pos] if num_pos else row[0] + 1, row[blog1_pos], row[blog2_pos])
+            for row in df.itertuples(index=True, name=None)
+        ]
+        
+        # Every row is stamped with the batch start time
+        batch_start = datetime.now().isoformat()
+        
+        # Offline mode: run every prompt as one batch job up front, keyed by
+        # row position, and only parse the responses below
+        batch_results = None
+        if use_batch_api:
+            batch_results = run_batch_job(
+                self.llm_client,
+                {
+                    str(i): self._build_prompt(blog1, blog2)
+                    for i, (_, blog1, blog2) in enumerate(pairs)
+                },
+                model=self.model
+            )
+        
+        def process(i):
+            instruction_num, blog1, blog2 = pairs[i]
             
-            self.logger.info(f"Processing pair #{instruction_num}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Processing pair #{instruction_num}")
             
             try:
-                main_task, constraints, tokens = self.generate_constraints_for_pair(
-                    blog1, blog2, log=True
-                )
+                if batch_results is not None:
+                    if str(i) not in batch_results:
+                        raise RuntimeError("No result returned by batch job")
+                    response_text, tokens = batch_results[str(i)]
+                    main_task, constraints = self._parse_response(response_text)
+                else:
+                    main_task, constraints, tokens = self.generate_constraints_for_pair(
+                        blog1, blog2, log=True
+                    )
                 
-                results.append({
+                return {
                     "instruction_number": instruction_num,
                     "blog1": blog1,
                     "blog2": blog2,
@@ -194,14 +337,14 @@ class CommonConstraintGenerator:
                     "constraints": constraints,
                     "model_used": self.model,
                     "tokens_used": tokens,
-                    "timestamp": datetime.now().isoformat()
-                })
+                    "timestamp": batch_start
+                }
                 
             except Exception as e:
                 self.logger.error(
                     f"Failed to generate constraints for pair {instruction_num}: {e}"
                 )
-                results.append({
+                return {
                     "instruction_number": instruction_num,
                     "blog1": blog1,
                     "blog2": blog2,
@@ -209,13 +352,30 @@ class CommonConstraintGenerator:
                     "constraints": "",
                     "model_used": self.model,
                     "tokens_used": 0,
-                    "timestamp": datetime.now().isoformat()
-                })
+                    "timestamp": batch_start
+                }
+        
+        # A batch job has already fetched every response, so only live calls
+        # need the thread pool
+        completed = in_input_order(
+            run_concurrently(
+                process,
+                range(len(pairs)),
+                1 if batch_results is not None else self.max_concurrency
+            )
+        )
+        
+        if output_path and not is_parquet_path(output_path):
+            Config.ensure_directories()
+            result_df = stream_records((record for _, record in completed), output_path)
+            self.logger.info(f"Common constraints saved to {output_path}")
+            return compact_dtypes(result_df)
         
-        result_df = pd.DataFrame(results)
+        result_df = compact_dtypes(pd.DataFrame([record for _, record in completed]))
         
         if output_path:
-            result_df.to_csv(output_path, index=False, encoding="utf-8")
+            Config.ensure_directories()
+            write_parquet(result_df, output_path)
             self.logger.info(f"Common constraints saved to {output_path}")
         
         return result_df
@@ -2,11 +2,19 @@
 Constraint expansion module - creates subsets of constraints for testing.
 """
 
+import numpy as np
 import pandas as pd
 import re
 import logging
 from typing import List, Optional
 
+from cs4.core.prompts import format_constraints
+from cs4.config import Config
+
+_CONSTRAINTS_PREFIX_RE = re.compile(r"^Constraints:\s*", re.IGNORECASE)
+_LIST_SPLIT_RE = re.compile(r'\n\s*\d+\.\s*')
+_LEADING_NUM_RE = re.compile(r'^\d+\.\s*')
+
 
 class ConstraintExpander:
     """Expand constraints into progressive subsets (buckets)."""
@@ -48,71 +56,63 @@ class ConstraintExpander:
         self.logger.info(f"Expanding {len(df)} rows into constraint buckets")
         self.logger.info(f"Subset sizes: {self.subset_sizes}")
         
-        expanded_rows = []
+        # Parse each row's constraints once
+        constraint_lists = self._parse_constraints(df[constraint_column])
+        counts = np.fromiter((len(lst) for lst in constraint_lists), dtype=np.int64, count=len(df))
         
-        for idx, row in df.iterrows():
-            constraints_text = row[constraint_column]
-            
-            # Parse constraints from text
-            constraints_list = self._parse_constraints(constraints_text)
-            total_constraints = len(constraints_list)
-            
-            instruction_num = row.get("instruction_number", idx + 1)
+        if "instruction_number" in df.columns:
+            instruction_nums = df["instruction_number"].tolist()
+        else:
+            instruction_nums = range(1, len(df) + 1)
+        for instruction_num, total_constraints in zip(instruction_nums, counts):
             self.logger.info(f"Instruction #{instruction_num}: Found {total_constraints} constraints")
-            
-            # Create a subset for each size
-            for size in self.subset_sizes:
-                subset = constraints_list[:min(size, total_constraints)]
-                
-                # Re-number constraints consistently
-                selected_text = "\n".join(f"{i+1}. {subset[i]}" for i in range(len(subset)))
-                
-                # Create new row with subset
-                new_row = row.copy()
-                new_row["selected_constraints"] = selected_text
-                new_row["subset_size"] = min(size, total_constraints)
-                expanded_rows.append(new_row)
         
-        expanded_df = pd.DataFrame(expanded_rows)
+        # Repeat every row once per subset size in a single take, and clip each
+        # requested size to the number of constraints available for its row
+        num_sizes = len(self.subset_sizes)
+        expanded_df = df.iloc[np.repeat(np.arange(len(df)), num_sizes)].reset_index(drop=True)
+        sizes = np.minimum(np.tile(self.subset_sizes, len(df)), np.repeat(counts, num_sizes))
+        
+        # Re-number constraints consistently
+        expanded_df["selected_constraints"] = [
+            format_constraints(constraint_lists[row // num_sizes][:size])
+            for row, size in enumerate(sizes.tolist())
+        ]
+        expanded_df["subset_size"] = sizes
         
         self.logger.info(f"Expanded to {len(expanded_df)} rows ({len(df)} × {len(self.subset_sizes)} subsets)")
         
         if output_path:
+            Config.ensure_directories()
             expanded_df.to_csv(output_path, index=False, encoding="utf-8")
             self.logger.info(f"Expanded constraints saved to {output_path}")
         
         return expanded_df
     
-    def _parse_constraints(self, constraints_text: str) -> List[str]:
+    def _parse_constraints(self, constraints: pd.Series) -> List[List[str]]:
         """
-        Parse constraints text into a list of individual constraints.
+        Parse a column of constraints text into lists of individual constraints.
         
         Handles formats like:
         - "Constraints:\n1. First\n2. Second"
         - "1. First\n2. Second"
         
         Args:
-            constraints_text: Text containing numbered constraints
+            constraints: Series of texts containing numbered constraints
             
         Returns:
-            List of constraint strings (without numbers)
+            One list of constraint strings (without numbers) per row
         """
         # Remove "Constraints:" prefix if present
-        constraints_text = re.sub(
-            r"^Constraints:\s*", 
-            "", 
-            constraints_text.strip(), 
-            flags=re.IGNORECASE
+        texts = constraints.fillna("").str.strip().str.replace(
+            _CONSTRAINTS_PREFIX_RE, "", regex=True
         )
         
-        # Split on numeric list markers (e.g., "1.", "2.", ...)
-        constraints_list = re.split(r'\n\s*\d+\.\s*', constraints_text)
+        # Split every row on numeric list markers (e.g., "1.", "2.", ...) at once
+        split_lists = texts.str.split(_LIST_SPLIT_RE, regex=True)
         
         # Clean up each constraint
-        constraints_list = [
-            re.sub(r'^\d+\.\s*', '', c).strip() 
-            for c in constraints_list 
-            if c.strip()
+        return [
+            [_LEADING_NUM_RE.sub('', c).strip() for c in constraints_list if c.strip()]
+            for constraints_list in split_lists.tolist()
         ]
-        
-        return constraints_list
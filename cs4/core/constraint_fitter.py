@@ -3,17 +3,31 @@ Constraint fitting module - fits base content to satisfy constraints.
 """
 
 import pandas as pd
+import re
 import logging
-from time import sleep
+import threading
 from typing import Optional
 from datetime import datetime
 
-from cs4.core.prompts import get_constraint_fitting_prompt
-from cs4.utils.llm_client import OpenAIClient, AnthropicClient
+from cs4.core.prompts import get_constraint_fitting_system_prompt, get_constraint_fitting_user_prompt
+from cs4.utils.llm_client import OpenAIClient, get_adapter
+from cs4.utils.batch_api import run_batch_job
+from cs4.utils.concurrency import run_concurrently, in_input_order
+from cs4.utils.llm_cache import LLMCache, make_cache_key
+from cs4.utils.rate_limiter import RateLimiter
+from cs4.utils.frame_utils import compact_dtypes, is_parquet_path, stream_records, write_parquet
+from cs4.utils.retry import RetryMixin
+from cs4.utils.tokens import (
+    context_limit, count_static_tokens, count_tokens, truncate_at_sentence, truncate_middle
+)
 from cs4.config import Config
 
+# Numbered list markers ("1.", "2.", ...) at the start of a line
+_COUNT_NUM_RE = re.compile(r'^\d+\.', re.MULTILINE)
+_LEADING_NUM_RE = re.compile(r'^\s*\d+\.\s*')
 
-class ConstraintFitter:
+
+class ConstraintFitter(RetryMixin):
     """Fit base content to satisfy multiple constraints."""
     
     def __init__(
@@ -22,23 +36,60 @@ class ConstraintFitter:
         model: str = None,
         content_type: str = "blog",
         retry_attempts: int = 3,
-        delay: float = 1.0
+        delay: float = 1.0,
+        max_concurrency: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        use_cache: bool = False,
+        cache_ttl: Optional[float] = None,
+        noop_max_constraints: int = 3,
+        max_output_tokens: int = 4096,
+        max_base_tokens: Optional[int] = None
     ):
         """
         Initialize constraint fitter.
         
         Args:
-            llm_client: LLM client (OpenAI or Anthropic)
+            llm_client: LLM client (OpenAI, Anthropic or an LLMAdapter)
             model: Model identifier
             content_type: Type of content (blog, story, news)
             retry_attempts: Number of retry attempts on failure
-            delay: Delay in seconds between retries
+            delay: Base delay in seconds for exponential backoff between retries
+            max_concurrency: Maximum number of concurrent LLM requests in batch mode
+            rate_limiter: Optional RPM/TPM limiter, which may be shared between
+                          generator and fitter instances
+            use_cache: Reuse responses for identical prompts from the on-disk
+                       LLM cache
+            cache_ttl: Seconds before a cached response expires (None to
+                       keep responses indefinitely)
+            noop_max_constraints: Constraint sets smaller than this whose every
+                                  constraint already appears verbatim in the
+                                  base content are returned without an LLM call
+                                  (0 disables the check)
+            max_output_tokens: Completion token cap per request, also reserved
+                               when checking the prompt against the model's
+                               context window
+            max_base_tokens: Base content longer than this many tokens is cut
+                             back to its leading sentences before the request
+                             (None only trims what overflows the context)
         """
         self.llm_client = llm_client or OpenAIClient(log_usage=True)
+        self.llm = get_adapter(self.llm_client)
         self.model = model or Config.DEFAULT_FITTING_MODEL
         self.content_type = content_type
+        self.system_prompt = get_constraint_fitting_system_prompt(content_type)
         self.retry_attempts = retry_attempts
         self.delay = delay
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter
+        self.cache = LLMCache() if use_cache else None
+        self.cache_ttl = cache_ttl
+        self.noop_max_constraints = noop_max_constraints
+        self.max_output_tokens = max_output_tokens
+        self.max_base_tokens = max_base_tokens
+        
+        # Number of fit_content calls answered without an LLM call
+        self.stats = {"skipped": 0}
+        self._stats_lock = threading.Lock()
         
         self.logger = logging.getLogger("CS4Generator")
     
@@ -59,51 +110,145 @@ class ConstraintFitter:
             log: Whether to log token usage
             
         Returns:
-            Tuple of (fitted_content, tokens_used)
+            Tuple of (fitted_content, tokens_used) (tokens_used is 0 on a cache hit
+            or when no LLM call is needed)
+        """
+        shortcut = self._fit_without_llm(base_content, constraints)
+        if shortcut is not None:
+            with self._stats_lock:
+                self.stats["skipped"] += 1
+            if log:
+                self.logger.info("Nothing to fit, skipping API call")
+            return shortcut, 0
+        
+        prompt = self._build_prompt(task, base_content, constraints)
+        
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(self.model, self.system_prompt, prompt)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                if log:
+                    self.logger.info("Cache hit, skipping API call")
+                return cached["text"], 0
+        
+        def attempt():
+            estimated_tokens = (len(self.system_prompt) + len(prompt)) // 4
+            if self.rate_limiter:
+                self.rate_limiter.acquire(estimated_tokens=estimated_tokens)
+            
+            content, tokens = self.llm.chat(
+                system=self.system_prompt,
+                user=prompt,
+                model=self.model,
+                max_tokens=self.max_output_tokens
+            )
+            
+            if self.rate_limiter:
+                self.rate_limiter.reconcile(estimated_tokens, tokens)
+            
+            if log:
+                self.logger.info(f"Total tokens used: {tokens}")
+            
+            if cache_key is not None:
+                self.cache.set(cache_key, {"text": content, "tokens": tokens}, ttl=self.cache_ttl)
+            
+            return content, tokens
+        
+        return self._retry(attempt)
+    
+    def _build_prompt(self, task: str, base_content: str, constraints: str) -> str:
+        """
+        Build the fitting user message, keeping the request inside the model's context window.
+        
+        If the prompt plus max_output_tokens would exceed the context window,
+        the middle of base_content is dropped so the request does not fail
+        (and burn every retry) on an oversized input. Before that, base
+        content over max_base_tokens (if set) is cut to its leading sentences.
+        
+        Args:
+            task: Task description
+            base_content: Base content to fit
+            constraints: Newline-separated list of constraints
+            
+        Returns:
+            User message text (sent with self.system_prompt)
         """
-        prompt = get_constraint_fitting_prompt(
+        if self.max_base_tokens is not None:
+            shortened = truncate_at_sentence(str(base_content), self.max_base_tokens, self.model)
+            if shortened != base_content:
+                self.logger.warning(
+                    f"Base content of {count_tokens(str(base_content), self.model)} tokens exceeds "
+                    f"max_base_tokens={self.max_base_tokens}; kept its first "
+                    f"{count_tokens(shortened, self.model)} tokens"
+                )
+                base_content = shortened
+        
+        prompt = get_constraint_fitting_user_prompt(
             content_type=self.content_type,
             task=task,
             base_content=base_content,
             constraints=constraints
         )
         
-        for attempt in range(1, self.retry_attempts + 1):
-            try:
-                if isinstance(self.llm_client, OpenAIClient):
-                    response = self.llm_client.chat_completion(
-                        messages=[
-                            {"role": "user", "content": prompt}
-                        ],
-                        model=self.model,
-                    )
-                    content = response.choices[0].message.content.strip()
-                    tokens = response.usage.total_tokens
-                elif isinstance(self.llm_client, AnthropicClient):
-                    response = self.llm_client.create_message(
-                        messages=[{"role": "user", "content": prompt}],
-                        model=self.model,
-                    )
-                    content = response.content[0].text
-                    tokens = response.usage.input_tokens + response.usage.output_tokens
-                else:
-                    raise ValueError("Unknown client type")
-                
-                if log:
-                    self.logger.info(f"Total tokens used: {tokens}")
-                
-                return content, tokens
-                
-            except Exception as e:
-                self.logger.warning(
-                    f"Attempt {attempt}/{self.retry_attempts} failed: {e}"
-                )
-                if attempt < self.retry_attempts:
-                    sleep(self.delay)
-                else:
-                    raise
+        limit = context_limit(self.model)
+        if limit is None:
+            return prompt
+        # The system prompt and the template text around the slots are
+        # counted once per process; only the slot values are tokenized here
+        system_tokens = count_static_tokens(self.system_prompt, self.model)
+        template = get_constraint_fitting_user_prompt(
+            content_type=self.content_type, task="", base_content="", constraints=""
+        )
+        base_tokens = count_tokens(str(base_content), self.model)
+        prompt_tokens = (
+            system_tokens + count_static_tokens(template, self.model) + base_tokens
+            + count_tokens(str(task), self.model) + count_tokens(str(constraints), self.model)
+        )
+        overflow = prompt_tokens + self.max_output_tokens - limit
+        if overflow <= 0:
+            return prompt
         
-        raise RuntimeError("Failed to fit content to constraints")
+        truncated = truncate_middle(base_content, base_tokens - overflow, self.model)
+        prompt = get_constraint_fitting_user_prompt(
+            content_type=self.content_type,
+            task=task,
+            base_content=truncated,
+            constraints=constraints
+        )
+        self.logger.warning(
+            f"Fitting prompt of {prompt_tokens} tokens exceeds the {limit}-token context "
+            f"of {self.model}; dropped the middle of the base content (now {system_tokens + count_tokens(prompt, self.model)} tokens)"
+        )
+        return prompt
+    
+    def _fit_without_llm(self, base_content: str, constraints: str) -> Optional[str]:
+        """
+        Return the fitted content when it is known without asking the LLM.
+        
+        Args:
+            base_content: Base content to fit
+            constraints: Newline-separated list of constraints
+            
+        Returns:
+            Fitted content, or None if an LLM call is needed
+        """
+        if not isinstance(base_content, str) or not base_content.strip():
+            return ""
+        if not isinstance(constraints, str) or not constraints.strip():
+            return base_content
+        
+        if self.noop_max_constraints > 0:
+            items = [
+                _LEADING_NUM_RE.sub("", line).strip().lower()
+                for line in constraints.splitlines() if line.strip()
+            ]
+            if len(items) < self.noop_max_constraints:
+                content_lower = base_content.lower()
+                if all(item in content_lower for item in items):
+                    return base_content
+        
+        return None
     
     def fit_batch(
         self,
@@ -111,7 +256,8 @@ class ConstraintFitter:
         base_df: pd.DataFrame,
         output_path: Optional[str] = None,
         base_column: str = "base_content",
-        constraint_column: str = "constraints"
+        constraint_column: str = "constraints",
+        use_batch_api: bool = False
     ) -> pd.DataFrame:
         """
         Fit base content to constraints for a batch of samples.
@@ -119,74 +265,127 @@ class ConstraintFitter:
         Args:
             constraints_df: Constraints (from constraints.csv)
             base_df: Base content (from base_generated.csv)
-            output_path: Optional path to save results
+            output_path: Optional path to save results. CSV rows are streamed
+                         as they complete; a .parquet path is written once at
+                         the end (requires pyarrow)
             base_column: Column name containing base content (default: "base_content")
             constraint_column: Column name containing constraints (default: "constraints")
+            use_batch_api: Submit all samples as one provider batch job (half
+                           price, completes within 24h) instead of realtime calls
             
         Returns:
             DataFrame with fitted content
         """
-        # Merge dataframes on instruction_number
         if "instruction_number" not in constraints_df.columns:
             raise ValueError("constraints_df must have 'instruction_number' column")
         if "instruction_number" not in base_df.columns:
             raise ValueError("base_df must have 'instruction_number' column")
         
-        merged = pd.merge(
-            constraints_df,
-            base_df,
-            on="instruction_number",
-            suffixes=("_constraint", "_base")
-        )
+        if constraint_column in constraints_df.columns:
+            constraints_col = constraint_column
+        elif "constraints" in constraints_df.columns:
+            constraints_col = "constraints"
+        else:
+            raise ValueError(f"Could not find constraint column '{constraint_column}' in constraints_df")
         
-        self.logger.info(f"Fitting content for {len(merged)} samples")
+        if base_column in base_df.columns:
+            base_content_col = base_column
+        elif "base_content" in base_df.columns:
+            base_content_col = "base_content"
+        else:
+            raise ValueError(f"Could not find base content column '{base_column}' in base_df")
         
-        results = []
-        for idx, row in merged.iterrows():
-            instruction_num = row["instruction_number"]
-            
-            # Extract fields (handle suffix conflicts)
-            task = row.get("main_task_constraint", row.get("main_task", ""))
-            
-            # Try to get constraints with the specified column name
-            if constraint_column in row:
-                constraints = row[constraint_column]
-            elif f"{constraint_column}_constraint" in row:
-                constraints = row[f"{constraint_column}_constraint"]
-            elif "constraints" in row:
-                constraints = row["constraints"]
-            elif "constraints_constraint" in row:
-                constraints = row["constraints_constraint"]
-            else:
-                raise ValueError(f"Could not find constraint column '{constraint_column}' in merged dataframe")
-            
-            # Try to get base content with the specified column name
-            if base_column in row:
-                base_content = row[base_column]
-            elif f"{base_column}_base" in row:
-                base_content = row[f"{base_column}_base"]
-            elif "base_content" in row:
-                base_content = row["base_content"]
-            elif "base_content_base" in row:
-                base_content = row["base_content_base"]
-            else:
-                raise ValueError(f"Could not find base content column '{base_column}' in merged dataframe")
+        # Look base content up by instruction_number instead of merging the
+        # frames. Base output repeats each instruction once per subset size,
+        # so the first row per instruction_number is used.
+        base_nums = base_df["instruction_number"].tolist()
+        base_lookup = {}
+        for num, content in zip(base_nums, base_df[base_content_col].tolist()):
+            base_lookup.setdefault(num, content)
+        task_lookup = {}
+        if "main_task" not in constraints_df.columns and "main_task" in base_df.columns:
+            for num, task in zip(base_nums, base_df["main_task"].tolist()):
+                task_lookup.setdefault(num, task)
+        
+        if "main_task" in constraints_df.columns:
+            tasks = constraints_df["main_task"].tolist()
+        else:
+            tasks = [task_lookup.get(num, "") for num in constraints_df["instruction_number"].tolist()]
+        
+        # Constraint rows without base content are skipped, as with an inner join
+        samples = [
+            (num, task, constraints, base_lookup[num])
+            for num, task, constraints in zip(
+                constraints_df["instruction_number"].tolist(),
+                tasks,
+                constraints_df[constraints_col].tolist()
+            )
+            if num in base_lookup
+        ]
+        if len(samples) < len(constraints_df):
+            self.logger.warning(
+                f"Skipping {len(constraints_df) - len(samples)} constraint rows with no base content"
+            )
+        
+        self.logger.info(f"Fitting content for {len(samples)} samples")
+        
+        # Every row is stamped with the batch start time
+        batch_start = datetime.now().isoformat()
+        
+        # Expanded subsets repeat the same (task, constraints, base content)
+        # when a blog has fewer constraints than the smallest subset size, so
+        # each distinct prompt is fitted once and copied to its repeats
+        first_index = {}
+        rep_of = [
+            first_index.setdefault((task, constraints, base_content), i)
+            for i, (_, task, constraints, base_content) in enumerate(samples)
+        ]
+        last_use = {rep: i for i, rep in enumerate(rep_of)}
+        unique = [i for i, rep in enumerate(rep_of) if rep == i]
+        if len(unique) < len(samples):
+            self.logger.info(
+                f"{len(samples) - len(unique)} samples repeat an earlier prompt; "
+                f"making {len(unique)} fitting calls"
+            )
+        
+        # Offline mode: run every prompt as one batch job up front, keyed by
+        # row position, and only collect the responses below
+        batch_results = None
+        if use_batch_api:
+            batch_results = run_batch_job(
+                self.llm_client,
+                {
+                    str(i): self._build_prompt(task, base_content, constraints)
+                    for i, (_, task, constraints, base_content) in (
+                        (i, samples[i]) for i in unique
+                    )
+                },
+                model=self.model,
+                system_prompt=self.system_prompt
+            )
+        
+        def process(i):
+            instruction_num, task, constraints, base_content = samples[i]
             
             self.logger.info(f"Processing sample #{instruction_num}")
             
             try:
-                fitted_content, tokens = self.fit_content(
-                    task=task,
-                    base_content=base_content,
-                    constraints=constraints,
-                    log=True
-                )
+                if batch_results is not None:
+                    if str(i) not in batch_results:
+                        raise RuntimeError("No result returned by batch job")
+                    fitted_content, tokens = batch_results[str(i)]
+                else:
+                    fitted_content, tokens = self.fit_content(
+                        task=task,
+                        base_content=base_content,
+                        constraints=constraints,
+                        log=True
+                    )
                 
                 # Count constraints
-                import re
-                num_constraints = len(re.findall(r'^\d+\.', constraints, re.MULTILINE))
+                num_constraints = len(_COUNT_NUM_RE.findall(constraints))
                 
-                results.append({
+                return {
                     "instruction_number": instruction_num,
                     "main_task": task,
                     "constraints": constraints,
@@ -196,14 +395,14 @@ class ConstraintFitter:
                     "num_constraints": num_constraints,
                     "model_used": self.model,
                     "tokens_used": tokens,
-                    "timestamp": datetime.now().isoformat()
-                })
+                    "timestamp": batch_start
+                }
                 
             except Exception as e:
                 self.logger.error(
                     f"Failed to fit content for sample {instruction_num}: {e}"
                 )
-                results.append({
+                return {
                     "instruction_number": instruction_num,
                     "main_task": task,
                     "constraints": constraints,
@@ -213,13 +412,48 @@ class ConstraintFitter:
                     "num_constraints": 0,
                     "model_used": self.model,
                     "tokens_used": 0,
-                    "timestamp": datetime.now().isoformat()
-                })
+                    "timestamp": batch_start
+                }
+        
+        def expand_repeats(fitted):
+            """Yield a record for every sample, copying results to repeats."""
+            held = {}
+            bounds = unique[1:] + [len(samples)]
+            for (pos, record), end in zip(fitted, bounds):
+                held[unique[pos]] = record
+                for i in range(unique[pos], end):
+                    rep = rep_of[i]
+                    if rep == i:
+                        yield i, record
+                    else:
+                        # Tokens stay on the first occurrence so totals are accurate
+                        yield i, dict(held[rep], instruction_number=samples[i][0], tokens_used=0)
+                    if last_use[rep] == i:
+                        del held[rep]
+        
+        # Only the first of each group of repeated samples is sent;
+        # expand_repeats hands its result to the repeats in sample order
+        completed = expand_repeats(in_input_order(
+            run_concurrently(
+                process,
+                unique,
+                1 if batch_results is not None else self.max_concurrency
+            )
+        ))
+        
+        if output_path and not is_parquet_path(output_path):
+            # Each fitted sample is on disk as soon as it completes, so a
+            # crashed run keeps what it had already paid for
+            Config.ensure_directories()
+            result_df = stream_records((record for _, record in completed), output_path)
+            self.logger.info(f"Fitted content saved to {output_path}")
+            return compact_dtypes(result_df)
         
-        result_df = pd.DataFrame(results)
+        result_df = compact_dtypes(pd.DataFrame([record for _, record in completed]))
         
         if output_path:
-            result_df.to_csv(output_path, index=False, encoding="utf-8")
+            Config.ensure_directories()
+            write_parquet(result_df, output_path)
             self.logger.info(f"Fitted content saved to {output_path}")
         
         return result_df
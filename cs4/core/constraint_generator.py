@@ -5,15 +5,28 @@ Constraint generation module - extracts constraints from content.
 import pandas as pd
 import logging
 from time import sleep
-from typing import Optional, Callable
+from typing import Optional, Callable, List, Tuple
 from datetime import datetime
 
-from cs4.core.prompts import get_constraint_generation_prompt
-from cs4.utils.llm_client import OpenAIClient, AnthropicClient
+from cs4.core.prompts import (
+    get_constraint_generation_prompt,
+    get_constraint_generation_user_prompt,
+    get_marshaled_prompt,
+    parse_task_response,
+    split_marshaled_response
+)
+from cs4.utils.llm_client import OpenAIClient, get_adapter
+from cs4.utils.concurrency import run_concurrently, in_input_order
+from cs4.utils.rate_limiter import RateLimiter
+from cs4.utils.aimd import AimdController
+from cs4.utils.llm_cache import LLMCache, SemanticLLMCache, make_cache_key, normalize_text
+from cs4.utils.retry import RetryMixin
+from cs4.utils.record_writer import completed_keys
+from cs4.utils.frame_utils import compact_dtypes, is_parquet_path, stream_records, write_parquet
 from cs4.config import Config
 
 
-class ConstraintGenerator:
+class ConstraintGenerator(RetryMixin):
     """Generate constraints from existing content."""
     
     def __init__(
@@ -21,22 +34,73 @@ class ConstraintGenerator:
         llm_client: Optional[object] = None,
         model: str = None,
         retry_attempts: int = 3,
-        delay: float = 1.0
+        delay: float = 1.0,
+        max_concurrency: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        concurrency_controller: Optional[AimdController] = None,
+        marshal_batch_size: int = 1,
+        use_cache: bool = False,
+        cache_ttl: Optional[float] = None,
+        max_output_tokens: int = 2048,
+        timeout: float = 60.0,
+        compact_prompt: bool = False,
+        semantic_cache_threshold: Optional[float] = None
     ):
         """
         Initialize constraint generator.
         
         Args:
-            llm_client: LLM client (OpenAI or Anthropic)
+            llm_client: LLM client (OpenAI, Anthropic or an LLMAdapter)
             model: Model identifier
             retry_attempts: Number of retry attempts on failure
-            delay: Delay in seconds between retries
+            delay: Base delay in seconds for exponential backoff between retries
+            max_concurrency: Maximum number of concurrent LLM requests in batch mode
+            rate_limiter: Optional RPM/TPM limiter, which may be shared between
+                          instances
+            concurrency_controller: Optional AIMD controller that adapts the
+                                    number of in-flight calls (up to
+                                    max_concurrency) to latency and errors
+            marshal_batch_size: Number of rows packed into one LLM request in
+                                batch mode (1 sends every row on its own)
+            use_cache: Reuse responses for identical prompts from the on-disk
+                       LLM cache
+            cache_ttl: Seconds before a cached response expires (None to
+                       keep responses indefinitely)
+            max_output_tokens: Completion token cap per content (a packed
+                               request gets one cap per content)
+            timeout: Seconds before a single request is abandoned (and retried)
+            compact_prompt: Use the system prompt whose worked example lists 8
+                            instead of 39 constraints (about a third fewer
+                            prompt tokens per call)
+            semantic_cache_threshold: Reuse the constraints generated for an
+                                      earlier content whose embedding has at
+                                      least this cosine similarity (e.g.
+                                      0.92); None disables the lookup.
+                                      Embeddings are requested from OpenAI
         """
         self.llm_client = llm_client or OpenAIClient(log_usage=True)
+        self.llm = get_adapter(self.llm_client)
         self.model = model or Config.DEFAULT_CONSTRAINT_MODEL
         self.retry_attempts = retry_attempts
         self.delay = delay
-        self.system_prompt = get_constraint_generation_prompt()
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter
+        self.concurrency_controller = concurrency_controller
+        self.marshal_batch_size = max(1, marshal_batch_size)
+        self.cache = LLMCache() if use_cache else None
+        self.cache_ttl = cache_ttl
+        self.max_output_tokens = max_output_tokens
+        self.timeout = timeout
+        self.system_prompt = get_constraint_generation_prompt(compact=compact_prompt)
+        
+        self.semantic_cache = None
+        if semantic_cache_threshold is not None:
+            embed_client = (
+                self.llm_client if isinstance(self.llm_client, OpenAIClient)
+                else OpenAIClient(log_usage=True)
+            )
+            self.semantic_cache = SemanticLLMCache(embed_client.embed, threshold=semantic_cache_threshold)
+            self._semantic_namespace = make_cache_key("constraint_generation", self.model, self.system_prompt)
         
         self.logger = logging.getLogger("CS4Generator")
     
@@ -55,49 +119,131 @@ class ConstraintGenerator:
         Returns:
             Tuple of (main_task, constraints, tokens_used)
         """
-        user_input = f"Input - {content}\nOutput -"
+        cached = self._semantic_lookup(content)
+        if cached is not None:
+            return cached
         
-        for attempt in range(1, self.retry_attempts + 1):
-            try:
-                if isinstance(self.llm_client, OpenAIClient):
-                    response = self.llm_client.chat_completion(
-                        messages=[
-                            {"role": "system", "content": self.system_prompt},
-                            {"role": "user", "content": user_input}
-                        ],
-                        model=self.model
-                    )
-                    response_text = response.choices[0].message.content.strip()
-                    tokens = response.usage.total_tokens
-                elif isinstance(self.llm_client, AnthropicClient):
-                    response = self.llm_client.create_message(
-                        messages=[{"role": "user", "content": user_input}],
-                        model=self.model,
-                        system=self.system_prompt
-                    )
-                    response_text = response.content[0].text
-                    tokens = response.usage.input_tokens + response.usage.output_tokens
-                else:
-                    raise ValueError("Unknown client type")
-                
-                # Parse response to extract main task and constraints
-                main_task, constraints = self._parse_response(response_text)
-                
-                if log:
-                    self.logger.info(f"Total tokens used: {tokens}")
-                
-                return main_task, constraints, tokens
-                
-            except Exception as e:
-                self.logger.warning(
-                    f"Attempt {attempt}/{self.retry_attempts} failed: {e}"
+        user_input = get_constraint_generation_user_prompt(content)
+        response_text, tokens = self._call_llm(user_input, self.max_output_tokens)
+        
+        # Parse response to extract main task and constraints
+        main_task, constraints = self._parse_response(response_text)
+        self._semantic_store(content, main_task, constraints)
+        
+        if log:
+            self.logger.info(f"Total tokens used: {tokens}")
+        
+        return main_task, constraints, tokens
+    
+    def generate_constraints_for_batch_rows(
+        self,
+        contents: List[str],
+        log: bool = True
+    ) -> List[Tuple[str, str, int]]:
+        """
+        Generate constraints for several pieces of content with one LLM request.
+        
+        The contents are packed into a single prompt with numbered sections,
+        so the system prompt and per-request overhead are paid once. Contents
+        whose section is missing or unparseable from the response are retried
+        on their own.
+        
+        Args:
+            contents: Input blog/story/news contents
+            log: Whether to log token usage
+            
+        Returns:
+            One (main_task, constraints, tokens_used) tuple per content; the
+            request's tokens are split evenly across its contents
+        """
+        results = [self._semantic_lookup(content) for content in contents]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+        
+        pending_contents = [contents[i] for i in pending]
+        response_text, tokens = self._call_llm(
+            get_marshaled_prompt(pending_contents), self.max_output_tokens * len(pending)
+        )
+        
+        if log:
+            self.logger.info(f"Total tokens used: {tokens} for {len(pending)} contents")
+        
+        share, remainder = divmod(tokens, len(pending))
+        for n, (i, answer) in enumerate(
+            zip(pending, split_marshaled_response(response_text, len(pending)))
+        ):
+            main_task, constraints = self._parse_response(answer) if answer else ("", "")
+            if not constraints:
+                self.logger.warning(f"No constraints for content {i + 1} of a packed request, retrying alone")
+                results[i] = self.generate_constraints_for_content(contents[i], log=log)
+                continue
+            self._semantic_store(contents[i], main_task, constraints)
+            results[i] = (main_task, constraints, share + (remainder if n == 0 else 0))
+        
+        return results
+    
+    def _semantic_lookup(self, content: str) -> Optional[Tuple[str, str, int]]:
+        """Return (main_task, constraints, 0) cached for similar content, or None."""
+        if self.semantic_cache is None:
+            return None
+        cached = self.semantic_cache.get(self._semantic_namespace, normalize_text(content))
+        if cached is None:
+            return None
+        self.logger.debug("Semantic cache hit, skipping API call")
+        return cached["main_task"], cached["constraints"], 0
+    
+    def _semantic_store(self, content: str, main_task: str, constraints: str):
+        """Remember the constraints generated for content in the semantic cache."""
+        if self.semantic_cache is not None and constraints:
+            self.semantic_cache.set(
+                self._semantic_namespace,
+                normalize_text(content),
+                {"main_task": main_task, "constraints": constraints}
+            )
+    
+    def _call_llm(self, user_input: str, max_tokens: int) -> Tuple[str, int]:
+        """
+        Send one request with the constraint generation system prompt, retrying on failure.
+        
+        Args:
+            user_input: User message
+            max_tokens: Completion token cap for the request
+            
+        Returns:
+            Tuple of (response_text, tokens_used) (tokens_used is 0 on a cache hit)
+        """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(self.model, self.system_prompt, normalize_text(user_input))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.logger.debug("Cache hit, skipping API call")
+                return cached["text"], 0
+        
+        def attempt():
+            estimated_tokens = len(user_input) // 4
+            if self.rate_limiter:
+                self.rate_limiter.acquire(estimated_tokens=estimated_tokens)
+            
+            with self._call_slot():
+                response_text, tokens = self.llm.chat(
+                    system=self.system_prompt,
+                    user=user_input,
+                    model=self.model,
+                    max_tokens=max_tokens,
+                    timeout=self.timeout
                 )
-                if attempt < self.retry_attempts:
-                    sleep(self.delay)
-                else:
-                    raise
+            
+            if self.rate_limiter:
+                self.rate_limiter.reconcile(estimated_tokens, tokens)
+            
+            if cache_key is not None and response_text.strip():
+                self.cache.set(cache_key, {"text": response_text, "tokens": tokens}, ttl=self.cache_ttl)
+            
+            return response_text, tokens
         
-        raise RuntimeError("Failed to generate constraints")
+        return self._retry(attempt)
     
     def _parse_response(self, response_text: str) -> tuple[str, str]:
         """
@@ -109,28 +255,14 @@ class ConstraintGenerator:
         Returns:
             Tuple of (main_task, constraints)
         """
-        lines = response_text.strip().split('\n')
-        main_task = ""
-        constraints_lines = []
-        
-        in_constraints = False
-        for line in lines:
-            line = line.strip()
-            if line.startswith("Main Task:"):
-                main_task = line.replace("Main Task:", "").strip()
-            elif line.startswith("Constraints:"):
-                in_constraints = True
-            elif in_constraints and line:
-                constraints_lines.append(line)
-        
-        constraints = "\n".join(constraints_lines)
-        return main_task, constraints
+        return parse_task_response(response_text)
     
     def generate_constraints_batch(
         self,
         df: pd.DataFrame,
         content_column: str = "Merged Blog",
-        output_path: Optional[str] = None
+        output_path: Optional[str] = None,
+        resume: bool = False
     ) -> pd.DataFrame:
         """
         Generate constraints for a batch of content samples.
@@ -138,7 +270,11 @@ class ConstraintGenerator:
         Args:
             df: Input DataFrame with content
             content_column: Name of column containing content
-            output_path: Optional path to save results
+            output_path: Optional path to save results. CSV rows are streamed
+                         as they complete; a .parquet path is written once at
+                         the end (requires pyarrow)
+            resume: Skip samples whose instruction_number is already in a
+                    CSV output_path from an earlier run and append the rest
             
         Returns:
             DataFrame with constraints
@@ -148,47 +284,91 @@ class ConstraintGenerator:
         
         self.logger.info(f"Processing {len(df)} samples")
         
-        results = []
-        for idx, row in df.iterrows():
-            content = row[content_column]
-            instruction_num = idx + 1
+        rows = list(zip(df.index, df[content_column].tolist()))
+        
+        done = set()
+        if resume and output_path and not is_parquet_path(output_path):
+            done = completed_keys(output_path)
+            if done:
+                rows = [row for row in rows if row[0] + 1 not in done]
+                self.logger.info(f"Resuming: {len(done)} samples already in {output_path}, {len(rows)} left")
+        
+        # Rows are sent marshal_batch_size at a time (one at a time by default)
+        size = self.marshal_batch_size
+        chunks = [list(range(start, min(start + size, len(rows)))) for start in range(0, len(rows), size)]
+        
+        def process(chunk):
+            contents = [rows[i][1] for i in chunk]
             
-            self.logger.info(f"Processing instruction #{instruction_num}")
+            for i in chunk:
+                self.logger.info(f"Processing instruction #{rows[i][0] + 1}")
             
             try:
-                main_task, constraints, tokens = self.generate_constraints_for_content(
-                    content, log=True
-                )
+                if len(chunk) == 1:
+                    outputs = [self.generate_constraints_for_content(contents[0], log=True)]
+                else:
+                    outputs = self.generate_constraints_for_batch_rows(contents, log=True)
                 
-                results.append({
-                    "instruction_number": instruction_num,
-                    "instruction": content,
-                    "main_task": main_task,
-                    "constraints": constraints,
-                    "model_used": self.model,
-                    "tokens_used": tokens,
-                    "timestamp": datetime.now().isoformat()
-                })
+                return [
+                    {
+                        "instruction_number": rows[i][0] + 1,
+                        "instruction": rows[i][1],
+                        "main_task": main_task,
+                        "constraints": constraints,
+                        "model_used": self.model,
+                        "tokens_used": tokens,
+                        "timestamp": datetime.now().isoformat()
+                    }
+                    for i, (main_task, constraints, tokens) in zip(chunk, outputs)
+                ]
                 
             except Exception as e:
-                self.logger.error(
-                    f"Failed to generate constraints for instruction {instruction_num}: {e}"
-                )
-                results.append({
-                    "instruction_number": instruction_num,
-                    "instruction": content,
-                    "main_task": "",
-                    "constraints": "",
-                    "model_used": self.model,
-                    "tokens_used": 0,
-                    "timestamp": datetime.now().isoformat()
-                })
-        
-        result_df = pd.DataFrame(results)
+                records = []
+                for i in chunk:
+                    self.logger.error(
+                        f"Failed to generate constraints for instruction {rows[i][0] + 1}: {e}"
+                    )
+                    records.append({
+                        "instruction_number": rows[i][0] + 1,
+                        "instruction": rows[i][1],
+                        "main_task": "",
+                        "constraints": "",
+                        "model_used": self.model,
+                        "tokens_used": 0,
+                        "timestamp": datetime.now().isoformat()
+                    })
+                return records
+        
+        # A chunk is one (possibly packed) request; its records are flattened
+        # back into one row per instruction
+        completed = (
+            record
+            for _, records in in_input_order(
+                run_concurrently(process, chunks, self.max_concurrency)
+            )
+            for record in records
+        )
+        
+        if output_path and not is_parquet_path(output_path):
+            Config.ensure_directories()
+            result_df = stream_records(completed, output_path, append=bool(done))
+            self.logger.info(f"Constraints saved to {output_path}")
+            if self.cache is not None:
+                self.logger.info(f"Response cache: {self.cache.stats()}")
+            if self.semantic_cache is not None:
+                self.logger.info(f"Semantic cache: {self.semantic_cache.stats()}")
+            return compact_dtypes(result_df)
+        
+        result_df = compact_dtypes(pd.DataFrame(list(completed)))
         
         if output_path:
-            result_df.to_csv(output_path, index=False, encoding="utf-8")
+            Config.ensure_directories()
+            write_parquet(result_df, output_path)
             self.logger.info(f"Constraints saved to {output_path}")
+        if self.cache is not None:
+            self.logger.info(f"Response cache: {self.cache.stats()}")
+        if self.semantic_cache is not None:
+            self.logger.info(f"Semantic cache: {self.semantic_cache.stats()}")
         
         return result_df
 
@@ -229,8 +409,7 @@ def generate_constraints(
     )
     
     constraints_list = []
-    for idx, row in df.iterrows():
-        instruction = row['Merged Blog']
+    for idx, instruction in zip(df.index, df['Merged Blog'].tolist()):
         instruction_num = idx + 1
         logging.info(f"Processing instruction #{instruction_num}")
         
@@ -265,6 +444,7 @@ def generate_constraints(
         })
     
     result_df = pd.DataFrame(constraints_list)
+    Config.ensure_directories()
     result_df.to_csv(output_path, index=False)
     logging.info(f"Constraints saved to {output_path}")
     
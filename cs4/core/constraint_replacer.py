@@ -4,17 +4,26 @@ Constraint replacement module - replaces easy constraints with harder ones.
 
 import pandas as pd
 import logging
-import re
-from time import sleep
 from typing import Optional, Tuple
 from datetime import datetime
 
-from cs4.core.prompts import get_constraint_replacement_prompt
-from cs4.utils.llm_client import OpenAIClient, AnthropicClient
+from cs4.core.prompts import (
+    CONSTRAINT_REPLACEMENT_SYSTEM_PROMPT,
+    get_constraint_replacement_user_prompt,
+    parse_task_response
+)
+from cs4.utils.llm_client import OpenAIClient, get_adapter
+from cs4.utils.concurrency import run_concurrently, in_input_order
+from cs4.utils.rate_limiter import RateLimiter
+from cs4.utils.aimd import AimdController
+from cs4.utils.llm_cache import LLMCache, make_cache_key
+from cs4.utils.retry import RetryMixin
+from cs4.utils.record_writer import completed_keys
+from cs4.utils.frame_utils import compact_dtypes, is_parquet_path, stream_records, write_parquet
 from cs4.config import Config
 
 
-class ConstraintReplacer:
+class ConstraintReplacer(RetryMixin):
     """Replace satisfied (easy) constraints with harder, unsatisfied ones."""
     
     def __init__(
@@ -22,21 +31,48 @@ class ConstraintReplacer:
         llm_client: Optional[object] = None,
         model: str = None,
         retry_attempts: int = 3,
-        delay: float = 1.0
+        delay: float = 1.0,
+        max_concurrency: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        concurrency_controller: Optional[AimdController] = None,
+        use_cache: bool = False,
+        cache_ttl: Optional[float] = None,
+        max_output_tokens: int = 2048,
+        timeout: float = 60.0
     ):
         """
         Initialize constraint replacer.
         
         Args:
-            llm_client: LLM client (OpenAI or Anthropic)
+            llm_client: LLM client (OpenAI, Anthropic or an LLMAdapter)
             model: Model identifier
             retry_attempts: Number of retry attempts on failure
-            delay: Delay in seconds between retries
+            delay: Base delay in seconds for exponential backoff between retries
+            max_concurrency: Maximum number of concurrent LLM requests in batch mode
+            rate_limiter: Optional RPM/TPM limiter, which may be shared between
+                          instances
+            concurrency_controller: Optional AIMD controller that adapts the
+                                    number of in-flight calls (up to
+                                    max_concurrency) to latency and errors
+            use_cache: Reuse responses for identical prompts from the on-disk
+                       LLM cache
+            cache_ttl: Seconds before a cached response expires (None to
+                       keep responses indefinitely)
+            max_output_tokens: Completion token cap per request
+            timeout: Seconds before a single request is abandoned (and retried)
         """
         self.llm_client = llm_client or OpenAIClient(log_usage=True)
+        self.llm = get_adapter(self.llm_client)
         self.model = model or Config.DEFAULT_CONSTRAINT_MODEL
         self.retry_attempts = retry_attempts
         self.delay = delay
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter
+        self.concurrency_controller = concurrency_controller
+        self.cache = LLMCache() if use_cache else None
+        self.cache_ttl = cache_ttl
+        self.max_output_tokens = max_output_tokens
+        self.timeout = timeout
         self.logger = logging.getLogger("CS4Generator")
     
     def replace_constraints(
@@ -58,75 +94,69 @@ class ConstraintReplacer:
             log: Whether to log token usage
             
         Returns:
-            Tuple of (main_task, revised_constraints, tokens_used)
+            Tuple of (main_task, revised_constraints, tokens_used) (tokens_used
+            is 0 on a cache hit)
         """
-        prompt = get_constraint_replacement_prompt(
+        prompt = get_constraint_replacement_user_prompt(
             main_task=main_task,
             original_constraints=original_constraints,
             base_content=base_content,
             satisfaction_results=satisfaction_results
         )
         
-        for attempt in range(1, self.retry_attempts + 1):
-            try:
-                if isinstance(self.llm_client, OpenAIClient):
-                    response = self.llm_client.chat_completion(
-                        messages=[{"role": "user", "content": prompt}],
-                        model=self.model
-                    )
-                    response_text = response.choices[0].message.content.strip()
-                    tokens = response.usage.total_tokens
-                elif isinstance(self.llm_client, AnthropicClient):
-                    response = self.llm_client.create_message(
-                        messages=[{"role": "user", "content": prompt}],
-                        model=self.model
-                    )
-                    response_text = response.content[0].text
-                    tokens = response.usage.input_tokens + response.usage.output_tokens
-                else:
-                    raise ValueError("Unknown client type")
-                
-                revised_task, revised_constraints = self._parse_response(response_text)
-                
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(self.model, CONSTRAINT_REPLACEMENT_SYSTEM_PROMPT, prompt)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
                 if log:
-                    self.logger.info(f"Total tokens used: {tokens}")
-                
-                return revised_task, revised_constraints, tokens
-                
-            except Exception as e:
-                self.logger.warning(f"Attempt {attempt}/{self.retry_attempts} failed: {e}")
-                if attempt < self.retry_attempts:
-                    sleep(self.delay)
-                else:
-                    raise
+                    self.logger.info("Cache hit, skipping API call")
+                return cached["main_task"], cached["constraints"], 0
+        
+        def attempt():
+            estimated_tokens = (len(CONSTRAINT_REPLACEMENT_SYSTEM_PROMPT) + len(prompt)) // 4
+            if self.rate_limiter:
+                self.rate_limiter.acquire(estimated_tokens=estimated_tokens)
+            
+            with self._call_slot():
+                response_text, tokens = self.llm.chat(
+                    system=CONSTRAINT_REPLACEMENT_SYSTEM_PROMPT,
+                    user=prompt,
+                    model=self.model,
+                    max_tokens=self.max_output_tokens,
+                    timeout=self.timeout
+                )
+            
+            if self.rate_limiter:
+                self.rate_limiter.reconcile(estimated_tokens, tokens)
+            
+            revised_task, revised_constraints = self._parse_response(response_text)
+            
+            if log:
+                self.logger.info(f"Total tokens used: {tokens}")
+            
+            if cache_key is not None and revised_constraints:
+                self.cache.set(
+                    cache_key,
+                    {"main_task": revised_task, "constraints": revised_constraints, "tokens": tokens},
+                    ttl=self.cache_ttl
+                )
+            
+            return revised_task, revised_constraints, tokens
         
-        raise RuntimeError("Failed to replace constraints")
+        return self._retry(attempt)
     
     def _parse_response(self, response_text: str) -> Tuple[str, str]:
         """Parse LLM response to extract main task and revised constraints."""
-        lines = response_text.strip().split('\n')
-        main_task = ""
-        constraints_lines = []
-        
-        in_constraints = False
-        for line in lines:
-            line = line.strip()
-            if line.startswith("Main Task:"):
-                main_task = line.replace("Main Task:", "").strip()
-            elif line.startswith("Constraints:") or line.startswith("Revised Constraints:"):
-                in_constraints = True
-            elif in_constraints and line:
-                constraints_lines.append(line)
-        
-        constraints = "\n".join(constraints_lines)
-        return main_task, constraints
+        return parse_task_response(response_text, allow_revised=True)
     
     def replace_batch(
         self,
         constraints_df: pd.DataFrame,
         base_df: pd.DataFrame,
         evaluation_df: pd.DataFrame,
-        output_path: Optional[str] = None
+        output_path: Optional[str] = None,
+        resume: bool = False
     ) -> pd.DataFrame:
         """
         Replace constraints for a batch of samples.
@@ -135,7 +165,11 @@ class ConstraintReplacer:
             constraints_df: Original constraints (from common_constraints.csv)
             base_df: Base content (from base_generated.csv)
             evaluation_df: Evaluation results (from base_evaluation.csv)
-            output_path: Optional path to save results
+            output_path: Optional path to save results. CSV rows are streamed
+                         as they complete; a .parquet path is written once at
+                         the end (requires pyarrow)
+            resume: Skip samples whose instruction_number is already in a
+                    CSV output_path from an earlier run and append the rest
             
         Returns:
             DataFrame with revised constraints
@@ -145,14 +179,30 @@ class ConstraintReplacer:
         
         self.logger.info(f"Replacing constraints for {len(merged)} samples")
         
-        results = []
-        for idx, row in merged.iterrows():
-            instruction_num = row["instruction_number"]
-            
-            main_task = row.get("main_task_constraint", row.get("main_task", ""))
-            original_constraints = row["constraints"]
-            base_content = row["base_content"]
-            satisfaction_results = row["satisfaction_results"]
+        # Pull the needed columns out once instead of materializing every row
+        if "main_task_constraint" in merged.columns:
+            main_tasks = merged["main_task_constraint"].tolist()
+        elif "main_task" in merged.columns:
+            main_tasks = merged["main_task"].tolist()
+        else:
+            main_tasks = [""] * len(merged)
+        rows = list(zip(
+            merged["instruction_number"].tolist(),
+            main_tasks,
+            merged["constraints"].tolist(),
+            merged["base_content"].tolist(),
+            merged["satisfaction_results"].tolist()
+        ))
+        
+        done = set()
+        if resume and output_path and not is_parquet_path(output_path):
+            done = completed_keys(output_path)
+            if done:
+                rows = [row for row in rows if row[0] not in done]
+                self.logger.info(f"Resuming: {len(done)} samples already in {output_path}, {len(rows)} left")
+        
+        def process(i):
+            instruction_num, main_task, original_constraints, base_content, satisfaction_results = rows[i]
             
             self.logger.info(f"Processing sample #{instruction_num}")
             
@@ -165,7 +215,7 @@ class ConstraintReplacer:
                     log=True
                 )
                 
-                results.append({
+                return {
                     "instruction_number": instruction_num,
                     "main_task": revised_task,
                     "original_constraints": original_constraints,
@@ -174,11 +224,11 @@ class ConstraintReplacer:
                     "model_used": self.model,
                     "tokens_used": tokens,
                     "timestamp": datetime.now().isoformat()
-                })
+                }
                 
             except Exception as e:
                 self.logger.error(f"Failed to replace constraints for sample {instruction_num}: {e}")
-                results.append({
+                return {
                     "instruction_number": instruction_num,
                     "main_task": main_task,
                     "original_constraints": original_constraints,
@@ -187,12 +237,25 @@ class ConstraintReplacer:
                     "model_used": self.model,
                     "tokens_used": 0,
                     "timestamp": datetime.now().isoformat()
-                })
+                }
+        
+        completed = (
+            record for _, record in in_input_order(
+                run_concurrently(process, range(len(rows)), self.max_concurrency)
+            )
+        )
+        
+        if output_path and not is_parquet_path(output_path):
+            Config.ensure_directories()
+            result_df = stream_records(completed, output_path, append=bool(done))
+            self.logger.info(f"Revised constraints saved to {output_path}")
+            return compact_dtypes(result_df)
         
-        result_df = pd.DataFrame(results)
+        result_df = compact_dtypes(pd.DataFrame(list(completed)))
         
         if output_path:
-            result_df.to_csv(output_path, index=False, encoding="utf-8")
+            Config.ensure_directories()
+            write_parquet(result_df, output_path)
             self.logger.info(f"Revised constraints saved to {output_path}")
         
         return result_df
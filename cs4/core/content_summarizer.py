@@ -2,18 +2,55 @@
 Content summarization module - reduces content length while preserving key insights.
 """
 
+import numpy as np
 import pandas as pd
 import logging
-from time import sleep
-from typing import Optional, Tuple
+from typing import List, Optional, Sequence, Tuple
 from datetime import datetime
 
-from cs4.core.prompts import get_summarization_prompt
-from cs4.utils.llm_client import OpenAIClient, AnthropicClient, UsageTracker
+from cs4.core.prompts import (
+    get_summarization_prompt,
+    get_summarization_batch_prompt,
+    split_marshaled_response
+)
+from cs4.utils.llm_client import OpenAIClient, UsageTracker, get_adapter
+from cs4.utils.concurrency import run_concurrently, in_input_order
+from cs4.utils.rate_limiter import RateLimiter
+from cs4.utils.aimd import AimdController
+from cs4.utils.llm_cache import LLMCache, make_cache_key
+from cs4.utils.retry import RetryMixin
+from cs4.utils.tokens import count_tokens
+from cs4.utils.record_writer import completed_keys
+from cs4.utils.frame_utils import compact_dtypes, is_parquet_path, stream_records, write_parquet
 from cs4.config import Config
 
 
-class ContentSummarizer:
+def _length_columns(original_lengths, summaries: List[str], failed) -> dict:
+    """
+    Compute the length and compression ratio columns in one vectorized pass.
+    
+    Args:
+        original_lengths: Character counts of the original contents
+        summaries: Summarized texts (the original text for failed rows)
+        failed: Boolean flags marking rows whose summarization failed
+        
+    Returns:
+        Dictionary of summarized_length, original_length and compression_ratio arrays
+    """
+    summarized = np.fromiter((len(text) for text in summaries), dtype=np.int64, count=len(summaries))
+    original = np.asarray(original_lengths, dtype=np.int64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(original > 0, summarized / original, 0.0)
+    # Failed rows keep their original text, which counts as a ratio of 1
+    ratio = np.where(np.asarray(failed, dtype=bool), 1.0, ratio)
+    return {
+        "summarized_length": summarized,
+        "original_length": original,
+        "compression_ratio": ratio
+    }
+
+
+class ContentSummarizer(RetryMixin):
     """Summarize content to a target percentage of original length."""
     
     def __init__(
@@ -23,32 +60,91 @@ class ContentSummarizer:
         content_type: str = "blog",
         target_length_pct: float = 0.25,
         retry_attempts: int = 3,
-        delay: float = 1.0
+        delay: float = 1.0,
+        max_concurrency: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        concurrency_controller: Optional[AimdController] = None,
+        marshal_batch_size: int = 1,
+        use_cache: bool = False,
+        cache_ttl: Optional[float] = None,
+        timeout: float = 60.0,
+        model_routes: Optional[Sequence[Tuple[int, str]]] = None
     ):
         """
         Initialize content summarizer.
         
         Args:
-            llm_client: LLM client (OpenAI or Anthropic)
+            llm_client: LLM client (OpenAI, Anthropic or an LLMAdapter)
             model: Model identifier
             content_type: Type of content (blog, story, news)
             target_length_pct: Target length as percentage of original (default: 0.25 = 25%)
             retry_attempts: Number of retry attempts on failure
-            delay: Delay in seconds between retries
+            delay: Base delay in seconds for exponential backoff between retries
+            max_concurrency: Maximum number of concurrent LLM requests in batch mode
+            rate_limiter: Optional RPM/TPM limiter, which may be shared between
+                          instances
+            concurrency_controller: Optional AIMD controller that adapts the
+                                    number of in-flight calls (up to
+                                    max_concurrency) to latency and errors
+            marshal_batch_size: Number of rows packed into one LLM request in
+                                batch mode (1 sends every row on its own)
+            use_cache: Reuse responses for identical prompts from the on-disk
+                       LLM cache
+            cache_ttl: Seconds before a cached response expires (None to
+                       keep responses indefinitely)
+            timeout: Seconds before a single request is abandoned (and retried)
+            model_routes: Optional (max_tokens, model) pairs; content shorter
+                          than a route's token bound goes to that route's
+                          model (smallest bound first) and longer content to
+                          `model`, e.g. [(2000, "gpt-4o-mini")]
         """
         self.llm_client = llm_client or OpenAIClient(log_usage=True)
+        self.llm = get_adapter(self.llm_client)
         self.model = model or Config.DEFAULT_MODEL
+        self.model_routes = sorted(model_routes or [])
+        # Everything before the content is the same for every row
+        self._prompt_prefix = get_summarization_prompt(
+            content_type=content_type,
+            content="",
+            target_length_pct=target_length_pct
+        )
         self.content_type = content_type
         self.target_length_pct = target_length_pct
         self.retry_attempts = retry_attempts
         self.delay = delay
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter
+        self.concurrency_controller = concurrency_controller
+        self.marshal_batch_size = max(1, marshal_batch_size)
+        self.cache = LLMCache() if use_cache else None
+        self.cache_ttl = cache_ttl
+        self.timeout = timeout
         
         self.logger = logging.getLogger("CS4Generator")
     
+    def select_model(self, content: str) -> str:
+        """
+        Pick the model for content from model_routes by its token count.
+        
+        Args:
+            content: Content (or packed contents) to be summarized
+            
+        Returns:
+            Routed model, or self.model when no route applies
+        """
+        if not self.model_routes:
+            return self.model
+        num_tokens = count_tokens(content, self.model)
+        for max_tokens, model in self.model_routes:
+            if num_tokens < max_tokens:
+                return model
+        return self.model
+    
     def summarize_content(
         self,
         content: str,
-        log: bool = True
+        log: bool = True,
+        model: Optional[str] = None
     ) -> Tuple[str, int]:
         """
         Summarize content to target length percentage.
@@ -56,60 +152,142 @@ class ContentSummarizer:
         Args:
             content: Content to summarize
             log: Whether to log token usage
+            model: Model to use (defaults to select_model(content))
             
         Returns:
             Tuple of (summarized_content, tokens_used)
         """
-        prompt = get_summarization_prompt(
+        prompt = self._prompt_prefix + content
+        model = model or self.select_model(content)
+        
+        summarized, tokens = self._call_llm(prompt, self._max_summary_tokens(content), model)
+        
+        if log and tokens:
+            self._log_usage(tokens, f"summarize ({len(content)} → {len(summarized)} chars)", model)
+        
+        return summarized, tokens
+    
+    def summarize_contents(
+        self,
+        contents: List[str],
+        log: bool = True,
+        model: Optional[str] = None
+    ) -> List[Tuple[str, int]]:
+        """
+        Summarize several contents with one LLM request.
+        
+        The contents are packed into a single prompt with numbered sections,
+        so the instructions and per-request overhead are paid once. Contents
+        whose section is missing from the response are retried on their own.
+        
+        Args:
+            contents: Contents to summarize
+            log: Whether to log token usage
+            model: Model to use (defaults to select_model() of the packed
+                   contents)
+            
+        Returns:
+            One (summarized_content, tokens_used) tuple per content; the
+            request's tokens are split evenly across its contents
+        """
+        prompt = get_summarization_batch_prompt(
             content_type=self.content_type,
-            content=content,
+            contents=contents,
             target_length_pct=self.target_length_pct
         )
+        model = model or self.select_model("\n\n".join(contents))
+        response_text, tokens = self._call_llm(
+            prompt, sum(self._max_summary_tokens(content) for content in contents), model
+        )
         
-        for attempt in range(1, self.retry_attempts + 1):
-            try:
-                if isinstance(self.llm_client, OpenAIClient):
-                    response = self.llm_client.client.chat.completions.create(
-                        messages=[
-                            {"role": "user", "content": prompt}
-                        ],
-                        model=self.model
-                    )
-                    summarized = response.choices[0].message.content.strip()
-                    tokens = response.usage.total_tokens
-                else:  # Anthropic
-                    response = self.llm_client.create_message(
-                        messages=[{"role": "user", "content": prompt}],
-                        model=self.model
-                    )
-                    summarized = response.content[0].text
-                    tokens = response.usage.input_tokens + response.usage.output_tokens
-                
-                if log:
-                    UsageTracker.log_usage(
-                        provider=self.llm_client.__class__.__name__.replace("Client", "").lower(),
-                        model=self.model,
-                        tokens=tokens,
-                        metadata=f"summarize ({len(content)} → {len(summarized)} chars)"
-                    )
-                    self.logger.info(f"Total tokens used: {UsageTracker.get_total_usage()['total_tokens']}")
-                
-                return summarized, tokens
-                
-            except Exception as e:
-                self.logger.warning(f"Attempt {attempt}/{self.retry_attempts} failed: {e}")
-                if attempt < self.retry_attempts:
-                    sleep(self.delay)
-                else:
-                    raise
+        if log and tokens:
+            self._log_usage(tokens, f"summarize batch ({len(contents)} contents)", model)
+        
+        share, remainder = divmod(tokens, len(contents))
+        results = []
+        for i, (content, summarized) in enumerate(
+            zip(contents, split_marshaled_response(response_text, len(contents)))
+        ):
+            if not summarized:
+                self.logger.warning(f"No summary for content {i + 1} of a packed request, retrying alone")
+                results.append(self.summarize_content(content, log=log))
+                continue
+            results.append((summarized, share + (remainder if i == 0 else 0)))
         
-        raise RuntimeError("Failed to summarize content")
+        return results
+    
+    def _log_usage(self, tokens: int, metadata: str, model: Optional[str] = None):
+        """Record a summarization call with the usage tracker."""
+        # Clients with log_usage enabled have already recorded the call
+        if not getattr(self.llm_client, "log_usage", False):
+            UsageTracker.log_usage(
+                provider=self.llm_client.__class__.__name__.replace("Client", "").lower(),
+                model=model or self.model,
+                tokens=tokens,
+                metadata=metadata
+            )
+        self.logger.info(f"Tokens used: {tokens} ({metadata})")
+    
+    def _max_summary_tokens(self, content: str) -> int:
+        """
+        Completion token cap for summarizing content.
+        
+        Allows about 1.5x the target length (at ~1.3 tokens per word) so a
+        runaway response is cut off without truncating a normal summary.
+        """
+        return max(256, int(len(str(content).split()) * self.target_length_pct * 2))
+    
+    def _call_llm(self, prompt: str, max_tokens: int, model: Optional[str] = None) -> Tuple[str, int]:
+        """
+        Send one summarization request, retrying on failure.
+        
+        Args:
+            prompt: User message
+            max_tokens: Completion token cap for the request
+            model: Model to use (defaults to self.model)
+            
+        Returns:
+            Tuple of (response_text, tokens_used) (tokens_used is 0 on a cache hit)
+        """
+        model = model or self.model
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(model, prompt)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.logger.debug("Cache hit, skipping API call")
+                return cached["text"], 0
+        
+        def attempt():
+            estimated_tokens = len(prompt) // 4
+            if self.rate_limiter:
+                self.rate_limiter.acquire(estimated_tokens=estimated_tokens)
+            
+            with self._call_slot():
+                summarized, tokens = self.llm.chat(
+                    system=None,
+                    user=prompt,
+                    model=model,
+                    max_tokens=max_tokens,
+                    timeout=self.timeout
+                )
+            
+            if self.rate_limiter:
+                self.rate_limiter.reconcile(estimated_tokens, tokens)
+            
+            if cache_key is not None and summarized.strip():
+                self.cache.set(cache_key, {"text": summarized, "tokens": tokens}, ttl=self.cache_ttl)
+            
+            return summarized, tokens
+        
+        return self._retry(attempt)
     
     def summarize_batch(
         self,
         df: pd.DataFrame,
         content_column: str = "fitted_content",
-        output_path: Optional[str] = None
+        output_path: Optional[str] = None,
+        resume: bool = False
     ) -> pd.DataFrame:
         """
         Summarize content for a batch of samples.
@@ -117,7 +295,11 @@ class ContentSummarizer:
         Args:
             df: DataFrame with content to summarize
             content_column: Name of column containing content
-            output_path: Optional path to save results
+            output_path: Optional path to save results. CSV rows are streamed
+                         as they complete; a .parquet path is written once at
+                         the end (requires pyarrow)
+            resume: Skip samples whose instruction_number is already in a
+                    CSV output_path from an earlier run and append the rest
             
         Returns:
             DataFrame with summarized content
@@ -127,45 +309,119 @@ class ContentSummarizer:
         
         self.logger.info(f"Summarizing {len(df)} samples to {int(self.target_length_pct * 100)}% length")
         
-        results = []
-        for idx, row in df.iterrows():
-            instruction_num = row.get("instruction_number", idx + 1)
-            content = row[content_column]
+        rows = list(zip(df.index, df.to_dict("records")))
+        
+        done = set()
+        if resume and output_path and not is_parquet_path(output_path):
+            done = completed_keys(output_path)
+            if done:
+                rows = [
+                    (index, record) for index, record in rows
+                    if record.get("instruction_number", index + 1) not in done
+                ]
+                self.logger.info(f"Resuming: {len(done)} samples already in {output_path}, {len(rows)} left")
+        
+        # Fixed column set so streamed rows line up whether or not they failed
+        summary_columns = (
+            "summarized_content", "summarized_length", "original_length",
+            "compression_ratio", "model_used", "tokens_used", "timestamp", "error"
+        )
+        fieldnames = list(df.columns) + [col for col in summary_columns if col not in df.columns]
+        
+        # Rows are sent marshal_batch_size at a time (one at a time by default)
+        size = self.marshal_batch_size
+        chunks = [list(range(start, min(start + size, len(rows)))) for start in range(0, len(rows), size)]
+        
+        def process(chunk):
+            contents = [rows[i][1][content_column] for i in chunk]
+            instruction_nums = [rows[i][1].get("instruction_number", rows[i][0] + 1) for i in chunk]
             
-            self.logger.info(f"Processing sample #{instruction_num}")
+            for instruction_num in instruction_nums:
+                self.logger.info(f"Processing sample #{instruction_num}")
             
             try:
-                summarized, tokens = self.summarize_content(
-                    content=content,
-                    log=True
-                )
-                
-                result = row.copy()
-                result["summarized_content"] = summarized
-                result["summarized_length"] = len(summarized)
-                result["original_length"] = len(content)
-                result["compression_ratio"] = len(summarized) / len(content) if len(content) > 0 else 0
-                result["model_used"] = self.model
-                result["tokens_used"] = tokens
-                result["timestamp"] = datetime.now().isoformat()
+                if len(chunk) == 1:
+                    model = self.select_model(contents[0])
+                    outputs = [self.summarize_content(content=contents[0], log=True, model=model)]
+                else:
+                    model = self.select_model("\n\n".join(contents))
+                    outputs = self.summarize_contents(contents, log=True, model=model)
                 
-                results.append(result)
+                results = []
+                for i, content, (summarized, tokens) in zip(chunk, contents, outputs):
+                    results.append((i, {
+                        "summarized_content": summarized,
+                        "model_used": model,
+                        "tokens_used": tokens,
+                        "timestamp": datetime.now().isoformat()
+                    }))
+                return results
                 
             except Exception as e:
-                self.logger.error(f"Failed to summarize sample #{instruction_num}: {e}")
-                # Keep original with error marker
-                result = row.copy()
-                result["summarized_content"] = content  # Keep original
-                result["summarized_length"] = len(content)
-                result["original_length"] = len(content)
-                result["compression_ratio"] = 1.0
-                result["error"] = str(e)
-                results.append(result)
-        
-        result_df = pd.DataFrame(results)
+                results = []
+                for i, content, instruction_num in zip(chunk, contents, instruction_nums):
+                    self.logger.error(f"Failed to summarize sample #{instruction_num}: {e}")
+                    # Keep original with error marker
+                    results.append((i, {
+                        "summarized_content": content,  # Keep original
+                        "error": str(e)
+                    }))
+                return results
+        
+        # Each result only carries the new columns, not a copy of its input
+        # row; lengths and ratios are derived afterwards in vectorized passes
+        completed = (
+            results
+            for _, results in in_input_order(
+                run_concurrently(process, chunks, self.max_concurrency)
+            )
+        )
+        
+        if output_path and not is_parquet_path(output_path):
+            Config.ensure_directories()
+            
+            def records():
+                for results in completed:
+                    lengths = _length_columns(
+                        [len(rows[i][1][content_column]) for i, _ in results],
+                        [fields["summarized_content"] for _, fields in results],
+                        ["error" in fields for _, fields in results]
+                    )
+                    for j, (i, fields) in enumerate(results):
+                        record = {**rows[i][1], **fields}
+                        record.update({col: values[j].item() for col, values in lengths.items()})
+                        yield record
+            
+            result_df = stream_records(records(), output_path, append=bool(done), fieldnames=fieldnames)
+            UsageTracker.flush()
+            self.logger.info(f"Summarized content saved to {output_path}")
+            return compact_dtypes(result_df)
+        
+        # Fill one list per summary column and attach them to df in one assign;
+        # columns df already has keep their values where a row does not set them
+        new_columns = {
+            col: df[col].tolist() if col in df.columns else [None] * len(rows)
+            for col in summary_columns
+        }
+        failed = [False] * len(rows)
+        for results in completed:
+            for i, fields in results:
+                for col, value in fields.items():
+                    new_columns[col][i] = value
+                failed[i] = "error" in fields
+        UsageTracker.flush()
+        new_columns.update(_length_columns(
+            df[content_column].str.len().to_numpy(dtype=np.int64, na_value=0),
+            new_columns["summarized_content"],
+            failed
+        ))
+        if "error" not in df.columns and all(error is None for error in new_columns["error"]):
+            new_columns.pop("error", None)
+        result_df = compact_dtypes(df.reset_index(drop=True).assign(**new_columns))
         
         if output_path:
-            result_df.to_csv(output_path, index=False, encoding="utf-8")
+            Config.ensure_directories()
+            write_parquet(result_df, output_path)
             self.logger.info(f"Summarized content saved to {output_path}")
         
         return result_df
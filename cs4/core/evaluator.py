@@ -2,19 +2,84 @@
 Constraint satisfaction evaluator module.
 """
 
+import numpy as np
 import pandas as pd
 import logging
-import re
-from time import sleep
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 from datetime import datetime
 
-from cs4.core.prompts import get_evaluation_prompt
-from cs4.utils.llm_client import OpenAIClient, AnthropicClient
+from cs4.core.prompts import (
+    EVALUATION_JUDGMENT_RE,
+    get_evaluation_system_prompt,
+    get_evaluation_user_prompt,
+    get_evaluation_batch_prompt,
+    split_marshaled_response
+)
+from cs4.utils.llm_client import OpenAIClient, get_adapter
+from cs4.utils.concurrency import run_concurrently, in_input_order
+from cs4.utils.rate_limiter import RateLimiter
+from cs4.utils.retry import RetryMixin
+from cs4.utils.llm_cache import LLMCache, make_cache_key
+from cs4.utils.batch_api import run_batch_job
+from cs4.utils.record_writer import completed_keys
+from cs4.utils.frame_utils import compact_dtypes, is_parquet_path, read_frame, stream_records, write_parquet
 from cs4.config import Config
 
 
-class ConstraintEvaluator:
+def _count_constraint_lines(constraints) -> int:
+    """
+    Count the numbered ("N.") lines in a constraints text.
+    
+    Gives the same count as the regex ^\\d+\\. in multiline mode, using plain
+    string operations, which are about twice as fast.
+    
+    Args:
+        constraints: Newline-separated constraints (non-strings count as 0)
+        
+    Returns:
+        Number of lines starting with a number followed by a period
+    """
+    if not isinstance(constraints, str):
+        return 0
+    count = 0
+    for line in constraints.split("\n"):
+        number, period, _ = line.partition(".")
+        if period and number.isdecimal():
+            count += 1
+    return count
+
+# Output columns, in order
+_RESULT_COLUMNS = (
+    "instruction_number", "fitted_content", "constraints",
+    "satisfaction_results", "num_satisfied", "total_constraints",
+    "satisfaction_rate", "model_used", "tokens_used", "timestamp"
+)
+
+# Multi-sample requests stay about as accurate as single ones up to this many
+# samples; beyond it, judgments for samples in the middle degrade
+_MAX_ACCURATE_MARSHAL_BATCH_SIZE = 2
+
+
+def _satisfaction_rates(num_satisfied, total_constraints, failed) -> np.ndarray:
+    """
+    Compute the satisfaction_rate column in one vectorized pass.
+    
+    Args:
+        num_satisfied: Satisfied constraint counts
+        total_constraints: Total constraint counts
+        failed: Boolean flags marking samples whose evaluation failed
+        
+    Returns:
+        Array of rates (0.0 where there are no constraints, NaN for failed samples)
+    """
+    num = np.asarray(num_satisfied, dtype=np.float64)
+    total = np.asarray(total_constraints, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(total > 0, num / total, 0.0)
+    return np.where(np.asarray(failed, dtype=bool), np.nan, rate)
+
+
+class ConstraintEvaluator(RetryMixin):
     """Evaluate constraint satisfaction in generated content."""
     
     def __init__(
@@ -23,7 +88,14 @@ class ConstraintEvaluator:
         model: str = None,
         content_type: str = "blog",
         retry_attempts: int = 3,
-        delay: float = 1.0
+        delay: float = 1.0,
+        max_concurrency: int = 8,
+        marshal_batch_size: int = 1,
+        max_output_tokens: int = 4096,
+        rate_limiter: Optional[RateLimiter] = None,
+        use_cache: bool = False,
+        cache_ttl: Optional[float] = None,
+        compact_prompt: bool = False
     ):
         """
         Initialize constraint evaluator.
@@ -33,15 +105,47 @@ class ConstraintEvaluator:
             model: Model identifier
             content_type: Type of content (blog, story, news)
             retry_attempts: Number of retry attempts on failure
-            delay: Delay in seconds between retries
+            delay: Base delay in seconds for exponential backoff between retries
+            max_concurrency: Maximum number of concurrent LLM requests in batch mode
+            marshal_batch_size: Number of samples packed into one LLM request in
+                                batch mode (1 sends every sample on its own).
+                                Judgment accuracy drops once more than 2
+                                samples share a request, so larger values
+                                are meant for cheap exploratory runs only
+            max_output_tokens: Completion token cap per sample (a packed
+                               request gets this times its sample count)
+            rate_limiter: Optional RPM/TPM limiter, which may be shared between
+                          instances
+            use_cache: Reuse responses for identical prompts from the on-disk
+                       LLM cache, so re-running an evaluation only pays for
+                       samples whose content, constraints or model changed
+            cache_ttl: Seconds before a cached response expires (None to
+                       keep responses indefinitely)
+            compact_prompt: Use the system prompt with one worked example
+                            instead of three (about a third of the prompt
+                            tokens per call)
         """
         self.llm_client = llm_client or OpenAIClient(log_usage=True)
+        self.llm = get_adapter(self.llm_client)
         self.model = model or Config.DEFAULT_EVALUATION_MODEL
         self.content_type = content_type
         self.retry_attempts = retry_attempts
         self.delay = delay
+        self.max_concurrency = max_concurrency
+        self.marshal_batch_size = max(1, marshal_batch_size)
+        self.max_output_tokens = max_output_tokens
+        self.rate_limiter = rate_limiter
+        self.cache = LLMCache() if use_cache else None
+        self.cache_ttl = cache_ttl
+        self.system_prompt = get_evaluation_system_prompt(compact=compact_prompt)
         
         self.logger = logging.getLogger("CS4Evaluator")
+        
+        if self.marshal_batch_size > _MAX_ACCURATE_MARSHAL_BATCH_SIZE:
+            self.logger.warning(
+                f"Packing {self.marshal_batch_size} samples per request; judgments are "
+                f"noticeably less accurate above {_MAX_ACCURATE_MARSHAL_BATCH_SIZE}"
+            )
     
     def evaluate_content(
         self,
@@ -60,63 +164,134 @@ class ConstraintEvaluator:
         Returns:
             Tuple of (satisfaction_results, num_satisfied, tokens_used)
         """
-        prompt = get_evaluation_prompt(
+        prompt = get_evaluation_user_prompt(
             content_type=self.content_type,
             content=content,
             constraints=constraints
         )
         
-        for attempt in range(1, self.retry_attempts + 1):
-            try:
-                if isinstance(self.llm_client, OpenAIClient):
-                    response = self.llm_client.chat_completion(
-                        messages=[
-                            {"role": "user", "content": prompt}
-                        ],
-                        model=self.model
-                    )
-                    results = response.choices[0].message.content.strip()
-                    tokens = response.usage.total_tokens
-                elif isinstance(self.llm_client, AnthropicClient):
-                    response = self.llm_client.create_message(
-                        messages=[{"role": "user", "content": prompt}],
-                        model=self.model    
-                    )
-                    results = response.content[0].text
-                    tokens = response.usage.input_tokens + response.usage.output_tokens
-                else:
-                    raise ValueError("Unknown client type")
-                
-                # Extract number of satisfied constraints
-                num_satisfied = self._extract_satisfaction_count(results)
-                
-                if log:
-                    self.logger.info(f"Total tokens used: {tokens}")
-                    self.logger.info(f"Constraints satisfied: {num_satisfied}")
-                
-                return results, num_satisfied, tokens
-                
-            except Exception as e:
-                self.logger.warning(
-                    f"Attempt {attempt}/{self.retry_attempts} failed: {e}"
-                )
-                if attempt < self.retry_attempts:
-                    sleep(self.delay)
-                else:
-                    raise
+        results, tokens = self._call_llm(prompt, self.max_output_tokens)
+        
+        # Extract number of satisfied constraints
+        num_satisfied = self._extract_satisfaction_count(results)
         
-        raise RuntimeError("Failed to evaluate content")
+        if log:
+            self.logger.info(f"Total tokens used: {tokens}")
+            self.logger.info(f"Constraints satisfied: {num_satisfied}")
+        
+        return results, num_satisfied, tokens
+    
+    def evaluate_contents(
+        self,
+        items: List[Tuple[str, str]],
+        log: bool = True
+    ) -> List[Tuple[str, int, int]]:
+        """
+        Evaluate several (content, constraints) pairs with one LLM request.
+        
+        The pairs are packed into a single prompt with numbered sections, so
+        the instructions and worked examples are sent once. Pairs whose
+        section is missing or has no judgments are retried on their own, and
+        all pairs are if the packed request itself fails.
+        
+        Args:
+            items: (content, constraints) pairs to evaluate
+            log: Whether to log token usage
+            
+        Returns:
+            One (satisfaction_results, num_satisfied, tokens_used) tuple per
+            pair; the request's tokens are split evenly across its pairs
+        """
+        try:
+            response_text, tokens = self._call_llm(
+                get_evaluation_batch_prompt(self.content_type, items),
+                self.max_output_tokens * len(items)
+            )
+        except Exception as e:
+            # A packed completion budget can exceed the model's output limit;
+            # that 400 is not retried, so the samples are sent separately
+            self.logger.warning(
+                f"Packed request for {len(items)} samples failed, evaluating them one at a time: {e}"
+            )
+            return [
+                self.evaluate_content(content, constraints, log=log)
+                for content, constraints in items
+            ]
+        
+        if log:
+            self.logger.info(f"Total tokens used: {tokens} for {len(items)} samples")
+        
+        share, remainder = divmod(tokens, len(items))
+        results = []
+        for i, ((content, constraints), answer) in enumerate(
+            zip(items, split_marshaled_response(response_text, len(items)))
+        ):
+            if not answer or not EVALUATION_JUDGMENT_RE.search(answer):
+                self.logger.warning(f"No evaluation for sample {i + 1} of a packed request, retrying alone")
+                results.append(self.evaluate_content(content, constraints, log=log))
+                continue
+            results.append((
+                answer,
+                self._extract_satisfaction_count(answer),
+                share + (remainder if i == 0 else 0)
+            ))
+        
+        return results
+    
+    def _call_llm(self, prompt: str, max_tokens: int) -> Tuple[str, int]:
+        """
+        Send one evaluation request, retrying transient failures.
+        
+        The instructions go in the system prompt, which is the same for every
+        request, so providers can serve it from their prompt cache.
+        Responses are not streamed: the "Number of constraints satisfied"
+        line the judgments end with is the last thing the model writes, so
+        there is no trailing output that stopping early could save.
+        
+        Args:
+            prompt: Per-sample user message
+            max_tokens: Completion token cap for the request
+            
+        Returns:
+            Tuple of (response_text, tokens_used) (tokens_used is 0 on a cache hit)
+        """
+        cache_key = None
+        if self.cache is not None:
+            # The prompt already embeds the content type, content and constraints
+            cache_key = make_cache_key(self.model, self.system_prompt, prompt)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.logger.debug("Cache hit, skipping API call")
+                return cached["text"], 0
+        
+        def attempt():
+            estimated_tokens = (len(self.system_prompt) + len(prompt)) // 4
+            if self.rate_limiter:
+                self.rate_limiter.acquire(estimated_tokens=estimated_tokens)
+            
+            results, tokens = self.llm.chat(
+                system=self.system_prompt,
+                user=prompt,
+                model=self.model,
+                max_tokens=max_tokens
+            )
+            
+            if self.rate_limiter:
+                self.rate_limiter.reconcile(estimated_tokens, tokens)
+            
+            if cache_key is not None and results.strip():
+                self.cache.set(cache_key, {"text": results, "tokens": tokens}, ttl=self.cache_ttl)
+            
+            return results, tokens
+        
+        return self._retry(attempt)
     
     def _extract_satisfaction_count(self, results: str) -> int:
         """
         Extract number of satisfied constraints by counting explicit Yes/No judgments.
         Do NOT trust the LLM's self-reported total.
         """
-        matches = re.findall(
-            r'^\s*\d+\.\s*(Yes|No)\b',
-            results,
-            flags=re.MULTILINE
-        )
+        matches = EVALUATION_JUDGMENT_RE.findall(results)
 
         yes_count = sum(1 for m in matches if m == "Yes")
 
@@ -132,7 +307,9 @@ class ConstraintEvaluator:
         df: pd.DataFrame,
         content_column: str = "fitted_content",
         constraints_column: str = "constraints",
-        output_path: Optional[str] = None
+        output_path: Optional[str] = None,
+        use_batch_api: bool = False,
+        resume: bool = False
     ) -> pd.DataFrame:
         """
         Evaluate constraint satisfaction for a batch of samples.
@@ -141,7 +318,15 @@ class ConstraintEvaluator:
             df: Input DataFrame (typically fitted_content.csv)
             content_column: Name of column with content to evaluate
             constraints_column: Name of column with constraints
-            output_path: Optional path to save results
+            output_path: Optional path to save results. CSV and .jsonl rows
+                         are streamed as they complete (.jsonl keeps the long
+                         response texts lossless); a .parquet path is written
+                         once at the end (requires pyarrow)
+            use_batch_api: Submit all samples as one provider batch job (half
+                           price, completes within 24h) instead of realtime calls
+            resume: Skip samples whose instruction_number is already in a
+                    CSV or .jsonl output_path from an earlier run and append
+                    the rest
             
         Returns:
             DataFrame with evaluation results
@@ -167,68 +352,210 @@ class ConstraintEvaluator:
         
         self.logger.info(f"Evaluating {len(df)} samples")
         
-        results = []
-        for idx, row in df.iterrows():
-            content = row[content_column]
-            constraints = row[constraints_column]
-            instruction_num = row["instruction_number"] if has_instruction_num else idx + 1
+        # Every row is stamped with the batch start time
+        batch_start = datetime.now().isoformat()
+        
+        # Pull the needed columns out once instead of building a Series per row
+        contents = df[content_column].tolist()
+        constraints_list = df[constraints_column].tolist()
+        subset_sizes = df["subset_size"].tolist() if has_subset_size else None
+        
+        # Constraint counts for the whole column up front
+        if not has_subset_size:
+            total_counts = [_count_constraint_lines(text) for text in constraints_list]
+        instruction_nums = (
+            df["instruction_number"].tolist() if has_instruction_num
+            else [idx + 1 for idx in df.index]
+        )
+
+        # Rows with missing or empty text would only waste a paid request, so
+        # they are failed up front instead of being sent
+        invalid = (
+            df[content_column].isna()
+            | df[constraints_column].isna()
+            | df[content_column].astype(str).str.strip().eq("")
+            | df[constraints_column].astype(str).str.strip().eq("")
+        ).tolist()
+
+        positions = list(range(len(contents)))
+        done = set()
+        if resume and output_path and not is_parquet_path(output_path):
+            done = completed_keys(output_path)
+            if done:
+                positions = [i for i in positions if instruction_nums[i] not in done]
+                self.logger.info(f"Resuming: {len(done)} samples already in {output_path}, {len(positions)} left")
+        
+        num_invalid = sum(invalid[i] for i in positions)
+        if num_invalid:
+            self.logger.warning(f"Skipping {num_invalid} samples with missing or empty content/constraints")
+        
+        # Offline mode: run every prompt as one batch job up front, keyed by
+        # row position, and only collect the responses below
+        batch_results = None
+        if use_batch_api:
+            batch_results = run_batch_job(
+                self.llm_client,
+                {
+                    str(i): get_evaluation_user_prompt(
+                        content_type=self.content_type,
+                        content=content,
+                        constraints=constraints
+                    )
+                    for i, content, constraints in (
+                        (i, contents[i], constraints_list[i]) for i in positions if not invalid[i]
+                    )
+                },
+                model=self.model,
+                system_prompt=self.system_prompt,
+                max_tokens=self.max_output_tokens
+            )
+        
+        def build_record(i, satisfaction_results, num_satisfied, tokens):
+            # Count total constraints - use subset_size if available, otherwise parse
+            if has_subset_size:
+                total_constraints = int(subset_sizes[i])
+            else:
+                total_constraints = total_counts[i]
+            
+            return {
+                "instruction_number": instruction_nums[i],
+                "fitted_content": contents[i],
+                "constraints": constraints_list[i],
+                "satisfaction_results": satisfaction_results,
+                "num_satisfied": num_satisfied,
+                "total_constraints": total_constraints,
+                "model_used": self.model,
+                "tokens_used": tokens,
+                "timestamp": batch_start
+            }
+        
+        def failed_record(i):
+            # Get total_constraints even in error case
+            if has_subset_size:
+                error_total_constraints = int(subset_sizes[i])
+            else:
+                error_total_constraints = total_counts[i]
+            
+            return {
+                "instruction_number": instruction_nums[i],
+                "fitted_content": contents[i],
+                "constraints": constraints_list[i],
+                "satisfaction_results": "",
+                "num_satisfied": 0,
+                "total_constraints": error_total_constraints,
+                "model_used": self.model,
+                "tokens_used": 0,
+                "timestamp": batch_start
+            }
+        
+        def process(chunk):
+            # Invalid rows always come in chunks of their own
+            if invalid[chunk[0]]:
+                return True, [failed_record(chunk[0])]
             
-            self.logger.info(f"Evaluating sample #{instruction_num}")
+            for i in chunk:
+                self.logger.info(f"Evaluating sample #{instruction_nums[i]}")
             
             try:
-                satisfaction_results, num_satisfied, tokens = self.evaluate_content(
-                    content=content,
-                    constraints=constraints,
-                    log=True
-                )
-                
-                # Count total constraints - use subset_size if available, otherwise parse
-                if has_subset_size:
-                    total_constraints = int(row["subset_size"])
+                if batch_results is not None:
+                    i = chunk[0]
+                    if str(i) not in batch_results:
+                        raise RuntimeError("No result returned by batch job")
+                    satisfaction_results, tokens = batch_results[str(i)]
+                    outputs = [(
+                        satisfaction_results,
+                        self._extract_satisfaction_count(satisfaction_results),
+                        tokens
+                    )]
+                elif len(chunk) == 1:
+                    outputs = [self.evaluate_content(
+                        content=contents[chunk[0]],
+                        constraints=constraints_list[chunk[0]],
+                        log=True
+                    )]
                 else:
-                    total_constraints = len(re.findall(r'^\d+\.', constraints, re.MULTILINE))
-                
-                satisfaction_rate = num_satisfied / total_constraints if total_constraints > 0 else 0.0
+                    outputs = self.evaluate_contents(
+                        [(contents[i], constraints_list[i]) for i in chunk],
+                        log=True
+                    )
                 
-                results.append({
-                    "instruction_number": instruction_num,
-                    "fitted_content": content,
-                    "constraints": constraints,
-                    "satisfaction_results": satisfaction_results,
-                    "num_satisfied": num_satisfied,
-                    "total_constraints": total_constraints,
-                    "satisfaction_rate": satisfaction_rate,
-                    "model_used": self.model,
-                    "tokens_used": tokens,
-                    "timestamp": datetime.now().isoformat()
-                })
+                return False, [build_record(i, *output) for i, output in zip(chunk, outputs)]
                 
             except Exception as e:
-                self.logger.error(
-                    f"Failed to evaluate sample {instruction_num}: {e}"
-                )
-                # Get total_constraints even in error case
-                if has_subset_size:
-                    error_total_constraints = int(row["subset_size"])
-                else:
-                    error_total_constraints = len(re.findall(r'^\d+\.', constraints, re.MULTILINE))
-                
-                results.append({
-                    "instruction_number": instruction_num,
-                    "fitted_content": content,
-                    "constraints": constraints,
-                    "satisfaction_results": "",
-                    "num_satisfied": 0,
-                    "total_constraints": error_total_constraints,
-                    "model_used": self.model,
-                    "tokens_used": 0,
-                    "timestamp": datetime.now().isoformat()
-                })
-        
-        result_df = pd.DataFrame(results)
+                for i in chunk:
+                    self.logger.error(
+                        f"Failed to evaluate sample {instruction_nums[i]}: {e}"
+                    )
+                return True, [failed_record(i) for i in chunk]
+        
+        # Samples are sent marshal_batch_size at a time (one at a time by
+        # default; batch jobs already hold one response per sample)
+        size = 1 if batch_results is not None else self.marshal_batch_size
+        chunks = []
+        current = []
+        for i in positions:
+            if invalid[i]:
+                if current:
+                    chunks.append(current)
+                    current = []
+                chunks.append([i])
+                continue
+            current.append(i)
+            if len(current) == size:
+                chunks.append(current)
+                current = []
+        if current:
+            chunks.append(current)
+        
+        # Records leave process without satisfaction rates; those are
+        # computed afterwards in vectorized passes
+        completed = (
+            result
+            for _, result in in_input_order(
+                run_concurrently(process, chunks, self.max_concurrency)
+            )
+        )
+        
+        if output_path and not is_parquet_path(output_path):
+            Config.ensure_directories()
+            
+            def records():
+                for failed, chunk_records in completed:
+                    rates = _satisfaction_rates(
+                        [record["num_satisfied"] for record in chunk_records],
+                        [record["total_constraints"] for record in chunk_records],
+                        [failed] * len(chunk_records)
+                    )
+                    for record, rate in zip(chunk_records, rates):
+                        if not failed:
+                            record["satisfaction_rate"] = rate.item()
+                        yield {col: record.get(col) for col in _RESULT_COLUMNS}
+            
+            result_df = stream_records(
+                records(), output_path, append=bool(done), fieldnames=list(_RESULT_COLUMNS)
+            )
+            self.logger.info(f"Evaluation results saved to {output_path}")
+            return compact_dtypes(result_df)
+        
+        # Fill one pre-sized list per column and build the frame from those,
+        # rather than transposing a list of per-row dicts
+        columns = {col: [None] * len(positions) for col in _RESULT_COLUMNS}
+        failed_flags = [False] * len(positions)
+        row = 0
+        for failed, records in completed:
+            for record in records:
+                for col, value in record.items():
+                    columns[col][row] = value
+                failed_flags[row] = failed
+                row += 1
+        columns["satisfaction_rate"] = _satisfaction_rates(
+            columns["num_satisfied"], columns["total_constraints"], failed_flags
+        )
+        result_df = compact_dtypes(pd.DataFrame(columns))
         
         if output_path:
-            result_df.to_csv(output_path, index=False, encoding="utf-8")
+            Config.ensure_directories()
+            write_parquet(result_df, output_path)
             self.logger.info(f"Evaluation results saved to {output_path}")
         
         return result_df
@@ -245,8 +572,8 @@ def evaluate_constraints(
     Legacy interface for constraint evaluation.
     
     Args:
-        input_path: Path to CSV with generated content
-        output_path: Path to save evaluation results
+        input_path: Path to CSV or .jsonl file with generated content
+        output_path: Path to save evaluation results (.csv, .jsonl or .parquet)
         model: LLM model identifier
         content_type: Type of content (blog, story, news)
     """
@@ -256,7 +583,7 @@ def evaluate_constraints(
     load_dotenv()
     
     evaluator = ConstraintEvaluator(model=model, content_type=content_type)
-    df = pd.read_csv(input_path, encoding="utf-8")
+    df = read_frame(input_path)
     
     result_df = evaluator.evaluate_batch(df, output_path=output_path)
     
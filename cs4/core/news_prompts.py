@@ -2,6 +2,8 @@
 System prompts for different stages of the CS4 pipeline.
 """
 
+from cs4.core.prompts import compile_template
+
 # CONSTRAINT_GENERATION_PROMPT = """You are a writing expert. I am going to give you a blog as an input. 
 # You can assume that a large language model (LLM) generated the blog.
 
@@ -826,6 +828,11 @@ def get_base_generation_prompt(content_type: str = "blog") -> str:
     return BASE_GENERATION_PROMPT.format(content_type=content_type)
 
 
+# Parsed once; the per-sample prompts are then built by concatenation
+_render_constraint_fitting_prompt = compile_template(CONSTRAINT_FITTING_PROMPT)
+_render_evaluation_prompt = compile_template(EVALUATION_PROMPT)
+
+
 def get_constraint_fitting_prompt(
     content_type: str,
     task: str,
@@ -833,7 +840,7 @@ def get_constraint_fitting_prompt(
     constraints: str
 ) -> str:
     """Get the constraint fitting prompt."""
-    return CONSTRAINT_FITTING_PROMPT.format(
+    return _render_constraint_fitting_prompt(
         content_type=content_type,
         task=task,
         base_content=base_content,
@@ -847,7 +854,7 @@ def get_evaluation_prompt(
     constraints: str
 ) -> str:
     """Get the evaluation prompt."""
-    return EVALUATION_PROMPT.format(
+    return _render_evaluation_prompt(
         content_type=content_type,
         content_type_capitalized=content_type.capitalize(),
         content=content,
@@ -928,6 +935,9 @@ Output:
 """
 
 
+_render_constraint_replacement_prompt = compile_template(CONSTRAINT_REPLACEMENT_PROMPT)
+
+
 def get_constraint_replacement_prompt(
     main_task: str,
     original_constraints: str,
@@ -935,7 +945,7 @@ def get_constraint_replacement_prompt(
     satisfaction_results: str
 ) -> str:
     """Get the constraint replacement prompt."""
-    return CONSTRAINT_REPLACEMENT_PROMPT.format(
+    return _render_constraint_replacement_prompt(
         main_task=main_task,
         original_constraints=original_constraints,
         base_content=base_content,
@@ -1,12 +1,21 @@
 """
 System prompts for different stages of the CS4 pipeline.
+
+Prompts are plain module-level strings. The pipeline's workers are threads
+(see cs4.utils.concurrency), so each process holds a single copy that all
+of them share.
 """
 
-CONSTRAINT_GENERATION_PROMPT = """You are a writing expert. I am going to give you a blog as an input. 
+import re
+from functools import lru_cache
+from string import Formatter
+from typing import Callable, Iterable, List, Optional, Tuple
+
+CONSTRAINT_GENERATION_PROMPT = """You are a writing expert. I am going to give you a blog as an input.
 You can assume that a large language model (LLM) generated the blog.
 
 Your task has two parts:
-1. Identify the main task of the blog in one sentence. 
+1. Identify the main task of the blog in one sentence.
    - For example: "The main task is to write a blog about strategies for successful remote working."
    - Phrase the main task as an instruction.
 2. Generate a set of 39 free-form constraints that you think might have been given to the LLM to generate the blog.
@@ -21,7 +30,7 @@ Your task has two parts:
 
 Here is a worked example to guide you:
 
-Input Blog: 
+Input Blog:
 Working from home has become the new normal for millions of professionals worldwide. While it offers flexibility and eliminates commutes, it also presents unique challenges that can impact both productivity and well-being.
 
 To optimize your home workspace, start by creating a dedicated area free from distractions. This space should have good lighting, comfortable seating, and all necessary equipment within reach. Many experts recommend facing a window for natural light, which can boost mood and energy levels.
@@ -81,101 +90,6 @@ Constraints:
 Now use the same approach for the next input blog.
 """
 
-# CONSTRAINT_GENERATION_PROMPT = """You are a writing expert. I will give you a blog as input.  
-# You can assume that a large language model created the blog.
-
-# Your task has two parts:
-
-# 1. Identify the main task of the blog in one sentence.
-#    Phrase it as an instruction.
-#    Example: "Write a blog about strategies for successful remote working."
-
-# 2. Generate a set of thirty nine constraints that a writer could follow to create a new blog that covers the same central ideas, structure, and reasoning as the input without recreating the original text.
-
-# Rules for the constraints:
-
-# 1. Constraints must be atomic. Each constraint must contain exactly one requirement.  
-# 2. Avoid all proper nouns. Do not use names of people, cities, courts, organizations, or case titles.  
-# 3. Avoid constraints that simply restate one sentence or one paragraph. Each constraint must influence at least two sentences in different parts of the blog.  
-# 4. Constraints must not allow reconstruction of the original blog. Do not follow the blog order. Do not outline the events in sequence.  
-# 5. Constraints must mix the following types:  
-#    a. Content constraints about ideas or arguments that should appear.  
-#    b. Structural constraints describing how the blog should be organized.  
-#    c. Reasoning constraints that require inference or comparison.  
-#    d. Stylistic constraints only if needed to reach thirty nine items.  
-# 6. Constraints must reflect realistic settings.  
-# 7. Constraints must span multiple parts of the blog whenever possible.  
-# 8. Do not copy phrases from the input.  
-# 9. Write all constraints as instructions that begin with "The blog should".  
-# 10. Randomize the order so the list does not follow the blog structure.
-
-# If and only if you cannot reach thirty nine atomic content and structure constraints, fill the remaining slots with stylistic constraints that describe tone or level of detail.
-
-# Output format:
-
-# Main Task: <one sentence instruction>
-
-# Constraints:
-# 1. <constraint one>
-# 2. <constraint two>
-# ...
-# 39. <constraint thirty nine>
-
-
-# FEW SHOT EXAMPLE ONE  
-
-# Input Blog:
-# Working from home has become common worldwide and while it brings flexibility it also brings challenges. A well planned workspace can reduce distractions. Clear working hours help protect personal time. Regular breaks prevent burnout. Staying connected with colleagues reduces feelings of isolation. Caring for health through exercise, good sleep, and mindful habits supports long term productivity.
-
-# Output:
-# Main Task: Write a blog about strategies for successful remote working.
-
-# Constraints:
-# 1. The blog should explain the value of defined working hours.
-# 2. The blog should describe why regular breaks sustain performance.
-# 3. The blog should connect poor boundaries to loss of personal time.
-# 4. The blog should emphasize how social connection reduces isolation.
-# 5. The blog should show how workspace planning limits distractions.
-# 6. The blog should describe how exercise supports mental clarity.
-# 7. The blog should mention that hydration influences daily focus.
-# 8. The blog should link sleep quality to sustained productivity.
-# 9. The blog should identify productivity as a central theme.
-# 10. The blog should explain how mindful habits reduce stress.
-# 11. The blog should show how good lighting supports energy.
-# 12. The blog should discuss how essential tools should be accessible.
-# 13. The blog should encourage informal digital conversations.
-# 14. The blog should contrast benefits and challenges of remote work.
-# 15. The blog should explain how nutrition influences cognitive strength.
-# 16. The blog should advise keeping a consistent daily routine.
-# 17. The blog should connect emotional well being to job performance.
-# 18. The blog should describe a structured time management method.
-# 19. The blog should argue that remote work requires deliberate planning.
-# 20. The blog should promote stretching or movement during pauses.
-# 21. The blog should discuss the importance of sleep hygiene.
-# 22. The blog should connect hydration to reduced fatigue.
-# 23. The blog should recommend a physically separate workspace.
-# 24. The blog should explain how interruptions reduce productivity.
-# 25. The blog should suggest instant messaging for quick collaboration.
-# 26. The blog should mention that natural light boosts mood.
-# 27. The blog should emphasize consistency in work boundaries.
-# 28. The blog should mention virtual team bonding activities.
-# 29. The blog should argue for intentional self care routines.
-# 30. The blog should tie physical comfort to long term health.
-# 31. The blog should combine workspace, schedule, and health advice into a unified approach.
-# 32. The blog should recommend communicating work hours to household members.
-# 33. The blog should encourage readers to adopt concrete changes.
-# 34. The blog should warn that poor boundaries cause personal time erosion.
-# 35. The blog should highlight how home work flexibility introduces new challenges.
-# 36. The blog should advise placing water near the workspace.
-# 37. The blog should discuss how visual cues help create a work zone.
-# 38. The blog should promote balanced nutrition for sustained energy.
-# 39. The blog should conclude by urging a proactive approach to remote work.
-
-
-
-
-# Now apply this full process to the next input blog.
-# """
 
 BASE_GENERATION_PROMPT = """You are a creative writing expert. I will give you a task description, and you need to generate {content_type} content that fulfills the task.
 
@@ -380,11 +294,11 @@ Constraints:
 Output:
 """
 
-CONSTRAINT_FITTING_PROMPT_LENGTH_500 = """You are a writing expert. I am going to give you a blog as an input. 
+CONSTRAINT_FITTING_PROMPT_LENGTH_500 = """You are a writing expert. I am going to give you a blog as an input.
 You can assume that a large language model (LLM) generated the blog. Restrict the length of output to be less than 500 words.
 
 Your task has two parts:
-1. Identify the main task of the blog in one sentence. 
+1. Identify the main task of the blog in one sentence.
    - For example: "The main task is to write a blog about strategies for successful remote working."
    - Phrase the main task as an instruction.
 2. Generate a set of 39 free-form constraints that you think might have been given to the LLM to generate the blog.
@@ -660,20 +574,150 @@ Constraints:
 """
 
 
+def compile_template(template: str) -> Callable[..., str]:
+    """
+    Pre-split a str.format template into literal and field segments.
+    
+    The returned function fills the fields by plain concatenation, so the
+    template is parsed once instead of on every call. str.join sizes the
+    result from its parts and copies each one once, so no intermediate
+    strings are built. Literal "{{"/"}}" escapes are resolved the same way
+    str.format resolves them.
+    
+    Args:
+        template: Template with named, spec-free {field} placeholders
+        
+    Returns:
+        Function taking the field values as keyword arguments
+    """
+    segments = []
+    for literal, field, spec, conversion in Formatter().parse(template):
+        if spec or conversion:
+            raise ValueError(f"Unsupported format spec in template field '{field}'")
+        segments.append((literal, field))
+    
+    def render(**values) -> str:
+        parts = []
+        for literal, field in segments:
+            parts.append(literal)
+            if field is not None:
+                value = values[field]
+                parts.append(value if isinstance(value, str) else str(value))
+        return "".join(parts)
+    
+    return render
+
+
 def get_common_constraint_generation_prompt() -> str:
     """Get the common constraint generation prompt."""
     return COMMON_CONSTRAINT_GENERATION_PROMPT
 
-def get_constraint_generation_prompt() -> str:
-    """Get the constraint generation prompt."""
-    return CONSTRAINT_GENERATION_PROMPT
+def _compact_constraint_generation_prompt(keep: Tuple[int, ...]) -> str:
+    """
+    Shorten the worked example of CONSTRAINT_GENERATION_PROMPT.
+    
+    Only the listed example constraints are kept (renumbered, in the given
+    order) and an ellipsis line stands in for the rest; the final constraint
+    keeps its number so the example still shows a full list of 39.
+    """
+    head, rest = CONSTRAINT_GENERATION_PROMPT.split("Constraints:\n1. ", 1)
+    body, tail = ("1. " + rest).split("\n\nNow use the same approach", 1)
+    example = dict(line.split(". ", 1) for line in body.splitlines())
+    last = str(len(example))
+    lines = [f"{n}. {example[str(i)]}" for n, i in enumerate(keep, start=1)]
+    lines.append(
+        f"... ({int(last) - len(keep) - 1} more constraints, each atomic and "
+        f"jumping back and forth across the blog) ..."
+    )
+    lines.append(f"{last}. {example[last]}")
+    return head + "Constraints:\n" + "\n".join(lines) + "\n\nNow use the same approach" + tail
+
+
+# CONSTRAINT_GENERATION_PROMPT with 8 of the 39 example constraints, chosen to
+# alternate between the end, start and middle of the example blog as the
+# randomization rule asks. Opt-in until it has been checked against the full
+# prompt on held-out blogs
+CONSTRAINT_GENERATION_PROMPT_COMPACT = _compact_constraint_generation_prompt(
+    (12, 14, 7, 23, 4, 19, 9, 20)
+)
+
+
+def get_constraint_generation_prompt(compact: bool = False) -> str:
+    """Get the constraint generation prompt (sent as the system prompt)."""
+    return CONSTRAINT_GENERATION_PROMPT_COMPACT if compact else CONSTRAINT_GENERATION_PROMPT
 
 
+# The per-content user message; everything static lives in the system prompt
+# above so providers can cache it as a shared prefix
+CONSTRAINT_GENERATION_USER_PROMPT = "Input - {content}\nOutput -"
+_render_constraint_generation_user_prompt = compile_template(CONSTRAINT_GENERATION_USER_PROMPT)
+
+
+def get_constraint_generation_user_prompt(content: str) -> str:
+    """Get the user message for generating constraints for one content."""
+    return _render_constraint_generation_user_prompt(content=content)
+
+
+@lru_cache(maxsize=16)
 def get_base_generation_prompt(content_type: str = "blog") -> str:
-    """Get the base generation prompt."""
+    """
+    Get the base generation prompt.
+    
+    This is the system prompt, rendered once when a generator is created,
+    so content_type stays a free-form domain name with no per-request cost.
+    """
     return BASE_GENERATION_PROMPT.format(content_type=content_type)
 
 
+def format_constraints(constraints: Iterable[str]) -> str:
+    """
+    Render constraints as the numbered list the prompts' {constraints} slots expect.
+    
+    Args:
+        constraints: Constraint texts without numbers; blank entries are skipped
+        
+    Returns:
+        Newline-separated "1. ...", "2. ..." lines
+    """
+    stripped = (constraint.strip() for constraint in constraints)
+    return "\n".join(
+        f"{i}. {constraint}"
+        for i, constraint in enumerate((c for c in stripped if c), start=1)
+    )
+
+
+_render_constraint_fitting_prompt = compile_template(CONSTRAINT_FITTING_PROMPT)
+
+# The instructions only vary with the content type, so they are sent as the
+# system prompt (a stable, cacheable prefix) and the per-sample inputs, which
+# the template already keeps at the end, as the user message
+_FITTING_INSTRUCTIONS, _FITTING_INPUT = CONSTRAINT_FITTING_PROMPT.split("\nTask: {task}")
+CONSTRAINT_FITTING_SYSTEM_PROMPT = _FITTING_INSTRUCTIONS.rstrip()
+CONSTRAINT_FITTING_USER_PROMPT = "Task: {task}" + _FITTING_INPUT
+_render_constraint_fitting_user_prompt = compile_template(CONSTRAINT_FITTING_USER_PROMPT)
+
+
+@lru_cache(maxsize=16)
+def get_constraint_fitting_system_prompt(content_type: str) -> str:
+    """Get the static part of the constraint fitting prompt (rendered once per fitter)."""
+    return CONSTRAINT_FITTING_SYSTEM_PROMPT.format(content_type=content_type)
+
+
+def get_constraint_fitting_user_prompt(
+    content_type: str,
+    task: str,
+    base_content: str,
+    constraints: str
+) -> str:
+    """Get the per-sample part of the constraint fitting prompt (sent with its system prompt)."""
+    return _render_constraint_fitting_user_prompt(
+        content_type=content_type,
+        task=task,
+        base_content=base_content,
+        constraints=constraints
+    )
+
+
 def get_constraint_fitting_prompt(
     content_type: str,
     task: str,
@@ -681,7 +725,7 @@ def get_constraint_fitting_prompt(
     constraints: str
 ) -> str:
     """Get the constraint fitting prompt."""
-    return CONSTRAINT_FITTING_PROMPT.format(
+    return _render_constraint_fitting_prompt(
         content_type=content_type,
         task=task,
         base_content=base_content,
@@ -689,14 +733,78 @@ def get_constraint_fitting_prompt(
     )
 
 
+# The instructions and worked examples are identical for every sample, so they
+# are sent as the system prompt (a stable, cacheable prefix) and only the
+# sample itself goes in the user message. Send the system prompt verbatim:
+# anything prepended or interpolated into it breaks the shared prefix. Both
+# variants are well over the 1024 tokens OpenAI needs before it caches a
+# prefix (roughly 4.4k tokens in full, 1.5k compact)
+_EVALUATION_INSTRUCTIONS, _EVALUATION_INPUT = EVALUATION_PROMPT.split("\nNow evaluate the following:")
+EVALUATION_SYSTEM_PROMPT = _EVALUATION_INSTRUCTIONS.rstrip()
+EVALUATION_USER_PROMPT = "Now evaluate the following:" + _EVALUATION_INPUT
+_render_evaluation_user_prompt = compile_template(EVALUATION_USER_PROMPT)
+_render_evaluation_prompt = compile_template(EVALUATION_PROMPT)
+
+
+# Instructions and the worked examples of EVALUATION_SYSTEM_PROMPT, split
+# apart so a prompt can be assembled from any subset of the examples
+_EVALUATION_INTRO, _evaluation_examples = EVALUATION_SYSTEM_PROMPT.split("Here are some examples -\n", 1)
+EVALUATION_EXAMPLES = tuple(
+    example.strip("\n") for example in re.split(r"\n+Input ?-\n", "\n" + _evaluation_examples)[1:]
+)
+
+
+def _compact_evaluation_system_prompt(keep: Tuple[int, ...]) -> str:
+    """
+    Shorten EVALUATION_SYSTEM_PROMPT to some of its worked examples.
+    
+    Args:
+        keep: 1-based positions of the examples to keep, in order
+    """
+    heading = "Here is an example -\n" if len(keep) == 1 else "Here are some examples -\n"
+    return _EVALUATION_INTRO + heading + "\n\n".join(
+        "Input -\n" + EVALUATION_EXAMPLES[i - 1] for i in keep
+    )
+
+
+# EVALUATION_SYSTEM_PROMPT with only the third worked example (about a third
+# of the tokens). That example is kept because it is the only one mixing
+# "Yes" and "No" verdicts; the first is all "Yes" and the second repeats the
+# same story setup at length. Opt-in until its judgments have been checked
+# against the full prompt on held-out stories
+EVALUATION_SYSTEM_PROMPT_COMPACT = _compact_evaluation_system_prompt((3,))
+
+
+def get_evaluation_system_prompt(compact: bool = False) -> str:
+    """Get the evaluation instructions and worked examples (sent as the system prompt)."""
+    return EVALUATION_SYSTEM_PROMPT_COMPACT if compact else EVALUATION_SYSTEM_PROMPT
+
+
+# "N. Yes"/"N. No" judgment lines the evaluation prompt asks for, compiled once
+# for the code that scores responses
+EVALUATION_JUDGMENT_RE = re.compile(r'^\s*\d+\.\s*(Yes|No)\b', re.MULTILINE)
+
+
+def get_evaluation_user_prompt(
+    content_type: str,
+    content: str,
+    constraints: str
+) -> str:
+    """Get the per-sample part of the evaluation prompt (sent with EVALUATION_SYSTEM_PROMPT)."""
+    return _render_evaluation_user_prompt(
+        content_type_capitalized=content_type.capitalize(),
+        content=content,
+        constraints=constraints
+    )
+
+
 def get_evaluation_prompt(
     content_type: str,
     content: str,
     constraints: str
 ) -> str:
     """Get the evaluation prompt."""
-    return EVALUATION_PROMPT.format(
-        content_type=content_type,
+    return _render_evaluation_prompt(
         content_type_capitalized=content_type.capitalize(),
         content=content,
         constraints=constraints
@@ -718,8 +826,14 @@ def get_summarization_prompt(
     target_length_pct: float = 0.25
 ) -> str:
     """Get the summarization prompt."""
-    target_pct = int(target_length_pct * 100)
-    return f"{SUMMARIZATION_PROMPT.format(content_type=content_type, target_pct=target_pct)}\n\n{content_type.capitalize()} to summarize:\n{content}"
+    return f"{_summarization_prompt_head(content_type, int(target_length_pct * 100))}{content}"
+
+
+@lru_cache(maxsize=16)
+def _summarization_prompt_head(content_type: str, target_pct: int) -> str:
+    """Render the part of the summarization prompt before the content (once per type and length)."""
+    instructions = SUMMARIZATION_PROMPT.format(content_type=content_type, target_pct=target_pct)
+    return f"{instructions}\n\n{content_type.capitalize()} to summarize:\n"
 
 
 CONSTRAINT_REPLACEMENT_PROMPT = """You are a writing expert. You are given:
@@ -775,6 +889,15 @@ Evaluation Results (Yes = satisfied, No = not satisfied):
 Output:
 """
 
+_render_constraint_replacement_prompt = compile_template(CONSTRAINT_REPLACEMENT_PROMPT)
+
+# As with fitting: the instructions are the same for every sample and go in
+# the system prompt, the sample's inputs in the user message
+_REPLACEMENT_INSTRUCTIONS, _REPLACEMENT_INPUT = CONSTRAINT_REPLACEMENT_PROMPT.split("\n---\n\n")
+CONSTRAINT_REPLACEMENT_SYSTEM_PROMPT = _REPLACEMENT_INSTRUCTIONS.rstrip()
+CONSTRAINT_REPLACEMENT_USER_PROMPT = _REPLACEMENT_INPUT
+_render_constraint_replacement_user_prompt = compile_template(CONSTRAINT_REPLACEMENT_USER_PROMPT)
+
 
 def get_constraint_replacement_prompt(
     main_task: str,
@@ -783,10 +906,150 @@ def get_constraint_replacement_prompt(
     satisfaction_results: str
 ) -> str:
     """Get the constraint replacement prompt."""
-    return CONSTRAINT_REPLACEMENT_PROMPT.format(
+    return _render_constraint_replacement_prompt(
         main_task=main_task,
         original_constraints=original_constraints,
         base_content=base_content,
         satisfaction_results=satisfaction_results
     )
 
+
+def get_constraint_replacement_user_prompt(
+    main_task: str,
+    original_constraints: str,
+    base_content: str,
+    satisfaction_results: str
+) -> str:
+    """Get the per-sample part of the constraint replacement prompt (sent with CONSTRAINT_REPLACEMENT_SYSTEM_PROMPT)."""
+    return _render_constraint_replacement_user_prompt(
+        main_task=main_task,
+        original_constraints=original_constraints,
+        base_content=base_content,
+        satisfaction_results=satisfaction_results
+    )
+
+
+MARSHALING_INSTRUCTION = """You will be given {count} separate inputs, each under a "### Input N" heading. Handle every input independently, exactly as you would a single input, and write the answer for each one under a "### Output N" heading with the same number, in order. Do not write anything outside these sections."""
+
+_OUTPUT_HEADING_RE = re.compile(r"^[ \t]*#{2,4}[ \t]*Output[ \t]+(\d+)[ \t]*:?[ \t]*$", re.MULTILINE)
+
+
+def get_marshaled_prompt(inputs: List[str], task_prompt: Optional[str] = None) -> str:
+    """
+    Pack several inputs into one prompt with numbered headings.
+    
+    Args:
+        inputs: Input texts, answered in the order given
+        task_prompt: Optional instructions placed before the inputs
+        
+    Returns:
+        Prompt asking for one "### Output N" section per input
+    """
+    parts = [MARSHALING_INSTRUCTION.format(count=len(inputs))]
+    if task_prompt:
+        parts.insert(0, task_prompt)
+    parts.extend(f"### Input {i}\n{text}" for i, text in enumerate(inputs, start=1))
+    return "\n\n".join(parts)
+
+
+def split_marshaled_response(response_text: str, count: int) -> List[Optional[str]]:
+    """
+    Split a response to get_marshaled_prompt into per-input answers.
+    
+    Args:
+        response_text: Raw LLM response
+        count: Number of inputs in the prompt
+        
+    Returns:
+        One answer per input, or None where the response has no section for it
+    """
+    answers = [None] * count
+    headings = list(_OUTPUT_HEADING_RE.finditer(response_text))
+    for heading, following in zip(headings, headings[1:] + [None]):
+        index = int(heading.group(1)) - 1
+        end = following.start() if following else len(response_text)
+        if 0 <= index < count and answers[index] is None:
+            answers[index] = response_text[heading.end():end].strip()
+    return answers
+
+
+# Usual response shape: a "Main Task: ..." line, then a "Constraints:" (or
+# "Revised Constraints:") line followed by the constraint list
+_TASK_RESPONSE_RE = re.compile(
+    r"^[ \t]*Main Task:(?P<task>[^\n]*)\n"
+    r"(?P<between>.*?)"
+    r"^[ \t]*(?P<revised>Revised )?Constraints:[^\n]*(?:\n|\Z)"
+    r"(?P<rest>.*)\Z",
+    re.MULTILINE | re.DOTALL
+)
+
+
+def parse_task_response(response_text: str, allow_revised: bool = False) -> Tuple[str, str]:
+    """
+    Parse a "Main Task: ... / Constraints: ..." response.
+    
+    Args:
+        response_text: Raw LLM response
+        allow_revised: Also accept a "Revised Constraints:" heading
+        
+    Returns:
+        Tuple of (main_task, constraints)
+    """
+    text = response_text.strip()
+    
+    # Fast path: one regex pass for the usual shape. Responses where the line
+    # walker below could behave differently (repeated or out-of-place
+    # headings) fall through to it.
+    m = _TASK_RESPONSE_RE.search(text)
+    if m and (allow_revised or not m.group("revised")):
+        task, between, rest = m.group("task", "between", "rest")
+        prefix = text[:m.start()]
+        if not any(
+            marker in part
+            for marker in ("Main Task:", "Constraints:")
+            for part in (prefix, task, between, rest)
+        ):
+            constraints = "\n".join(
+                line.strip() for line in rest.split("\n") if line.strip()
+            )
+            return task.strip(), constraints
+    
+    headings = ("Constraints:", "Revised Constraints:") if allow_revised else ("Constraints:",)
+    main_task = ""
+    constraints_lines = []
+    
+    in_constraints = False
+    for line in text.split("\n"):
+        line = line.strip()
+        if line.startswith("Main Task:"):
+            main_task = line.replace("Main Task:", "").strip()
+        elif line.startswith(headings):
+            in_constraints = True
+        elif in_constraints and line:
+            constraints_lines.append(line)
+    
+    return main_task, "\n".join(constraints_lines)
+
+
+def get_evaluation_batch_prompt(
+    content_type: str,
+    items: List[Tuple[str, str]]
+) -> str:
+    """Get the user prompt for several (content, constraints) pairs packed into one request (sent with EVALUATION_SYSTEM_PROMPT)."""
+    return get_marshaled_prompt([
+        f"{content_type.capitalize()}:\n{content}\n\nConstraints:\n{constraints}"
+        for content, constraints in items
+    ])
+
+
+def get_summarization_batch_prompt(
+    content_type: str,
+    contents: List[str],
+    target_length_pct: float = 0.25
+) -> str:
+    """Get the summarization prompt for several contents packed into one request."""
+    target_pct = int(target_length_pct * 100)
+    return get_marshaled_prompt(
+        contents,
+        task_prompt=SUMMARIZATION_PROMPT.format(content_type=content_type, target_pct=target_pct)
+    )
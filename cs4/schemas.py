@@ -2,10 +2,15 @@
 CSV schema definitions and validation for CS4.
 """
 
+import re
 from typing import List, Tuple, Optional
 import pandas as pd
 from abc import ABC, abstractmethod
 
+# Numbered constraint lines ("1. ...") and satisfaction results ("1. Yes - ...")
+_CONSTRAINT_NUM_RE = re.compile(r'^\d+\.', re.MULTILINE)
+_RESULT_LINE_RE = re.compile(r'^\d+\.\s+(Yes|No)\s+-', re.MULTILINE)
+
 
 class BaseSchema(ABC):
     """Base class for CSV schemas."""
@@ -109,8 +114,7 @@ class ConstraintsSchema(BaseSchema):
         # Check constraints format (should have 39 constraints)
         constraints_text = str(row["constraints"])
         # Count numbered constraints (format: "1. ", "2. ", etc.)
-        import re
-        constraint_count = len(re.findall(r'^\d+\.', constraints_text, re.MULTILINE))
+        constraint_count = len(_CONSTRAINT_NUM_RE.findall(constraints_text))
         if constraint_count != 39:
             return False, f"Expected 39 constraints, found {constraint_count}"
         
@@ -210,8 +214,7 @@ class EvaluationResultsSchema(BaseSchema):
         
         # Check satisfaction_results format
         results_text = str(row["satisfaction_results"])
-        import re
-        result_count = len(re.findall(r'^\d+\.\s+(Yes|No)\s+-', results_text, re.MULTILINE))
+        result_count = len(_RESULT_LINE_RE.findall(results_text))
         if result_count != 39:
             return False, f"Expected 39 satisfaction results, found {result_count}"
         
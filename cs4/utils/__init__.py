@@ -1,15 +1,25 @@
 """Utility modules for CS4."""
 
-from cs4.utils.config_loader import load_yaml, stamp, fill_vars
-from cs4.utils.io_utils import ensure_dir
-from cs4.utils.log_utils import setup_logging, get_logger
-from cs4.utils.llm_client import OpenAIClient, AnthropicClient, get_total_usage
-from cs4.utils.embedding_utils import (
-    load_or_create_embeddings,
-    find_dissimilar_pairs,
-    find_dissimilar_pairs_distinct,
-    save_pairs_to_csv
-)
+import importlib
+
+# Utilities are imported on first access (PEP 562); in particular the
+# embedding helpers pull in sentence-transformers/torch, which the LLM
+# pipeline stages never need.
+_LAZY = {
+    "load_yaml": "cs4.utils.config_loader",
+    "stamp": "cs4.utils.config_loader",
+    "fill_vars": "cs4.utils.config_loader",
+    "ensure_dir": "cs4.utils.io_utils",
+    "setup_logging": "cs4.utils.log_utils",
+    "get_logger": "cs4.utils.log_utils",
+    "OpenAIClient": "cs4.utils.llm_client",
+    "AnthropicClient": "cs4.utils.llm_client",
+    "get_total_usage": "cs4.utils.llm_client",
+    "load_or_create_embeddings": "cs4.utils.embedding_utils",
+    "find_dissimilar_pairs": "cs4.utils.embedding_utils",
+    "find_dissimilar_pairs_distinct": "cs4.utils.embedding_utils",
+    "save_pairs_to_csv": "cs4.utils.embedding_utils",
+}
 
 __all__ = [
     "load_yaml",
@@ -26,3 +36,16 @@ __all__ = [
     "find_dissimilar_pairs_distinct",
     "save_pairs_to_csv",
 ]
+
+
+def __getattr__(name):
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,120 @@
+"""
+Adaptive concurrency limit for LLM API calls.
+
+A fixed max_concurrency either leaves throughput unused when the provider has
+headroom or piles up 429s when it does not. AimdController adjusts the number
+of in-flight calls the way TCP congestion control adjusts its window: it
+grows additively while latency stays on target and halves on errors or
+latency spikes.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class AimdController:
+    """Thread-safe additive-increase / multiplicative-decrease concurrency gate."""
+
+    def __init__(
+        self,
+        c_min: int = 1,
+        c_max: int = 64,
+        alpha: float = 0.5,
+        beta: float = 0.5,
+        target_latency: float = 8.0,
+        window: int = 32,
+        initial: Optional[int] = None
+    ):
+        """
+        Initialize the controller.
+
+        Args:
+            c_min: Lowest concurrency limit
+            c_max: Highest concurrency limit (a thread pool smaller than this
+                   caps concurrency first)
+            alpha: Limit increase per round of `limit` successful calls
+            beta: Factor the limit is multiplied by on a decrease
+            target_latency: Mean call latency in seconds above which the
+                            limit is decreased
+            window: Number of recent latencies averaged
+            initial: Starting limit (defaults to c_max)
+        """
+        self.c_min = c_min
+        self.c_max = c_max
+        self.alpha = alpha
+        self.beta = beta
+        self.target_latency = target_latency
+        self.limit = float(initial if initial is not None else c_max)
+
+        self._latencies = deque(maxlen=window)
+        self._in_flight = 0
+        # Bumped on every decrease; calls started before it do not trigger another
+        self._epoch = 0
+        self._cond = threading.Condition()
+
+    def increase(self):
+        """Raise the limit by alpha spread over one round of calls."""
+        with self._cond:
+            self.limit = min(self.c_max, self.limit + self.alpha / self.limit)
+            self._cond.notify_all()
+
+    def decrease(self, epoch: Optional[int] = None):
+        """
+        Multiply the limit by beta and start a new latency window.
+
+        Args:
+            epoch: Epoch the triggering call started in; the decrease is
+                   skipped if the limit has been cut since then
+        """
+        with self._cond:
+            if epoch is not None and epoch != self._epoch:
+                return
+            self.limit = max(self.c_min, self.limit * self.beta)
+            self._latencies.clear()
+            self._epoch += 1
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        Hold one concurrency slot for the duration of an LLM call.
+
+        Blocks until fewer than `limit` calls are in flight. The call's
+        latency, or the exception it raised, feeds the next adjustment.
+        """
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+            epoch = self._epoch
+        start = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self._release()
+            self.decrease(epoch)
+            raise
+        else:
+            self._release()
+            self._record(time.monotonic() - start, epoch)
+
+    def _release(self):
+        """Free a slot and wake one waiting caller."""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def _record(self, latency: float, epoch: int):
+        """Add a successful call's latency and adjust the limit."""
+        with self._cond:
+            if epoch != self._epoch:
+                return
+            self._latencies.append(latency)
+            mean = sum(self._latencies) / len(self._latencies)
+            window_full = len(self._latencies) == self._latencies.maxlen
+        if mean <= self.target_latency:
+            self.increase()
+        elif window_full:
+            self.decrease(epoch)
@@ -0,0 +1,176 @@
+"""
+Offline execution of many prompts through the providers' batch APIs.
+
+OpenAI's Batch API and Anthropic's Message Batches API accept a whole set of
+requests at once, run them server-side within 24 hours and bill them at half
+the realtime price. They suit offline regeneration jobs where latency does
+not matter and client-side concurrency/rate limiting would otherwise be
+needed.
+"""
+
+import io
+import json
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from cs4.utils.llm_client import OpenAIClient, AnthropicClient, UsageTracker
+
+logger = logging.getLogger("CS4Generator")
+
+_OPENAI_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def run_batch_job(
+    llm_client: object,
+    prompts: Dict[str, str],
+    model: str,
+    system_prompt: Optional[str] = None,
+    max_tokens: int = 4096,
+    poll_interval: float = 30.0
+) -> Dict[str, Tuple[str, int]]:
+    """
+    Submit prompts as one provider batch and wait for the results.
+
+    Args:
+        llm_client: OpenAIClient or AnthropicClient
+        prompts: Mapping of custom_id -> user message (ids must be unique and,
+                 for Anthropic, match [A-Za-z0-9_-]{1,64})
+        model: Model identifier
+        system_prompt: Optional system prompt shared by every request
+        max_tokens: Completion token limit (required by Anthropic)
+        poll_interval: Seconds between status checks
+
+    Returns:
+        Mapping of custom_id -> (response_text, tokens_used) for every request
+        that succeeded; failed requests are omitted
+    """
+    if not prompts:
+        return {}
+    if isinstance(llm_client, OpenAIClient):
+        return _run_openai_batch(llm_client, prompts, model, system_prompt, poll_interval)
+    if isinstance(llm_client, AnthropicClient):
+        return _run_anthropic_batch(
+            llm_client, prompts, model, system_prompt, max_tokens, poll_interval
+        )
+    raise ValueError("Unknown client type")
+
+
+def _run_openai_batch(
+    llm_client: OpenAIClient,
+    prompts: Dict[str, str],
+    model: str,
+    system_prompt: Optional[str],
+    poll_interval: float
+) -> Dict[str, Tuple[str, int]]:
+    """Run prompts through OpenAI's /v1/batches endpoint."""
+    client = llm_client.client
+
+    lines = []
+    for custom_id, prompt in prompts.items():
+        messages = [{"role": "user", "content": prompt}]
+        if system_prompt is not None:
+            messages.insert(0, {"role": "system", "content": system_prompt})
+        lines.append(json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {"model": model, "messages": messages}
+        }, ensure_ascii=False))
+    payload = io.BytesIO("\n".join(lines).encode("utf-8"))
+
+    input_file = client.files.create(file=("batch_input.jsonl", payload), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    logger.info(f"Submitted OpenAI batch {batch.id} with {len(prompts)} requests")
+
+    while batch.status not in _OPENAI_TERMINAL_STATUSES:
+        time.sleep(poll_interval)
+        batch = client.batches.retrieve(batch.id)
+        logger.info(f"Batch {batch.id} status: {batch.status}")
+
+    if batch.status != "completed":
+        raise RuntimeError(f"OpenAI batch {batch.id} ended with status '{batch.status}'")
+    if not batch.output_file_id:
+        return {}
+
+    results = {}
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        response = entry.get("response") or {}
+        if entry.get("error") or response.get("status_code") != 200:
+            logger.warning(f"Batch request {entry.get('custom_id')} failed: {entry.get('error')}")
+            continue
+        body = response["body"]
+        usage = body["usage"]
+        results[entry["custom_id"]] = (
+            body["choices"][0]["message"]["content"].strip(),
+            usage["total_tokens"]
+        )
+        if llm_client.log_usage:
+            UsageTracker.log_usage(
+                provider="openai",
+                model=model,
+                tokens=usage["total_tokens"],
+                metadata={"prompt_tokens": usage["prompt_tokens"],
+                         "completion_tokens": usage["completion_tokens"],
+                         "batch_id": batch.id}
+            )
+
+    return results
+
+
+def _run_anthropic_batch(
+    llm_client: AnthropicClient,
+    prompts: Dict[str, str],
+    model: str,
+    system_prompt: Optional[str],
+    max_tokens: int,
+    poll_interval: float
+) -> Dict[str, Tuple[str, int]]:
+    """Run prompts through Anthropic's Message Batches API."""
+    client = llm_client.client
+
+    requests = []
+    for custom_id, prompt in prompts.items():
+        params = {
+            "model": model,
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        if system_prompt is not None:
+            params["system"] = system_prompt
+        requests.append({"custom_id": custom_id, "params": params})
+
+    batch = client.messages.batches.create(requests=requests)
+    logger.info(f"Submitted Anthropic batch {batch.id} with {len(prompts)} requests")
+
+    while batch.processing_status != "ended":
+        time.sleep(poll_interval)
+        batch = client.messages.batches.retrieve(batch.id)
+        logger.info(f"Batch {batch.id} status: {batch.processing_status}")
+
+    results = {}
+    for entry in client.messages.batches.results(batch.id):
+        if entry.result.type != "succeeded":
+            logger.warning(f"Batch request {entry.custom_id} failed: {entry.result.type}")
+            continue
+        message = entry.result.message
+        tokens = message.usage.input_tokens + message.usage.output_tokens
+        results[entry.custom_id] = (message.content[0].text.strip(), tokens)
+        if llm_client.log_usage:
+            UsageTracker.log_usage(
+                provider="anthropic",
+                model=model,
+                tokens=tokens,
+                metadata={"input_tokens": message.usage.input_tokens,
+                         "output_tokens": message.usage.output_tokens,
+                         "batch_id": batch.id}
+            )
+
+    return results
@@ -0,0 +1,106 @@
+"""
+Command-line options shared by the LLM pipeline scripts.
+"""
+
+import argparse
+import logging
+from typing import Any, Optional
+
+from cs4.utils.aimd import AimdController
+from cs4.utils.rate_limiter import RateLimiter
+
+
+def add_concurrency_args(
+    parser: argparse.ArgumentParser,
+    rate_limits: bool = True,
+    auto_rate_limit: bool = False,
+    adaptive: bool = False
+):
+    """
+    Add --max-concurrency and the optional rate-limit/AIMD options to parser.
+
+    Args:
+        parser: Script argument parser
+        rate_limits: Add --requests-per-minute and --tokens-per-minute
+        auto_rate_limit: Add --auto-rate-limit (limits read from the provider)
+        adaptive: Add --adaptive-concurrency
+    """
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=8,
+        help="Maximum number of concurrent LLM requests (default: 8)"
+    )
+    if rate_limits:
+        parser.add_argument(
+            "--requests-per-minute",
+            type=float,
+            default=None,
+            help="Client-side request rate limit (default: unlimited)"
+        )
+        parser.add_argument(
+            "--tokens-per-minute",
+            type=float,
+            default=None,
+            help="Client-side token rate limit (default: unlimited)"
+        )
+    if auto_rate_limit:
+        parser.add_argument(
+            "--auto-rate-limit",
+            action="store_true",
+            help="Rate limit to the RPM/TPM the provider reports for --model "
+                 "(ignored when --requests-per-minute or --tokens-per-minute is given)"
+        )
+    if adaptive:
+        parser.add_argument(
+            "--adaptive-concurrency",
+            action="store_true",
+            help="Adapt the number of in-flight requests (up to --max-concurrency) "
+                 "to latency and errors"
+        )
+
+
+def build_rate_limiter(
+    args: argparse.Namespace,
+    client: Any = None,
+    logger: Optional[logging.Logger] = None
+) -> Optional[RateLimiter]:
+    """
+    Build the RateLimiter requested by the options from add_concurrency_args.
+
+    Explicit --requests-per-minute/--tokens-per-minute win over
+    --auto-rate-limit. If the provider's limits cannot be read, the run
+    continues unlimited.
+
+    Args:
+        args: Parsed arguments
+        client: LLM client to read provider limits from (--auto-rate-limit)
+        logger: Logger for the limits in use
+
+    Returns:
+        RateLimiter, or None when no limit was requested
+    """
+    logger = logger or logging.getLogger(__name__)
+    rpm = getattr(args, "requests_per_minute", None)
+    tpm = getattr(args, "tokens_per_minute", None)
+    if rpm or tpm:
+        return RateLimiter(rpm, tpm)
+    if getattr(args, "auto_rate_limit", False):
+        try:
+            rate_limiter = RateLimiter.from_client(client, args.model)
+        except Exception as e:
+            logger.warning(f"Could not read provider rate limits, running unlimited: {e}")
+            return None
+        logger.info(
+            f"Rate limits: {rate_limiter.requests_per_minute} requests/min, "
+            f"{rate_limiter.tokens_per_minute} tokens/min"
+        )
+        return rate_limiter
+    return None
+
+
+def build_concurrency_controller(args: argparse.Namespace) -> Optional[AimdController]:
+    """Return an AimdController capped at --max-concurrency if --adaptive-concurrency is set."""
+    if getattr(args, "adaptive_concurrency", False):
+        return AimdController(c_max=args.max_concurrency)
+    return None
@@ -0,0 +1,78 @@
+"""
+Thread-pool helpers for running independent LLM calls concurrently.
+
+LLM requests spend nearly all of their time waiting on the network, so a
+small thread pool overlaps their latencies without any changes to the
+synchronous client wrappers. Blocking socket reads release the GIL, so this
+holds for synchronous-only SDKs too; a process pool would add client
+re-creation and pickling per worker without adding any parallelism.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Iterable, Iterator, Tuple
+
+
+def run_concurrently(
+    fn: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_workers: int = 8
+) -> Iterator[Tuple[int, Any]]:
+    """
+    Call ``fn(item)`` for every item on a thread pool.
+
+    Yields ``(index, result)`` pairs as calls complete, where ``index`` is the
+    item's position in ``items``. With ``max_workers <= 1`` the items are
+    processed serially in input order. Exceptions raised by ``fn`` propagate
+    to the caller, so ``fn`` should handle per-item failures itself.
+
+    Each call runs on its own worker thread, so a call sleeping between
+    retries only holds up that worker.
+
+    Args:
+        fn: Function to call for each item
+        items: Work items
+        max_workers: Maximum number of concurrent calls
+
+    Yields:
+        Tuples of (item_index, result)
+    """
+    items = list(items)
+
+    if max_workers <= 1 or len(items) <= 1:
+        for i, item in enumerate(items):
+            yield i, fn(item)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(items)))
+    try:
+        futures = {executor.submit(fn, item): i for i, item in enumerate(items)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        # If the caller stops early (an exception, Ctrl-C or closing the
+        # generator), drop the queued items instead of running them all;
+        # only calls already in flight are waited for
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def in_input_order(results: Iterable[Tuple[int, Any]]) -> Iterator[Tuple[int, Any]]:
+    """
+    Re-sequence ``(index, result)`` pairs from run_concurrently into input order.
+
+    Results that complete early are held back until every earlier index has
+    been yielded, so only the out-of-order window (roughly max_workers
+    results) is buffered.
+
+    Args:
+        results: Pairs of (item_index, result) in any order
+
+    Yields:
+        The same pairs, ordered by item_index
+    """
+    pending = {}
+    next_index = 0
+    for i, result in results:
+        pending[i] = result
+        while next_index in pending:
+            yield next_index, pending.pop(next_index)
+            next_index += 1
@@ -0,0 +1,185 @@
+"""
+Helpers for keeping batch result DataFrames compact.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+
+from cs4.utils.record_writer import CsvWriter, JsonlWriter, is_jsonl_path
+
+# Arrow-backed strings are far smaller than Python str objects; fall back to
+# pandas' own string dtype when pyarrow is not installed
+try:
+    import pyarrow  # noqa: F401
+    TEXT_DTYPE = "string[pyarrow]"
+except ImportError:
+    TEXT_DTYPE = "string"
+
+# Columns holding a handful of distinct values across a whole batch
+CATEGORY_COLUMNS = ("model_used", "content_type")
+
+# Columns holding long generated or input text
+TEXT_COLUMNS = (
+    "constraints",
+    "selected_constraints",
+    "base_content",
+    "fitted_content",
+    "blog1",
+    "blog2",
+)
+
+
+def compact_dtypes(
+    df: pd.DataFrame,
+    category_columns: Iterable[str] = CATEGORY_COLUMNS,
+    text_columns: Iterable[str] = TEXT_COLUMNS
+) -> pd.DataFrame:
+    """
+    Store repeated labels as categoricals and long text as string dtype.
+
+    Columns that are not present in df are ignored.
+
+    Args:
+        df: Result DataFrame
+        category_columns: Low-cardinality columns to convert to category
+        text_columns: Long-text columns to convert to TEXT_DTYPE
+
+    Returns:
+        DataFrame with converted column dtypes
+    """
+    dtypes = {col: "category" for col in category_columns if col in df.columns}
+    dtypes.update({col: TEXT_DTYPE for col in text_columns if col in df.columns})
+    return df.astype(dtypes) if dtypes else df
+
+
+def is_parquet_path(path: Union[str, Path]) -> bool:
+    """Return True if path names a Parquet file."""
+    return Path(path).suffix.lower() == ".parquet"
+
+
+def read_frame(path: Union[str, Path]) -> pd.DataFrame:
+    """
+    Load a batch input or result file by its extension.
+
+    Args:
+        path: .csv, .jsonl or .parquet file (anything else is read as CSV)
+
+    Returns:
+        Loaded DataFrame
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix == ".jsonl":
+        # JSON Lines keeps long texts with embedded newlines intact
+        return pd.read_json(path, lines=True, dtype=False)
+    if suffix == ".parquet":
+        return pd.read_parquet(path)
+    return pd.read_csv(path, encoding="utf-8")
+
+
+def _as_numeric(values: pd.Series, allow_empty: bool = False) -> Optional[pd.Series]:
+    """
+    Convert a column read back as text to numbers, if it holds only numbers.
+
+    Args:
+        values: Column to convert
+        allow_empty: Also convert a column with no values at all
+
+    Returns:
+        Numeric column ("" and missing values become NaN), or None if any
+        value is not a number
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values
+    filled = values[values.notna() & (values.astype(str) != "")]
+    if filled.empty and not allow_empty:
+        return None
+    if pd.to_numeric(filled, errors="coerce").notna().all():
+        return pd.to_numeric(values, errors="coerce")
+    return None
+
+
+def read_csv_records(path: Union[str, Path]) -> pd.DataFrame:
+    """
+    Read back a CSV written by CsvWriter.
+
+    Empty fields in text columns stay "" instead of becoming NaN, so failed
+    rows (empty response text, empty constraints) look the same as in the
+    records that were written. In columns holding only numbers, empty fields
+    (e.g. the satisfaction rate or token count of a failed row) read as NaN,
+    as does "nan", which is how float NaN is written.
+
+    Args:
+        path: CSV file
+
+    Returns:
+        Loaded DataFrame
+    """
+    df = pd.read_csv(path, encoding="utf-8", keep_default_na=False, na_values=["nan"])
+    for col in df.columns:
+        numeric = _as_numeric(df[col])
+        if numeric is not None:
+            df[col] = numeric
+    return df
+
+
+def stream_records(
+    records: Iterable[Dict[str, Any]],
+    path: Union[str, Path],
+    append: bool = False,
+    fieldnames: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Write records to a CSV or JSONL file as they arrive and return them as a DataFrame.
+
+    Each record is on disk as soon as it is produced, so an interrupted run
+    keeps its progress. The returned frame is built from the records
+    themselves, not re-parsed from the file.
+
+    Args:
+        records: Result records, in output order
+        path: .jsonl file, or CSV for any other extension
+        append: Add to an existing file (rows already in it are read back
+                and come first in the result)
+        fieldnames: Column order (defaults to the keys of the first record)
+
+    Returns:
+        DataFrame of the file's rows
+    """
+    path = Path(path)
+    jsonl = is_jsonl_path(path)
+    previous = None
+    if append and path.exists() and path.stat().st_size > 0:
+        previous = read_frame(path) if jsonl else read_csv_records(path)
+    mode = "a" if append else "w"
+    rows = []
+    writer = JsonlWriter(path, mode=mode) if jsonl else CsvWriter(path, fieldnames=fieldnames, mode=mode)
+    with writer:
+        for record in records:
+            writer.write(record)
+            rows.append(record)
+    new = pd.DataFrame(rows, columns=fieldnames)
+    if previous is None:
+        return new
+    if not rows:
+        return previous
+    new = new.reindex(columns=previous.columns)
+    # A column that is empty on one side (all earlier rows failed, say) takes
+    # the numeric dtype of the other, so the result does not mix in strings
+    for col in previous.columns:
+        if pd.api.types.is_numeric_dtype(new[col]):
+            numeric = _as_numeric(previous[col], allow_empty=True)
+            if numeric is not None:
+                previous[col] = numeric
+        elif pd.api.types.is_numeric_dtype(previous[col]):
+            numeric = _as_numeric(new[col], allow_empty=True)
+            if numeric is not None:
+                new[col] = numeric
+    return pd.concat([previous, new], ignore_index=True)
+
+
+def write_parquet(df: pd.DataFrame, path: Union[str, Path]):
+    """Write df to a zstd-compressed Parquet file (requires pyarrow)."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(path, index=False, compression="zstd")
@@ -0,0 +1,73 @@
+"""
+Shared HTTP connection pool for the LLM clients.
+
+Every OpenAI/Anthropic SDK client opens its own httpx connection pool, so a
+pipeline that builds several clients pays a TCP+TLS handshake per client and
+worker. Clients built through get_shared_http_client() reuse one pool per
+SDK and size instead, over HTTP/2 when the optional h2 package is installed
+(`pip install httpx[http2]`), which multiplexes concurrent requests on a
+single connection per host.
+"""
+
+import atexit
+import threading
+from typing import Any, Dict, Optional, Tuple, Type
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_clients: Dict[Tuple[type, int, int], Any] = {}
+_lock = threading.Lock()
+
+
+def get_shared_http_client(
+    client_cls: Type,
+    max_connections: int = 128,
+    max_keepalive_connections: Optional[int] = None
+) -> Any:
+    """
+    Return the process-wide HTTP client for an SDK and pool size.
+
+    Args:
+        client_cls: The SDK's DefaultHttpxClient (openai.DefaultHttpxClient or
+                    anthropic.DefaultHttpxClient), which keeps the SDK's own
+                    timeout/redirect defaults and httpx flavour
+        max_connections: Upper bound on open connections
+        max_keepalive_connections: Idle connections kept warm (defaults to
+                                   max_connections, so every worker can
+                                   reuse one)
+
+    Returns:
+        Client to pass as http_client to the matching SDK
+    """
+    if max_keepalive_connections is None:
+        max_keepalive_connections = max_connections
+    key = (client_cls, max_connections, max_keepalive_connections)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = client_cls(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_keepalive_connections
+                )
+            )
+            _clients[key] = client
+        return client
+
+
+def close_shared_http_clients():
+    """Close every shared client (registered to run at exit)."""
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+atexit.register(close_shared_http_clients)
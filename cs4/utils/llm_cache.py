@@ -0,0 +1,273 @@
+"""
+On-disk cache for LLM responses.
+
+Reruns after a crash or repeated evaluation passes often resend identical
+prompts. Caching the (text, tokens) result of a call under a hash of its
+inputs turns those repeats into a local lookup. Backed by sqlite3 so it has
+no extra dependencies and is safe to share between worker threads.
+
+The pipeline classes only use the cache when asked to (use_cache=True):
+their calls are not made at temperature 0, so a cached response replays
+one sample instead of drawing a new one.
+
+SemanticLLMCache extends this to inputs that are close but not identical
+(e.g. revisions of the same draft) by matching on embedding similarity.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, Union
+
+import numpy as np
+
+from cs4.config import Config
+
+
+# Folded into every key. Keys already contain the full prompt text, so prompt
+# edits invalidate entries on their own; bump this when cached responses go
+# stale for another reason (e.g. a change in how they are requested)
+CACHE_VERSION = 1
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    Build a cache key from the inputs that determine an LLM response.
+
+    Args:
+        *parts: Model, prompts and any other call parameters (pass the
+                complete prompt text rather than a prompt name, so editing
+                a prompt changes the key)
+
+    Returns:
+        Hex digest identifying the call
+    """
+    payload = "|".join(str(part) for part in (CACHE_VERSION, *parts))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonicalize text before it is hashed into a cache key.
+
+    NFKC folding and whitespace collapsing make copies of a document that
+    differ only in Unicode forms, line wrapping or trailing blanks share one
+    cache entry.
+
+    Args:
+        text: Text to normalize
+
+    Returns:
+        Normalized text
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class LLMCache:
+    """Persistent key -> JSON value store for LLM responses."""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """
+        Open (or create) a response cache.
+
+        Args:
+            path: sqlite file to use (defaults to data/llm_cache.sqlite)
+        """
+        if path is None:
+            Config.ensure_directories()
+            path = Config.DATA_DIR / "llm_cache.sqlite"
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock:
+            # WAL lets readers proceed while another connection writes, so
+            # several processes can share one cache file
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            # Caches created before entries could expire lack the column
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(responses)")}
+            if "expires_at" not in columns:
+                self._conn.execute("ALTER TABLE responses ADD COLUMN expires_at REAL")
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss or expired entry."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if row[1] is not None and row[1] < time.time():
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        Store a JSON-serializable value under key.
+
+        Args:
+            key: Cache key (see make_cache_key)
+            value: Value to store
+            ttl: Seconds until the entry expires (None to keep it indefinitely)
+        """
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at)
+            )
+            self._conn.commit()
+
+    def stats(self) -> str:
+        """Summarize lookups made through this instance for logging."""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        rate = hits / total if total else 0.0
+        return f"{hits} hits, {misses} misses ({rate:.0%} hit rate)"
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class SemanticLLMCache:
+    """
+    Response store looked up by embedding similarity instead of exact key.
+
+    Entries are grouped by namespace (one per model and prompt), and a lookup
+    returns the value stored for the most similar earlier text when its
+    cosine similarity reaches the threshold. Only suitable for prompts whose
+    output tolerates small input differences; evaluation, which scores one
+    exact text, must not use it.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[str], Sequence[float]],
+        threshold: float = 0.92,
+        path: Optional[Union[str, Path]] = None
+    ):
+        """
+        Open (or create) a semantic response cache.
+
+        Args:
+            embed: Function returning the embedding vector of a text
+            threshold: Minimum cosine similarity for a hit
+            path: sqlite file to use (defaults to data/llm_cache.sqlite)
+        """
+        if path is None:
+            Config.ensure_directories()
+            path = Config.DATA_DIR / "llm_cache.sqlite"
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.embed = embed
+        self.threshold = threshold
+
+        self.hits = 0
+        self.misses = 0
+        # namespace -> (unit-norm embedding matrix, stored values)
+        self._index: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS semantic_responses "
+                "(namespace TEXT NOT NULL, embedding BLOB NOT NULL, value TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _vector(self, text: str) -> np.ndarray:
+        """Embed text as a unit-norm float32 vector."""
+        vector = np.asarray(self.embed(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _load(self, namespace: str) -> tuple:
+        """Return the namespace's index, reading it from disk on first use (lock held)."""
+        if namespace not in self._index:
+            rows = self._conn.execute(
+                "SELECT embedding, value FROM semantic_responses WHERE namespace = ?",
+                (namespace,)
+            ).fetchall()
+            vectors = [np.frombuffer(row[0], dtype=np.float32) for row in rows]
+            matrix = np.vstack(vectors) if vectors else None
+            self._index[namespace] = (matrix, [json.loads(row[1]) for row in rows])
+        return self._index[namespace]
+
+    def get(self, namespace: str, text: str) -> Optional[Any]:
+        """
+        Look up the value stored for the text most similar to text.
+
+        Args:
+            namespace: Group to search (see make_cache_key)
+            text: Input to match
+
+        Returns:
+            Stored value, or None when nothing reaches the threshold
+        """
+        vector = self._vector(text)
+        with self._lock:
+            matrix, values = self._load(namespace)
+            if matrix is not None and matrix.shape[1] == vector.shape[0]:
+                scores = matrix @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self.hits += 1
+                    return values[best]
+            self.misses += 1
+        return None
+
+    def set(self, namespace: str, text: str, value: Any):
+        """
+        Store a JSON-serializable value for text.
+
+        Args:
+            namespace: Group to add the entry to
+            text: Input the value was produced for
+            value: Value to store
+        """
+        vector = self._vector(text)
+        with self._lock:
+            matrix, values = self._load(namespace)
+            self._conn.execute(
+                "INSERT INTO semantic_responses (namespace, embedding, value) VALUES (?, ?, ?)",
+                (namespace, vector.tobytes(), json.dumps(value, ensure_ascii=False))
+            )
+            self._conn.commit()
+            matrix = vector[None, :] if matrix is None else np.vstack([matrix, vector])
+            self._index[namespace] = (matrix, values + [value])
+
+    def stats(self) -> str:
+        """Summarize lookups made through this instance for logging."""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        rate = hits / total if total else 0.0
+        return f"{hits} hits, {misses} misses ({rate:.0%} hit rate)"
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
@@ -2,15 +2,18 @@
 LLM client wrappers for OpenAI and Anthropic APIs with usage tracking.
 """
 
+import atexit
 import os
+import threading
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Protocol, Tuple, runtime_checkable
 from pathlib import Path
 
-from openai import OpenAI
-from anthropic import Anthropic
+from openai import OpenAI, DefaultHttpxClient as OpenAIHttpxClient
+from anthropic import Anthropic, DefaultHttpxClient as AnthropicHttpxClient
 
 from cs4.config import Config
+from cs4.utils.http import get_shared_http_client
 
 
 class UsageTracker:
@@ -18,18 +21,42 @@ class UsageTracker:
     
     _usage_file = Config.LOGS_DIR / "api_usage.txt"
     
+    # Records are buffered and appended in blocks instead of reopening the
+    # file for every call; the lock keeps concurrent workers' lines intact
+    _flush_every = 100
+    _buffer: List[str] = []
+    _lock = threading.Lock()
+    
     @classmethod
     def log_usage(cls, provider: str, model: str, tokens: int, metadata: Optional[Dict] = None):
-        """Log API usage to file."""
+        """Log API usage (written to file every _flush_every records)."""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         metadata_str = f" | {metadata}" if metadata else ""
         
+        with cls._lock:
+            cls._buffer.append(f"{timestamp} | {provider} | {model} | {tokens}{metadata_str}\n")
+            if len(cls._buffer) >= cls._flush_every:
+                cls._flush_locked()
+    
+    @classmethod
+    def flush(cls):
+        """Write buffered usage records to file."""
+        with cls._lock:
+            cls._flush_locked()
+    
+    @classmethod
+    def _flush_locked(cls):
+        if not cls._buffer:
+            return
+        Config.ensure_directories()
         with open(cls._usage_file, "a") as f:
-            f.write(f"{timestamp} | {provider} | {model} | {tokens}{metadata_str}\n")
+            f.writelines(cls._buffer)
+        cls._buffer.clear()
     
     @classmethod
     def get_total_usage(cls) -> Dict[str, Any]:
         """Calculate total usage statistics."""
+        cls.flush()
         if not cls._usage_file.exists():
             return {"total_tokens": 0, "by_provider": {}}
         
@@ -54,15 +81,68 @@ class UsageTracker:
         }
 
 
+def anthropic_total_tokens(usage: Any) -> int:
+    """
+    Total tokens billed for an Anthropic response.
+    
+    With prompt caching, input_tokens only counts the uncached part of the
+    prompt; tokens written to or read from the cache are reported separately.
+    """
+    return (
+        usage.input_tokens
+        + usage.output_tokens
+        + (getattr(usage, "cache_creation_input_tokens", None) or 0)
+        + (getattr(usage, "cache_read_input_tokens", None) or 0)
+    )
+
+
+def cached_system_prompt(system: str) -> List[Dict[str, Any]]:
+    """
+    Wrap an Anthropic system prompt in a block marked for prompt caching.
+    
+    Anthropic only caches prompt prefixes that carry a cache_control
+    breakpoint (OpenAI caches long prefixes automatically). Prompts shorter
+    than the model's minimum cacheable length are simply sent uncached.
+    
+    Args:
+        system: System prompt text
+        
+    Returns:
+        Value to pass as the system parameter
+    """
+    return [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+
+
 class OpenAIClient:
     """Wrapper for OpenAI API with usage tracking."""
     
-    def __init__(self, api_key: Optional[str] = None, log_usage: bool = True):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        log_usage: bool = True,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        max_connections: Optional[int] = None,
+        http_client: Optional[Any] = None
+    ):
         self.api_key = api_key or Config.get_api_key("openai")
         if not self.api_key:
             raise ValueError("OpenAI API key not provided")
         
-        self.client = OpenAI(api_key=self.api_key)
+        # timeout/max_retries fall back to the SDK defaults when not given;
+        # max_retries=0 leaves retrying to the callers' own retry loops
+        options = {}
+        if timeout is not None:
+            options["timeout"] = timeout
+        if max_retries is not None:
+            options["max_retries"] = max_retries
+        # An explicit http_client wins; otherwise max_connections selects the
+        # process-wide pool of that size, shared with other clients
+        if http_client is not None:
+            options["http_client"] = http_client
+        elif max_connections is not None:
+            options["http_client"] = get_shared_http_client(OpenAIHttpxClient, max_connections)
+        self.client = OpenAI(api_key=self.api_key, **options)
         self.log_usage = log_usage
     
     def chat_completion(
@@ -95,6 +175,20 @@ class OpenAIClient:
         """Extract text from response."""
         return response.choices[0].message.content.strip()
     
+    def embed(self, text: str, model: str = "text-embedding-3-small") -> List[float]:
+        """Return the embedding vector of text."""
+        response = self.client.embeddings.create(model=model, input=text)
+        
+        if self.log_usage:
+            UsageTracker.log_usage(
+                provider="openai",
+                model=model,
+                tokens=response.usage.total_tokens,
+                metadata={"prompt_tokens": response.usage.prompt_tokens}
+            )
+        
+        return response.data[0].embedding
+    
     def chat(
         self,
         system_prompt: str,
@@ -118,12 +212,31 @@ class OpenAIClient:
 class AnthropicClient:
     """Wrapper for Anthropic API with usage tracking."""
     
-    def __init__(self, api_key: Optional[str] = None, log_usage: bool = True):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        log_usage: bool = True,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        max_connections: Optional[int] = None,
+        http_client: Optional[Any] = None
+    ):
         self.api_key = api_key or Config.get_api_key("anthropic")
         if not self.api_key:
             raise ValueError("Anthropic API key not provided")
         
-        self.client = Anthropic(api_key=self.api_key)
+        options = {}
+        if timeout is not None:
+            options["timeout"] = timeout
+        if max_retries is not None:
+            options["max_retries"] = max_retries
+        # An explicit http_client wins; otherwise max_connections selects the
+        # process-wide pool of that size, shared with other clients
+        if http_client is not None:
+            options["http_client"] = http_client
+        elif max_connections is not None:
+            options["http_client"] = get_shared_http_client(AnthropicHttpxClient, max_connections)
+        self.client = Anthropic(api_key=self.api_key, **options)
         self.log_usage = log_usage
     
     def create_message(
@@ -151,13 +264,17 @@ class AnthropicClient:
         
         if self.log_usage:
             # Anthropic usage is in response.usage
-            total_tokens = response.usage.input_tokens + response.usage.output_tokens
+            total_tokens = anthropic_total_tokens(response.usage)
+            metadata = {"input_tokens": response.usage.input_tokens,
+                        "output_tokens": response.usage.output_tokens}
+            cache_read = getattr(response.usage, "cache_read_input_tokens", None)
+            if cache_read:
+                metadata["cache_read_input_tokens"] = cache_read
             UsageTracker.log_usage(
                 provider="anthropic",
                 model=model,
                 tokens=total_tokens,
-                metadata={"input_tokens": response.usage.input_tokens,
-                         "output_tokens": response.usage.output_tokens}
+                metadata=metadata
             )
         
         return response
@@ -184,6 +301,100 @@ class AnthropicClient:
         return self.get_response_text(response)
 
 
+@runtime_checkable
+class LLMAdapter(Protocol):
+    """Provider-neutral chat call used by the pipeline modules."""
+    
+    def chat(
+        self,
+        *,
+        system: Optional[str],
+        user: str,
+        model: str,
+        max_tokens: int,
+        **kwargs
+    ) -> Tuple[str, int]:
+        """
+        Send one system + user exchange.
+        
+        Args:
+            system: System prompt (None to send none)
+            user: User message
+            model: Model identifier
+            max_tokens: Completion token cap
+            **kwargs: Extra request options (e.g. timeout)
+            
+        Returns:
+            Tuple of (response_text, tokens_used)
+        """
+        ...
+
+
+class OpenAIAdapter:
+    """LLMAdapter over an OpenAIClient."""
+    
+    def __init__(self, client: OpenAIClient):
+        self.client = client
+    
+    def chat(self, *, system, user, model, max_tokens, **kwargs) -> Tuple[str, int]:
+        messages = [{"role": "user", "content": user}]
+        if system is not None:
+            messages.insert(0, {"role": "system", "content": system})
+        response = self.client.chat_completion(
+            messages=messages,
+            model=model,
+            max_completion_tokens=max_tokens,
+            **kwargs
+        )
+        return self.client.get_response_text(response), response.usage.total_tokens
+
+
+class AnthropicAdapter:
+    """LLMAdapter over an AnthropicClient."""
+    
+    def __init__(self, client: AnthropicClient):
+        self.client = client
+    
+    def chat(self, *, system, user, model, max_tokens, **kwargs) -> Tuple[str, int]:
+        # The system prompt is the part shared between requests, so it is the
+        # prefix marked for caching
+        response = self.client.create_message(
+            messages=[{"role": "user", "content": user}],
+            model=model,
+            system=cached_system_prompt(system) if system is not None else None,
+            max_tokens=max_tokens,
+            **kwargs
+        )
+        tokens = anthropic_total_tokens(response.usage)
+        return self.client.get_response_text(response), tokens
+
+
+def get_adapter(llm_client: object) -> LLMAdapter:
+    """
+    Wrap a client in the LLMAdapter for its provider.
+    
+    The provider is resolved once here, so callers make every request through
+    the same chat() interface. Objects that already implement LLMAdapter are
+    returned unchanged, which is how other providers can be plugged in.
+    
+    Args:
+        llm_client: OpenAIClient, AnthropicClient or an LLMAdapter
+        
+    Returns:
+        Adapter for llm_client
+    """
+    if isinstance(llm_client, OpenAIClient):
+        return OpenAIAdapter(llm_client)
+    if isinstance(llm_client, AnthropicClient):
+        return AnthropicAdapter(llm_client)
+    if isinstance(llm_client, LLMAdapter):
+        return llm_client
+    raise ValueError("Unknown client type")
+
+
+atexit.register(UsageTracker.flush)
+
+
 def get_total_usage() -> Dict[str, Any]:
     """Get total API usage statistics."""
     return UsageTracker.get_total_usage()
@@ -1,4 +1,26 @@
-import logging, logging.config, os, pathlib, yaml
+import atexit, logging, logging.config, logging.handlers, os, pathlib, queue, yaml
+
+# Listeners started by setup_logging, so a repeated call can stop them first
+_listeners: list[logging.handlers.QueueListener] = []
+
+def _stop_listeners():
+    while _listeners:
+        _listeners.pop().stop()
+
+atexit.register(_stop_listeners)
+
+def _move_handlers_to_queue(logger: logging.Logger):
+    """Replace logger's handlers with a QueueHandler drained by a background listener."""
+    handlers = list(logger.handlers)
+    if not handlers:
+        return
+    q = queue.Queue(-1)
+    for handler in handlers:
+        logger.removeHandler(handler)
+    logger.addHandler(logging.handlers.QueueHandler(q))
+    listener = logging.handlers.QueueListener(q, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
 
 def setup_logging(cfg_path: str, job_log_file: str | None = None):
     with open(cfg_path, "r") as f:
@@ -24,7 +46,13 @@ def setup_logging(cfg_path: str, job_log_file: str | None = None):
             if name in cfg.get("loggers", {}):
                 cfg["loggers"][name]["handlers"].append("job_file")
 
+    _stop_listeners()
     logging.config.dictConfig(cfg)
 
+    # format and write records on listener threads so worker threads making
+    # LLM calls never block on console/file I/O
+    for name in cfg.get("loggers", {}):
+        _move_handlers_to_queue(logging.getLogger(name))
+
 def get_logger(name: str) -> logging.Logger:
     return logging.getLogger(name)
@@ -0,0 +1,179 @@
+"""
+Client-side rate limiting for LLM API calls.
+
+Follows the approach of the OpenAI cookbook's parallel request processor:
+request and token capacity refill continuously at RPM/60 and TPM/60 per
+second, and a call waits until both have room, so batches stay under the
+account limits instead of discovering them through 429 errors.
+"""
+
+import threading
+import time
+from typing import Any, Mapping, Optional, Tuple
+
+# Rate-limit headers reported on every response: (requests, tokens) per minute
+_LIMIT_HEADERS = (
+    ("x-ratelimit-limit-requests", "x-ratelimit-limit-tokens"),
+    ("anthropic-ratelimit-requests-limit", "anthropic-ratelimit-tokens-limit"),
+)
+
+
+def limits_from_headers(headers: Mapping[str, str]) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Read the account's request and token limits from API response headers.
+
+    Args:
+        headers: Response headers from OpenAI or Anthropic
+
+    Returns:
+        Tuple of (requests_per_minute, tokens_per_minute); None where the
+        header is missing
+    """
+    def read(name):
+        value = headers.get(name)
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+    for requests_header, tokens_header in _LIMIT_HEADERS:
+        requests_per_minute, tokens_per_minute = read(requests_header), read(tokens_header)
+        if requests_per_minute is not None or tokens_per_minute is not None:
+            return requests_per_minute, tokens_per_minute
+    return None, None
+
+
+class RateLimiter:
+    """Thread-safe token-bucket limiter on requests and tokens per minute."""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None
+    ):
+        """
+        Initialize the limiter with full buckets.
+
+        Args:
+            requests_per_minute: Request budget (None for no request limit)
+            tokens_per_minute: Token budget (None for no token limit)
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.available_request_capacity = requests_per_minute or 0.0
+        self.available_token_capacity = tokens_per_minute or 0.0
+        self._last_update = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_client(cls, llm_client: Any, model: str, headroom: float = 0.9) -> "RateLimiter":
+        """
+        Build a limiter from the limits the provider reports for model.
+
+        Sends one 1-token request and reads its rate-limit headers, as the
+        OpenAI cookbook's parallel processor suggests.
+
+        Args:
+            llm_client: OpenAIClient or AnthropicClient
+            model: Model the limits apply to
+            headroom: Fraction of the reported limits to use
+
+        Returns:
+            RateLimiter (unlimited where the provider reported no limit)
+        """
+        from cs4.utils.llm_client import OpenAIClient, AnthropicClient
+
+        messages = [{"role": "user", "content": "Hi"}]
+        if isinstance(llm_client, OpenAIClient):
+            raw = llm_client.client.chat.completions.with_raw_response.create(
+                model=model, messages=messages, max_completion_tokens=1
+            )
+        elif isinstance(llm_client, AnthropicClient):
+            raw = llm_client.client.messages.with_raw_response.create(
+                model=model, messages=messages, max_tokens=1
+            )
+        else:
+            raise ValueError("Unknown client type")
+
+        requests_per_minute, tokens_per_minute = limits_from_headers(raw.headers)
+        return cls(
+            requests_per_minute * headroom if requests_per_minute else None,
+            tokens_per_minute * headroom if tokens_per_minute else None
+        )
+
+    def _refill(self):
+        """Top up both buckets for the time elapsed since the last update."""
+        now = time.monotonic()
+        elapsed = now - self._last_update
+        self._last_update = now
+        if self.requests_per_minute:
+            self.available_request_capacity = min(
+                self.requests_per_minute,
+                self.available_request_capacity + elapsed * self.requests_per_minute / 60.0
+            )
+        if self.tokens_per_minute:
+            self.available_token_capacity = min(
+                self.tokens_per_minute,
+                self.available_token_capacity + elapsed * self.tokens_per_minute / 60.0
+            )
+
+    def acquire(self, estimated_tokens: int = 0):
+        """
+        Block until there is capacity for one request of the given size.
+
+        Args:
+            estimated_tokens: Estimated prompt + completion tokens for the call
+        """
+        if self.tokens_per_minute:
+            # A single oversized request must still be able to go through
+            estimated_tokens = min(estimated_tokens, self.tokens_per_minute)
+
+        while True:
+            with self._lock:
+                self._refill()
+                request_ok = (
+                    not self.requests_per_minute or self.available_request_capacity >= 1
+                )
+                tokens_ok = (
+                    not self.tokens_per_minute
+                    or self.available_token_capacity >= estimated_tokens
+                )
+                if request_ok and tokens_ok:
+                    if self.requests_per_minute:
+                        self.available_request_capacity -= 1
+                    if self.tokens_per_minute:
+                        self.available_token_capacity -= estimated_tokens
+                    return
+
+                wait = 0.0
+                if not request_ok:
+                    wait = (1 - self.available_request_capacity) * 60.0 / self.requests_per_minute
+                if not tokens_ok:
+                    wait = max(
+                        wait,
+                        (estimated_tokens - self.available_token_capacity) * 60.0 / self.tokens_per_minute
+                    )
+
+            time.sleep(wait)
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: int):
+        """
+        Correct the token budget once a call's real usage is known.
+
+        acquire() can only debit an estimate made before the call (usually
+        prompt length only); the difference to the reported usage, including
+        completion tokens, is charged or refunded here.
+
+        Args:
+            estimated_tokens: Estimate passed to acquire() for the call
+            actual_tokens: Total tokens reported by the API
+        """
+        if not self.tokens_per_minute:
+            return
+        estimated_tokens = min(estimated_tokens, self.tokens_per_minute)
+        with self._lock:
+            self._refill()
+            self.available_token_capacity = min(
+                self.tokens_per_minute,
+                self.available_token_capacity + estimated_tokens - actual_tokens
+            )
@@ -0,0 +1,169 @@
+"""
+Streaming writers for batch results.
+
+Batch jobs append one record per completed LLM call instead of re-serializing
+the whole result set, so total bytes written stay O(N) and partial progress
+survives a crash.
+"""
+
+import csv
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Union
+
+
+def _json_default(value: Any) -> Any:
+    """Convert numpy/pandas scalars to plain Python values for json.dumps."""
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def is_jsonl_path(path: Union[str, Path]) -> bool:
+    """Return True if path names a JSON Lines file."""
+    return Path(path).suffix.lower() == ".jsonl"
+
+
+class JsonlWriter:
+    """Append-only JSON Lines writer."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        mode: str = "w",
+        flush_interval: int = 1
+    ):
+        """
+        Open a JSON Lines file for writing.
+
+        Args:
+            path: Output file path
+            mode: File mode ("w" to start fresh, "a" to append)
+            flush_interval: Flush to disk every N records
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = max(1, flush_interval)
+        self.num_written = 0
+        self._file = open(self.path, mode, encoding="utf-8")
+
+    def write(self, record: Dict[str, Any]):
+        """Write a single record as one JSON line."""
+        self._file.write(json.dumps(record, ensure_ascii=False, default=_json_default))
+        self._file.write("\n")
+        self.num_written += 1
+        if self.num_written % self.flush_interval == 0:
+            self._file.flush()
+
+    def close(self):
+        """Flush and close the underlying file."""
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def completed_keys(path: Union[str, Path], column: str = "instruction_number") -> Set[Any]:
+    """
+    Collect the values of column already written to a CSV or JSON Lines output.
+
+    Used to resume a batch job: rows whose key is in the returned set were
+    finished by an earlier run and can be skipped.
+
+    Args:
+        path: CSV or .jsonl file written by a previous run
+        column: Key column identifying a row
+
+    Returns:
+        Set of keys found (empty if the file or column does not exist)
+    """
+    path = Path(path)
+    if not path.exists() or path.stat().st_size == 0:
+        return set()
+    if is_jsonl_path(path):
+        keys = set()
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A run killed mid-write can leave a truncated last line
+                    continue
+                if column in record:
+                    keys.add(record[column])
+        return keys
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        if column not in (reader.fieldnames or []):
+            return set()
+        return {_parse_key(row[column]) for row in reader}
+
+
+def _parse_key(value: str) -> Any:
+    """Read back a key the way pandas would have written it (ints stay ints)."""
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+class CsvWriter:
+    """Append-only CSV writer; the header is taken from the first record."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        fieldnames: Optional[List[str]] = None,
+        flush_interval: int = 1,
+        mode: str = "w"
+    ):
+        """
+        Open a CSV file for writing.
+
+        Args:
+            path: Output file path
+            fieldnames: Column order (defaults to the keys of the first record)
+            flush_interval: Flush to disk every N records
+            mode: File mode ("w" to start fresh, "a" to append; appending to
+                  a non-empty file reuses its header)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fieldnames = fieldnames
+        self.flush_interval = max(1, flush_interval)
+        self.num_written = 0
+        self._write_header = True
+        if mode == "a" and self.path.exists() and self.path.stat().st_size > 0:
+            with open(self.path, newline="", encoding="utf-8") as f:
+                self.fieldnames = next(csv.reader(f))
+            self._write_header = False
+        self._file = open(self.path, mode, newline="", encoding="utf-8")
+        self._writer = None
+
+    def write(self, record: Dict[str, Any]):
+        """Write a single record as one CSV row."""
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames or list(record))
+            if self._write_header:
+                self._writer.writeheader()
+        self._writer.writerow(record)
+        self.num_written += 1
+        if self.num_written % self.flush_interval == 0:
+            self._file.flush()
+
+    def close(self):
+        """Flush and close the underlying file."""
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,146 @@
+"""
+Retry helpers for LLM API calls.
+"""
+
+import random
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from time import sleep
+from typing import Callable, ContextManager, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float = 30.0) -> float:
+    """
+    Compute a jittered exponential backoff delay.
+
+    The upper bound doubles with every attempt (capped at max_delay) and the
+    actual delay is drawn uniformly from [base_delay, upper bound], so workers
+    that failed together do not all retry at the same instant.
+
+    Args:
+        attempt: 1-based number of the attempt that just failed
+        base_delay: Minimum delay in seconds
+        max_delay: Maximum delay in seconds
+
+    Returns:
+        Seconds to sleep before the next attempt
+    """
+    upper = min(max_delay, base_delay * 2 ** attempt)
+    return random.uniform(min(base_delay, upper), upper)
+
+
+# HTTP statuses worth retrying: timeouts, conflicts and rate limits; all other
+# 4xx responses (bad request, auth, not found, ...) fail the same way again
+_RETRYABLE_STATUSES = {408, 409, 429}
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Decide whether a failed LLM call is worth retrying.
+
+    API errors carrying an HTTP status are retried for 408/409/429 and 5xx
+    only. Errors without a status (timeouts, dropped connections, malformed
+    responses) are treated as transient.
+
+    Args:
+        error: Exception raised by the call
+
+    Returns:
+        True if the call should be retried
+    """
+    status = getattr(error, "status_code", None)
+    if not isinstance(status, int):
+        return True
+    return status in _RETRYABLE_STATUSES or status >= 500
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Read the server-requested wait from a rate-limit error, if any.
+
+    Both OpenAI and Anthropic errors expose the HTTP response, whose
+    retry-after-ms / retry-after headers say when the quota refills.
+
+    Args:
+        error: Exception raised by the call
+
+    Returns:
+        Seconds to wait, or None if the error carries no usable header
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return max(float(value) / 1000.0, 0.0)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RetryMixin:
+    """
+    Retry loop shared by the LLM-calling classes.
+
+    Expects the host class to define retry_attempts, delay and logger, and
+    optionally concurrency_controller (an AimdController).
+    """
+
+    max_retry_delay = 60.0
+
+    def _call_slot(self) -> ContextManager:
+        """Return the context an LLM call runs in (an AIMD slot if configured)."""
+        controller = getattr(self, "concurrency_controller", None)
+        if controller is not None:
+            return controller.slot()
+        return nullcontext()
+
+    def _retry(self, call: Callable[[], T]) -> T:
+        """
+        Run call, retrying transient failures.
+
+        Terminal errors (see is_retryable) are raised immediately. Otherwise
+        the wait before the next attempt is the server's Retry-After when
+        given, else a jittered exponential backoff from self.delay.
+
+        Args:
+            call: Function making one attempt
+
+        Returns:
+            The first successful result
+
+        Raises:
+            The last exception once retry_attempts attempts have failed
+        """
+        for attempt in range(1, self.retry_attempts + 1):
+            try:
+                return call()
+            except Exception as e:
+                if not is_retryable(e):
+                    self.logger.warning(f"Attempt {attempt}/{self.retry_attempts} failed, not retrying: {e}")
+                    raise
+                self.logger.warning(f"Attempt {attempt}/{self.retry_attempts} failed: {e}")
+                if attempt == self.retry_attempts:
+                    raise
+                wait = retry_after_seconds(e)
+                if wait is None:
+                    wait = backoff_delay(attempt, self.delay)
+                sleep(min(wait, self.max_retry_delay))
+        raise RuntimeError("retry_attempts must be at least 1")
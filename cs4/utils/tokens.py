@@ -0,0 +1,177 @@
+"""
+Token counting and prompt truncation helpers.
+
+Counts use tiktoken when it is installed and otherwise fall back to the usual
+~4 characters per token estimate, which is close enough for keeping prompts
+inside a model's context window.
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Context window sizes (prompt + completion tokens), matched by model prefix
+MODEL_CONTEXT_LIMITS = {
+    "gpt-4.1": 1047576,
+    "gpt-5": 400000,
+    "gpt-4o": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+    "o1": 200000,
+    "o3": 200000,
+    "o4": 200000,
+    "claude": 200000,
+}
+
+# Marker left where the middle of a truncated text was removed
+TRUNCATION_MARKER = "\n\n[...]\n\n"
+
+_CHARS_PER_TOKEN = 4
+
+# Whitespace following sentence-ending punctuation
+_SENTENCE_BREAK_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    """Return the tiktoken encoding for model, or None when unavailable."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Non-OpenAI models: o200k_base is a reasonable approximation
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # Encodings are downloaded on first use and may be unreachable
+        return None
+
+
+def context_limit(model: str) -> Optional[int]:
+    """
+    Look up the context window of a model.
+
+    Args:
+        model: Model identifier
+
+    Returns:
+        Context size in tokens, or None if the model is unknown
+    """
+    matches = [prefix for prefix in MODEL_CONTEXT_LIMITS if model.startswith(prefix)]
+    if not matches:
+        return None
+    return MODEL_CONTEXT_LIMITS[max(matches, key=len)]
+
+
+def count_tokens(text: str, model: str) -> int:
+    """
+    Count the tokens in text for the given model.
+
+    Args:
+        text: Text to count
+        model: Model identifier
+
+    Returns:
+        Token count (estimated from the length when tiktoken is unavailable)
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return len(text) // _CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+@lru_cache(maxsize=128)
+def count_static_tokens(text: str, model: str) -> int:
+    """
+    Count the tokens of text that is sent unchanged with every request.
+
+    Meant for system prompts and templates rendered with empty slots, which
+    are then only tokenized once per process and model; the count of a
+    filled-in prompt is this plus the counts of its slot values (give or
+    take a token at each slot boundary).
+
+    Args:
+        text: Static prompt text
+        model: Model identifier
+
+    Returns:
+        Token count
+    """
+    return count_tokens(text, model)
+
+
+def truncate_middle(text: str, max_tokens: int, model: str) -> str:
+    """
+    Shorten text to at most max_tokens by dropping its middle.
+
+    The head and tail are kept, since they usually carry the introduction and
+    conclusion of a document, and TRUNCATION_MARKER marks the cut.
+
+    Args:
+        text: Text to shorten
+        max_tokens: Token budget for the result
+        model: Model identifier
+
+    Returns:
+        text unchanged if it fits, otherwise its head and tail
+    """
+    max_tokens = max(max_tokens, 0)
+    encoding = _get_encoding(model)
+    if encoding is None:
+        max_chars = max_tokens * _CHARS_PER_TOKEN
+        if len(text) <= max_chars:
+            return text
+        keep = max(max_chars - len(TRUNCATION_MARKER), 0)
+        head = keep // 2
+        tail = keep - head
+        return text[:head] + TRUNCATION_MARKER + (text[-tail:] if tail else "")
+
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    keep = max(max_tokens - len(encoding.encode(TRUNCATION_MARKER)), 0)
+    head = keep // 2
+    tail = keep - head
+    return (
+        encoding.decode(tokens[:head])
+        + TRUNCATION_MARKER
+        + (encoding.decode(tokens[-tail:]) if tail else "")
+    )
+
+
+def truncate_at_sentence(text: str, max_tokens: int, model: str) -> str:
+    """
+    Shorten text to at most max_tokens, cutting at the end of a sentence.
+
+    Unlike truncate_middle, the head is kept; this suits inputs that are
+    oversized because unrelated text was appended to them.
+
+    Args:
+        text: Text to shorten
+        max_tokens: Token budget for the result
+        model: Model identifier
+
+    Returns:
+        text unchanged if it fits, otherwise its longest run of leading
+        sentences within the budget (or a hard cut if the first sentence
+        alone is over it)
+    """
+    max_tokens = max(max_tokens, 0)
+    encoding = _get_encoding(model)
+    if encoding is None:
+        if len(text) <= max_tokens * _CHARS_PER_TOKEN:
+            return text
+        head = text[:max_tokens * _CHARS_PER_TOKEN]
+    else:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        head = encoding.decode(tokens[:max_tokens])
+    breaks = [m.start() for m in _SENTENCE_BREAK_RE.finditer(head)]
+    return head[:breaks[-1]] if breaks else head
@@ -10,11 +10,11 @@ from pathlib import Path
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-import pandas as pd
-
 from cs4.core.evaluator import ConstraintEvaluator
 from cs4.utils.llm_client import OpenAIClient, AnthropicClient, get_total_usage
 from cs4.utils.log_utils import setup_logging, get_logger
+from cs4.utils.cli_args import add_concurrency_args, build_rate_limiter
+from cs4.utils.frame_utils import read_frame
 from cs4.config import Config
 
 
@@ -31,12 +31,12 @@ def main():
     parser.add_argument(
         "--input-path",
         required=True,
-        help="Path to input CSV (e.g., fitted_content.csv)"
+        help="Path to input CSV or JSONL (e.g., fitted_content.csv)"
     )
     parser.add_argument(
         "--output-path",
         required=True,
-        help="Path to output CSV (e.g., evaluation_results.csv)"
+        help="Path to output CSV, JSONL or Parquet (e.g., evaluation_results.csv)"
     )
     parser.add_argument(
         "--content-column",
@@ -65,6 +65,34 @@ def main():
         default=3,
         help="Number of retry attempts on failure"
     )
+    add_concurrency_args(parser, auto_rate_limit=True)
+    parser.add_argument(
+        "--use-batch-api",
+        action="store_true",
+        help="Run all requests as one provider batch job (cheaper, completes within 24h)"
+    )
+    parser.add_argument(
+        "--marshal-batch-size",
+        type=int,
+        default=1,
+        help="Number of samples packed into one LLM request (default: 1; values "
+             "above 2 reduce judgment accuracy)"
+    )
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help="Reuse cached evaluations for identical content, constraints and model"
+    )
+    parser.add_argument(
+        "--compact-prompt",
+        action="store_true",
+        help="Use one worked example instead of three in the system prompt"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip samples already written to --output-path and append the rest"
+    )
     parser.add_argument(
         "--logging-config",
         default="configs/logging_config.yaml",
@@ -85,7 +113,7 @@ def main():
     
     # Load input data
     try:
-        df = pd.read_csv(args.input_path, encoding="utf-8")
+        df = read_frame(args.input_path)
         logger.info(f"Loaded {len(df)} samples for evaluation")
     except Exception as e:
         logger.error(f"Failed to load input file: {e}")
@@ -101,12 +129,19 @@ def main():
         logger.error(f"Failed to initialize LLM client: {e}")
         sys.exit(1)
     
+    rate_limiter = build_rate_limiter(args, client=client, logger=logger)
+    
     # Initialize evaluator
     evaluator = ConstraintEvaluator(
         llm_client=client,
         model=args.model,
         content_type=args.domain,
-        retry_attempts=args.retry_attempts
+        retry_attempts=args.retry_attempts,
+        max_concurrency=args.max_concurrency,
+        marshal_batch_size=args.marshal_batch_size,
+        rate_limiter=rate_limiter,
+        use_cache=args.use_cache,
+        compact_prompt=args.compact_prompt
     )
     
     # Evaluate
@@ -115,7 +150,9 @@ def main():
             df=df,
             content_column=args.content_column,
             constraints_column=args.constraints_column,
-            output_path=args.output_path
+            output_path=args.output_path,
+            use_batch_api=args.use_batch_api,
+            resume=args.resume
         )
         logger.info(f"Successfully evaluated {len(result_df)} samples")
         
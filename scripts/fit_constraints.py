@@ -15,6 +15,7 @@ import pandas as pd
 from cs4.core.constraint_fitter import ConstraintFitter
 from cs4.utils.llm_client import OpenAIClient, AnthropicClient, get_total_usage
 from cs4.utils.log_utils import setup_logging, get_logger
+from cs4.utils.cli_args import add_concurrency_args, build_rate_limiter
 from cs4.config import Config
 
 
@@ -60,6 +61,23 @@ def main():
         default=3,
         help="Number of retry attempts on failure"
     )
+    add_concurrency_args(parser)
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help="Reuse cached responses for identical prompts"
+    )
+    parser.add_argument(
+        "--use-batch-api",
+        action="store_true",
+        help="Run all requests as one provider batch job (cheaper, completes within 24h)"
+    )
+    parser.add_argument(
+        "--max-base-tokens",
+        type=int,
+        default=None,
+        help="Cut base content longer than this many tokens to its leading sentences (default: off)"
+    )
     parser.add_argument(
         "--constraint-column",
         default="selected_constraints",
@@ -108,12 +126,19 @@ def main():
         logger.error(f"Failed to initialize LLM client: {e}")
         sys.exit(1)
     
+    # Optional client-side rate limiting
+    rate_limiter = build_rate_limiter(args)
+    
     # Initialize fitter
     fitter = ConstraintFitter(
         llm_client=client,
         model=args.model,
         content_type=args.domain,           
-        retry_attempts=args.retry_attempts
+        retry_attempts=args.retry_attempts,
+        max_concurrency=args.max_concurrency,
+        rate_limiter=rate_limiter,
+        use_cache=args.use_cache,
+        max_base_tokens=args.max_base_tokens
     )
     
     # Fit content to constraints
@@ -123,7 +148,8 @@ def main():
             base_df=base_df,
             output_path=args.output_path,
             base_column=args.base_column,
-            constraint_column=args.constraint_column
+            constraint_column=args.constraint_column,
+            use_batch_api=args.use_batch_api
         )
         logger.info(f"Successfully fitted content for {len(result_df)} samples")
         
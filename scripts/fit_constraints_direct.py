@@ -16,6 +16,7 @@ import pandas as pd
 from cs4.core.constraint_fitter import ConstraintFitter
 from cs4.utils.llm_client import OpenAIClient, AnthropicClient, get_total_usage
 from cs4.utils.log_utils import setup_logging, get_logger
+from cs4.utils.frame_utils import compact_dtypes, is_parquet_path, write_parquet
 from cs4.config import Config
 
 
@@ -36,7 +37,7 @@ def main():
     parser.add_argument(
         "--output-path",
         required=True,
-        help="Path to output CSV with fitted content"
+        help="Path to output CSV (or .parquet) with fitted content"
     )
     parser.add_argument(
         "--constraint-column",
@@ -161,6 +162,9 @@ def main():
         # Fit constraints directly to merged content
         logger.info(f"Fitting constraints to merged blogs for {len(merged_data)} samples")
         
+        # Every row is stamped with the batch start time
+        batch_start = pd.Timestamp.now().isoformat()
+        
         results = []
         for idx, row in merged_data.iterrows():
             instruction_num = row.get("instruction_number", idx + 1)
@@ -181,7 +185,7 @@ def main():
                     log=True
                 )
                 
-                result = row.copy()
+                result = row.to_dict()
                 result["merged_blog_original"] = merged_content
                 result["fitted_content"] = fitted_content
                 result["fitted_length"] = len(fitted_content)
@@ -194,22 +198,25 @@ def main():
                 
                 result["model_used"] = args.model
                 result["tokens_used"] = tokens
-                result["timestamp"] = pd.Timestamp.now().isoformat()
+                result["timestamp"] = batch_start
                 
                 results.append(result)
                 
             except Exception as e:
                 logger.error(f"Failed to fit constraints for sample #{instruction_num}: {e}")
                 # Keep original with error marker
-                result = row.copy()
+                result = row.to_dict()
                 result["fitted_content"] = merged_content
                 result["error"] = str(e)
                 results.append(result)
         
-        result_df = pd.DataFrame(results)
+        result_df = compact_dtypes(pd.DataFrame(results))
         
         # Save results
-        result_df.to_csv(args.output_path, index=False, encoding="utf-8")
+        if is_parquet_path(args.output_path):
+            write_parquet(result_df, args.output_path)
+        else:
+            result_df.to_csv(args.output_path, index=False, encoding="utf-8")
         logger.info(f"Fitted content saved to {args.output_path}")
         
         logger.info(f"Successfully fitted content for {len(result_df)} samples")
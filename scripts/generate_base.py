@@ -13,6 +13,7 @@ import pandas as pd
 from cs4.core.base_generator import BaseGenerator
 from cs4.utils.llm_client import OpenAIClient, AnthropicClient, get_total_usage
 from cs4.utils.log_utils import setup_logging, get_logger
+from cs4.utils.cli_args import add_concurrency_args
 from cs4.config import Config
 
 def main():
@@ -57,6 +58,12 @@ def main():
         default=3,
         help="Number of retry attempts on failure"
     )
+    add_concurrency_args(parser, rate_limits=False)
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help="Reuse cached responses for identical prompts"
+    )
     parser.add_argument(
         "--logging-config",
         default="configs/logging_config.yaml",
@@ -98,7 +105,9 @@ def main():
         llm_client=client,
         model=args.model,
         content_type=args.domain,
-        retry_attempts=args.retry_attempts
+        retry_attempts=args.retry_attempts,
+        max_concurrency=args.max_concurrency,
+        use_cache=args.use_cache
     )
     
     # Generate base content
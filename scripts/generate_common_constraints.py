@@ -13,6 +13,7 @@ import pandas as pd
 from cs4.core.common_constraint_generator import CommonConstraintGenerator
 from cs4.utils.llm_client import OpenAIClient, AnthropicClient, get_total_usage
 from cs4.utils.log_utils import setup_logging, get_logger
+from cs4.utils.cli_args import add_concurrency_args, build_rate_limiter
 from cs4.config import Config
 
 
@@ -69,6 +70,17 @@ def main():
         default=1.0,
         help="Delay between retries (seconds)"
     )
+    add_concurrency_args(parser)
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help="Reuse cached responses for identical prompts"
+    )
+    parser.add_argument(
+        "--use-batch-api",
+        action="store_true",
+        help="Run all requests as one provider batch job (cheaper, completes within 24h)"
+    )
     parser.add_argument(
         "--logging-config",
         default="configs/logging_config.yaml",
@@ -106,12 +118,18 @@ def main():
         logger.error(f"Failed to initialize LLM client: {e}")
         sys.exit(1)
     
+    # Optional client-side rate limiting
+    rate_limiter = build_rate_limiter(args)
+    
     # Initialize generator
     generator = CommonConstraintGenerator(
         llm_client=client,
         model=args.model,
         retry_attempts=args.retry_attempts,
-        delay=args.delay
+        delay=args.delay,
+        max_concurrency=args.max_concurrency,
+        rate_limiter=rate_limiter,
+        use_cache=args.use_cache
     )
     
     # Generate common constraints
@@ -120,7 +138,8 @@ def main():
             df=df,
             blog1_column=args.blog1_column,
             blog2_column=args.blog2_column,
-            output_path=args.output_path
+            output_path=args.output_path,
+            use_batch_api=args.use_batch_api
         )
         logger.info(f"Successfully generated common constraints for {len(result_df)} pairs")
         
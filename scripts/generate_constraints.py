@@ -13,6 +13,7 @@ import pandas as pd
 from cs4.core.constraint_generator import ConstraintGenerator
 from cs4.utils.llm_client import OpenAIClient, AnthropicClient, get_total_usage
 from cs4.utils.log_utils import setup_logging, get_logger
+from cs4.utils.cli_args import add_concurrency_args, build_concurrency_controller, build_rate_limiter
 from cs4.config import Config
 
 def main():
@@ -63,6 +64,41 @@ def main():
         default=1.0,
         help="Delay between retries (seconds)"
     )
+    add_concurrency_args(parser, adaptive=True)
+    parser.add_argument(
+        "--marshal-batch-size",
+        type=int,
+        default=1,
+        help="Number of rows packed into one LLM request (default: 1)"
+    )
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help="Reuse cached responses for identical prompts"
+    )
+    parser.add_argument(
+        "--semantic-cache-threshold",
+        type=float,
+        default=None,
+        help="Reuse constraints of earlier contents whose embedding cosine similarity "
+             "is at least this value, e.g. 0.92 (default: off)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip samples already written to --output-path and append the rest"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=60.0,
+        help="Seconds before a single LLM request is abandoned and retried (default: 60)"
+    )
+    parser.add_argument(
+        "--compact-prompt",
+        action="store_true",
+        help="Use the shorter worked example in the system prompt (8 of 39 example constraints)"
+    )
     parser.add_argument(
         "--logging-config",
         default="configs/logging_config.yaml",
@@ -91,17 +127,33 @@ def main():
     
     # Initialize LLM client
     try:
-        client = OpenAIClient(log_usage=True)
+        client = OpenAIClient(
+            log_usage=True,
+            max_retries=0,
+            max_connections=2 * args.max_concurrency
+        )
     except Exception as e:
         logger.error(f"Failed to initialize LLM client: {e}")
         sys.exit(1)
     
+    rate_limiter = build_rate_limiter(args)
+    
+    controller = build_concurrency_controller(args)
+    
     # Initialize generator
     generator = ConstraintGenerator(
         llm_client=client,
         model=args.model,
         retry_attempts=args.retry_attempts,
-        delay=args.delay
+        delay=args.delay,
+        max_concurrency=args.max_concurrency,
+        rate_limiter=rate_limiter,
+        concurrency_controller=controller,
+        marshal_batch_size=args.marshal_batch_size,
+        use_cache=args.use_cache,
+        timeout=args.timeout,
+        compact_prompt=args.compact_prompt,
+        semantic_cache_threshold=args.semantic_cache_threshold
     )
     
     # Generate constraints
@@ -109,7 +161,8 @@ def main():
         result_df = generator.generate_constraints_batch(
             df=df,
             content_column=args.content_column,
-            output_path=args.output_path
+            output_path=args.output_path,
+            resume=args.resume
         )
         logger.info(f"Successfully generated constraints for {len(result_df)} samples")
         
@@ -15,6 +15,7 @@ import pandas as pd
 from cs4.core.blog_merger import BlogMerger
 from cs4.utils.llm_client import OpenAIClient, AnthropicClient, get_total_usage
 from cs4.utils.log_utils import setup_logging, get_logger
+from cs4.utils.cli_args import add_concurrency_args
 from cs4.config import Config
 
 
@@ -55,6 +56,12 @@ def main():
         default=3,
         help="Number of retry attempts on failure (default: 3)"
     )
+    add_concurrency_args(parser, rate_limits=False)
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help="Reuse cached responses for identical prompts"
+    )
     parser.add_argument(
         "--logging-config",
         default="configs/logging_config.yaml",
@@ -96,7 +103,9 @@ def main():
         merger = BlogMerger(
             llm_client=client,
             model=args.model,
-            retry_attempts=args.retry_attempts
+            retry_attempts=args.retry_attempts,
+            max_concurrency=args.max_concurrency,
+            use_cache=args.use_cache
         )
         
         result_df = merger.merge_pairs(
@@ -13,6 +13,7 @@ import pandas as pd
 from cs4.core.constraint_replacer import ConstraintReplacer
 from cs4.utils.llm_client import OpenAIClient, AnthropicClient, get_total_usage
 from cs4.utils.log_utils import setup_logging, get_logger
+from cs4.utils.cli_args import add_concurrency_args, build_concurrency_controller, build_rate_limiter
 from cs4.config import Config
 
 
@@ -57,6 +58,23 @@ def main():
         default=3,
         help="Number of retry attempts on failure"
     )
+    add_concurrency_args(parser, adaptive=True)
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help="Reuse cached responses for identical prompts"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip samples already written to --output-path and append the rest"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=60.0,
+        help="Seconds before a single LLM request is abandoned and retried (default: 60)"
+    )
     parser.add_argument(
         "--logging-config",
         default="configs/logging_config.yaml",
@@ -86,17 +104,34 @@ def main():
     
     try:
         if args.provider == "openai":
-            client = OpenAIClient(log_usage=True)
+            client = OpenAIClient(
+                log_usage=True,
+                max_retries=0,
+                max_connections=2 * args.max_concurrency
+            )
         else:
-            client = AnthropicClient(log_usage=True)
+            client = AnthropicClient(
+                log_usage=True,
+                max_retries=0,
+                max_connections=2 * args.max_concurrency
+            )
     except Exception as e:
         logger.error(f"Failed to initialize LLM client: {e}")
         sys.exit(1)
     
+    rate_limiter = build_rate_limiter(args)
+    
+    controller = build_concurrency_controller(args)
+    
     replacer = ConstraintReplacer(
         llm_client=client,
         model=args.model,
-        retry_attempts=args.retry_attempts
+        retry_attempts=args.retry_attempts,
+        max_concurrency=args.max_concurrency,
+        rate_limiter=rate_limiter,
+        concurrency_controller=controller,
+        use_cache=args.use_cache,
+        timeout=args.timeout
     )
     
     try:
@@ -104,7 +139,8 @@ def main():
             constraints_df=constraints_df,
             base_df=base_df,
             evaluation_df=evaluation_df,
-            output_path=args.output_path
+            output_path=args.output_path,
+            resume=args.resume
         )
         logger.info(f"Successfully replaced constraints for {len(result_df)} samples")
         
@@ -16,6 +16,7 @@ import pandas as pd
 from cs4.core.content_summarizer import ContentSummarizer
 from cs4.utils.llm_client import OpenAIClient, AnthropicClient, get_total_usage
 from cs4.utils.log_utils import setup_logging, get_logger
+from cs4.utils.cli_args import add_concurrency_args, build_concurrency_controller, build_rate_limiter
 from cs4.config import Config
 
 
@@ -66,6 +67,40 @@ def main():
         default=3,
         help="Number of retry attempts on failure"
     )
+    add_concurrency_args(parser, adaptive=True)
+    parser.add_argument(
+        "--marshal-batch-size",
+        type=int,
+        default=1,
+        help="Number of rows packed into one LLM request (default: 1)"
+    )
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help="Reuse cached responses for identical prompts"
+    )
+    parser.add_argument(
+        "--small-model",
+        default=None,
+        help="Cheaper model used for contents under --small-model-max-tokens"
+    )
+    parser.add_argument(
+        "--small-model-max-tokens",
+        type=int,
+        default=2000,
+        help="Token count below which --small-model is used (default: 2000)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip samples already written to --output-path and append the rest"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=60.0,
+        help="Seconds before a single LLM request is abandoned and retried (default: 60)"
+    )
     parser.add_argument(
         "--logging-config",
         default="configs/logging_config.yaml",
@@ -95,9 +130,21 @@ def main():
     
     # Initialize LLM client
     if args.provider == "openai":
-        client = OpenAIClient(log_usage=True)
+        client = OpenAIClient(
+            log_usage=True,
+            max_retries=0,
+            max_connections=2 * args.max_concurrency
+        )
     else:
-        client = AnthropicClient(log_usage=True)
+        client = AnthropicClient(
+            log_usage=True,
+            max_retries=0,
+            max_connections=2 * args.max_concurrency
+        )
+    
+    rate_limiter = build_rate_limiter(args)
+    
+    controller = build_concurrency_controller(args)
     
     # Initialize summarizer
     try:
@@ -106,14 +153,22 @@ def main():
             model=args.model,
             content_type=args.domain,
             target_length_pct=args.target_length_pct,
-            retry_attempts=args.retry_attempts
+            retry_attempts=args.retry_attempts,
+            max_concurrency=args.max_concurrency,
+            rate_limiter=rate_limiter,
+            concurrency_controller=controller,
+            marshal_batch_size=args.marshal_batch_size,
+            model_routes=[(args.small_model_max_tokens, args.small_model)] if args.small_model else None,
+            use_cache=args.use_cache,
+            timeout=args.timeout
         )
         
         # Summarize content
         result_df = summarizer.summarize_batch(
             df=df,
             content_column=args.content_column,
-            output_path=args.output_path
+            output_path=args.output_path,
+            resume=args.resume
         )
         
         logger.info(f"Successfully summarized {len(result_df)} samples")
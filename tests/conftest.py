@@ -0,0 +1,29 @@
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Make the cs4 package importable without installing it, like the scripts do
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class StubLLM:
+    """LLMAdapter that answers from a function of the user message and records every call."""
+
+    def __init__(self, reply, tokens=10):
+        self.reply = reply
+        self.tokens = tokens
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def chat(self, *, system, user, model, max_tokens, **kwargs):
+        with self._lock:
+            self.calls.append({"system": system, "user": user, "max_tokens": max_tokens})
+        return self.reply(user), self.tokens
+
+
+@pytest.fixture
+def stub_llm():
+    """Factory for StubLLM adapters (pass the reply function)."""
+    return StubLLM
@@ -0,0 +1,63 @@
+"""Tests for cs4.utils.aimd."""
+
+import pytest
+
+from cs4.utils.aimd import AimdController
+
+
+def test_increase_adds_alpha_spread_over_one_round():
+    controller = AimdController(c_max=10, alpha=1.0, initial=4)
+    controller.increase()
+    assert controller.limit == pytest.approx(4.25)
+
+
+def test_increase_is_capped_at_c_max():
+    controller = AimdController(c_max=4, alpha=1.0, initial=4)
+    controller.increase()
+    assert controller.limit == 4
+
+
+def test_decrease_multiplies_by_beta_down_to_c_min():
+    controller = AimdController(c_min=2, c_max=16, beta=0.5, initial=16)
+    controller.decrease()
+    assert controller.limit == 8
+    controller.decrease()
+    controller.decrease()
+    controller.decrease()
+    assert controller.limit == 2
+
+
+def test_decrease_from_a_stale_epoch_is_skipped():
+    controller = AimdController(c_max=16, beta=0.5, initial=16)
+    controller.decrease(epoch=0)
+    assert controller.limit == 8
+    # A second call that started before the first cut must not cut again
+    controller.decrease(epoch=0)
+    assert controller.limit == 8
+
+
+def test_fast_call_increases_the_limit():
+    controller = AimdController(c_max=10, alpha=1.0, target_latency=60.0, initial=2)
+    with controller.slot():
+        pass
+    assert controller.limit == pytest.approx(2.5)
+
+
+def test_failed_call_decreases_the_limit_and_frees_its_slot():
+    controller = AimdController(c_max=8, beta=0.5, initial=8)
+    with pytest.raises(RuntimeError):
+        with controller.slot():
+            raise RuntimeError("boom")
+    assert controller.limit == 4
+    assert controller._in_flight == 0
+
+
+def test_slow_calls_decrease_once_the_window_is_full():
+    controller = AimdController(c_max=8, beta=0.5, target_latency=-1.0, window=3, initial=8)
+    for _ in range(2):
+        with controller.slot():
+            pass
+    assert controller.limit == 8
+    with controller.slot():
+        pass
+    assert controller.limit == 4
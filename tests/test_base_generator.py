@@ -0,0 +1,15 @@
+"""Tests for BaseGenerator, run against a stub LLMAdapter."""
+
+from cs4.core.base_generator import BaseGenerator
+
+
+def test_generate_base_content_sends_the_system_prompt(stub_llm):
+    llm = stub_llm(lambda user: "A blog.")
+    generator = BaseGenerator(llm_client=llm, delay=0, max_output_tokens=512)
+
+    assert generator.generate_base_content("Write about sleep.", log=False) == ("A blog.", 10)
+    assert llm.calls == [{
+        "system": generator.system_prompt,
+        "user": "Task: Write about sleep.",
+        "max_tokens": 512,
+    }]
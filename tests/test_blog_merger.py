@@ -0,0 +1,13 @@
+"""Tests for BlogMerger, run against a stub LLMAdapter."""
+
+from cs4.core.blog_merger import BlogMerger
+
+
+def test_merge_pair_sends_both_blogs(stub_llm):
+    llm = stub_llm(lambda user: "Merged.")
+    merger = BlogMerger(llm_client=llm, delay=0)
+
+    assert merger.merge_pair("First.", "Second.", log=False) == ("Merged.", 10)
+    assert llm.calls[0]["system"] == merger.system_prompt
+    assert llm.calls[0]["user"] == "Merge the two blogs below.\n\nBlog 1:\nFirst.\n\nBlog 2:\nSecond."
+    assert llm.calls[0]["max_tokens"] == 4096
@@ -0,0 +1,31 @@
+"""Tests for the cached YAML loading in cs4.config."""
+
+import os
+
+from cs4.config import Config
+
+
+def write_config(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def test_mutating_a_loaded_config_does_not_leak_into_the_cache(tmp_path):
+    path = write_config(tmp_path / "domain.yaml", "name: blog\nsettings:\n  tags: [a, b]\n")
+
+    first = Config.load_config(path)
+    first["name"] = "changed"
+    first["settings"]["tags"].append("c")
+
+    assert Config.load_config(path) == {"name": "blog", "settings": {"tags": ["a", "b"]}}
+
+
+def test_editing_the_file_invalidates_the_cache(tmp_path):
+    path = write_config(tmp_path / "domain.yaml", "name: blog\n")
+    assert Config.load_config(path)["name"] == "blog"
+
+    write_config(tmp_path / "domain.yaml", "name: news\n")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert Config.load_config(path)["name"] == "news"
@@ -0,0 +1,72 @@
+"""Tests for ConstraintFitter, run against a stub LLMAdapter."""
+
+import pandas as pd
+import pytest
+
+from cs4.core.constraint_fitter import ConstraintFitter
+
+
+def make_fitter(llm, **kwargs):
+    return ConstraintFitter(llm_client=llm, retry_attempts=1, delay=0, **kwargs)
+
+
+@pytest.fixture
+def fitter(stub_llm):
+    return make_fitter(stub_llm(lambda user: "fitted"))
+
+
+def test_empty_base_content_fits_to_nothing(fitter):
+    assert fitter._fit_without_llm("", "1. a") == ""
+    assert fitter._fit_without_llm(float("nan"), "1. a") == ""
+
+
+def test_blank_constraints_keep_the_base_content(fitter):
+    assert fitter._fit_without_llm("Some text.", "") == "Some text."
+    assert fitter._fit_without_llm("Some text.", "  \n") == "Some text."
+
+
+def test_constraints_already_in_the_content_keep_it(fitter):
+    content = "Sleep well. Drink WATER daily."
+    assert fitter._fit_without_llm(content, "1. sleep well\n2. drink water") == content
+
+
+def test_unmet_or_too_many_constraints_need_the_llm(stub_llm, fitter):
+    content = "Sleep well. Drink water. Walk."
+    assert fitter._fit_without_llm(content, "1. sleep well\n2. eat fruit") is None
+    # Three constraints reach the default noop_max_constraints of 3
+    assert fitter._fit_without_llm(content, "1. sleep well\n2. drink water\n3. walk") is None
+    disabled = make_fitter(stub_llm(lambda user: "fitted"), noop_max_constraints=0)
+    assert disabled._fit_without_llm(content, "1. sleep well") is None
+
+
+def test_fit_content_skips_the_call_when_nothing_needs_fitting(stub_llm):
+    llm = stub_llm(lambda user: "fitted")
+    fitter = make_fitter(llm)
+    assert fitter.fit_content("task", "Sleep well.", "1. sleep well", log=False) == ("Sleep well.", 0)
+    assert fitter.fit_content("task", "Sleep well.", "1. eat fruit", log=False) == ("fitted", 10)
+    assert len(llm.calls) == 1
+    assert fitter.stats["skipped"] == 1
+
+
+def test_fit_batch_sends_each_distinct_prompt_once(tmp_path, stub_llm):
+    llm = stub_llm(lambda user: f"fitted {user.count('beta')}")
+    constraints_df = pd.DataFrame({
+        "instruction_number": [1, 1, 2, 1, 3],
+        "main_task": ["Write"] * 5,
+        "constraints": ["1. alpha\n2. beta"] * 2 + ["1. gamma"] + ["1. alpha\n2. beta"] * 2,
+    })
+    # Instruction 3 has the same base content as 1, so its prompt repeats too
+    base_df = pd.DataFrame({
+        "instruction_number": [1, 2, 3],
+        "base_content": ["Base one.", "Base two.", "Base one."],
+    })
+
+    result = make_fitter(llm, noop_max_constraints=0, max_concurrency=2).fit_batch(
+        constraints_df, base_df, output_path=str(tmp_path / "fitted.csv")
+    )
+
+    assert len(llm.calls) == 2
+    assert result["instruction_number"].tolist() == [1, 1, 2, 1, 3]
+    assert result["fitted_content"].tolist() == ["fitted 1", "fitted 1", "fitted 0", "fitted 1", "fitted 1"]
+    # Tokens are counted once, on the first sample with each prompt
+    assert result["tokens_used"].tolist() == [10, 0, 10, 0, 0]
@@ -0,0 +1,34 @@
+"""Tests for ContentSummarizer.summarize_batch, run against a stub LLMAdapter."""
+
+import pandas as pd
+
+from cs4.core.content_summarizer import ContentSummarizer
+
+
+def reply(user):
+    if "FAIL" in user:
+        raise RuntimeError("boom")
+    return "short"
+
+
+def test_resume_keeps_numeric_columns_numeric(tmp_path, stub_llm):
+    path = tmp_path / "summaries.csv"
+    samples = pd.DataFrame({
+        "instruction_number": [1, 2, 3, 4],
+        "fitted_content": ["first text", "FAIL text", "third text", "fourth text"],
+    })
+    llm = stub_llm(reply)
+    ContentSummarizer(llm_client=llm, retry_attempts=1, delay=0).summarize_batch(
+        samples.iloc[:2], output_path=str(path)
+    )
+
+    result = ContentSummarizer(llm_client=llm, retry_attempts=1, delay=0).summarize_batch(
+        samples, output_path=str(path), resume=True
+    )
+
+    assert result["instruction_number"].tolist() == [1, 2, 3, 4]
+    # The failed sample wrote no token count
+    assert pd.api.types.is_numeric_dtype(result["tokens_used"])
+    assert result["tokens_used"].isna().tolist() == [False, True, False, False]
+    assert result["tokens_used"].sum() == 30
+    assert pd.api.types.is_numeric_dtype(result["compression_ratio"])
@@ -0,0 +1,150 @@
+"""Tests for ConstraintEvaluator.evaluate_batch, run against a stub LLMAdapter."""
+
+import pandas as pd
+import pytest
+
+from cs4.core import evaluator as evaluator_module
+from cs4.core.evaluator import ConstraintEvaluator
+
+JUDGMENTS = "1. Yes - covered\n2. No - missing"
+
+
+def reply(user):
+    if "FAIL" in user:
+        raise RuntimeError("boom")
+    return JUDGMENTS
+
+
+def make_evaluator(llm, **kwargs):
+    kwargs.setdefault("retry_attempts", 1)
+    return ConstraintEvaluator(llm_client=llm, delay=0, **kwargs)
+
+
+@pytest.fixture
+def samples():
+    return pd.DataFrame({
+        "instruction_number": [1, 2, 3, 4],
+        "fitted_content": ["first", "FAIL", "third", "fourth"],
+        "constraints": ["1. a\n2. b"] * 4,
+    })
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".jsonl"])
+def test_resume_returns_numeric_results(tmp_path, samples, stub_llm, suffix):
+    path = tmp_path / f"evaluation{suffix}"
+    llm = stub_llm(reply)
+    make_evaluator(llm).evaluate_batch(samples.iloc[:2], output_path=str(path))
+    calls_before = len(llm.calls)
+
+    result = make_evaluator(llm).evaluate_batch(samples, output_path=str(path), resume=True)
+
+    # Only the two samples missing from the file are sent
+    assert len(llm.calls) - calls_before == 2
+    assert result["instruction_number"].tolist() == [1, 2, 3, 4]
+    assert pd.api.types.is_float_dtype(result["satisfaction_rate"])
+    assert result["satisfaction_rate"].isna().tolist() == [False, True, False, False]
+    assert result["satisfaction_rate"].mean() == pytest.approx(0.5)
+    assert result["num_satisfied"].tolist() == [1, 0, 1, 1]
+    assert result["tokens_used"].sum() == 30
+
+
+def test_resume_matches_a_single_run(tmp_path, samples, stub_llm):
+    path = tmp_path / "evaluation.csv"
+    make_evaluator(stub_llm(reply)).evaluate_batch(samples.iloc[:2], output_path=str(path))
+    resumed = make_evaluator(stub_llm(reply)).evaluate_batch(samples, output_path=str(path), resume=True)
+    single = make_evaluator(stub_llm(reply)).evaluate_batch(samples)
+
+    columns = ["instruction_number", "num_satisfied", "total_constraints", "satisfaction_rate", "tokens_used"]
+    pd.testing.assert_frame_equal(resumed[columns], single[columns], check_dtype=False)
+
+
+def packed_reply(user):
+    """Answer a packed request for two samples, or a single sample."""
+    if "### Input" in user:
+        return f"### Output 1\n{JUDGMENTS}\n\n### Output 2\n{JUDGMENTS}"
+    return JUDGMENTS
+
+
+def test_packed_request_evaluates_two_samples_in_one_call(samples, stub_llm):
+    llm = stub_llm(packed_reply)
+    result = make_evaluator(llm, marshal_batch_size=2, max_output_tokens=1000).evaluate_batch(
+        samples.assign(fitted_content=["a", "b", "c", "d"])
+    )
+    assert len(llm.calls) == 2
+    assert llm.calls[0]["max_tokens"] == 2000
+    assert result["num_satisfied"].tolist() == [1, 1, 1, 1]
+    # Each request's 10 tokens are split across its two samples
+    assert result["tokens_used"].tolist() == [5, 5, 5, 5]
+
+
+def test_missing_packed_section_is_retried_alone(samples, stub_llm):
+    def reply(user):
+        if "### Input" in user:
+            return f"### Output 1\n{JUDGMENTS}"
+        return JUDGMENTS
+
+    llm = stub_llm(reply)
+    result = make_evaluator(llm, marshal_batch_size=2).evaluate_batch(
+        samples.iloc[:2].assign(fitted_content=["a", "b"])
+    )
+    assert len(llm.calls) == 2
+    assert "### Input" not in llm.calls[1]["user"]
+    assert result["num_satisfied"].tolist() == [1, 1]
+
+
+def test_rejected_packed_request_falls_back_to_single_requests(samples, stub_llm):
+    class OutputLimitError(Exception):
+        status_code = 400
+
+    def reply(user):
+        if "### Input" in user:
+            raise OutputLimitError("max_tokens exceeds the model's output limit")
+        return JUDGMENTS
+
+    llm = stub_llm(reply)
+    result = make_evaluator(llm, marshal_batch_size=2, retry_attempts=3).evaluate_batch(
+        samples.iloc[:2].assign(fitted_content=["a", "b"])
+    )
+    # One rejected packed call (a 400 is not retried), then one call per sample
+    assert len(llm.calls) == 3
+    assert result["num_satisfied"].tolist() == [1, 1]
+    assert result["satisfaction_rate"].tolist() == [0.5, 0.5]
+
+
+def test_invalid_rows_are_failed_without_a_call(stub_llm):
+    llm = stub_llm(packed_reply)
+    df = pd.DataFrame({
+        "instruction_number": [1, 2, 3, 4, 5],
+        "fitted_content": ["a", "  ", "b", "c", None],
+        "constraints": ["1. a\n2. b", "1. a\n2. b", "1. a\n2. b", "", "1. a\n2. b"],
+    })
+    result = make_evaluator(llm, marshal_batch_size=2).evaluate_batch(df)
+
+    # Rows 1 and 3 are each sent alone: the invalid rows between them split the chunks
+    assert len(llm.calls) == 2
+    assert all("### Input" not in call["user"] for call in llm.calls)
+    assert result["instruction_number"].tolist() == [1, 2, 3, 4, 5]
+    assert result["satisfaction_rate"].isna().tolist() == [False, True, False, True, True]
+    assert result["tokens_used"].tolist() == [10, 0, 10, 0, 0]
+
+
+def test_batch_api_results_are_collected_by_row(monkeypatch, samples, stub_llm):
+    submitted = {}
+
+    def fake_run_batch_job(llm_client, prompts, **kwargs):
+        submitted.update(prompts)
+        # The job returns nothing for the second row
+        return {key: (JUDGMENTS, 7) for key in prompts if key != "1"}
+
+    monkeypatch.setattr(evaluator_module, "run_batch_job", fake_run_batch_job)
+    llm = stub_llm(reply)
+    result = make_evaluator(llm, marshal_batch_size=2).evaluate_batch(
+        samples.assign(fitted_content=["a", "b", "c", ""]), use_batch_api=True
+    )
+
+    assert llm.calls == []
+    # The empty row is never submitted
+    assert sorted(submitted) == ["0", "1", "2"]
+    assert result["num_satisfied"].tolist() == [1, 0, 1, 0]
+    assert result["satisfaction_rate"].isna().tolist() == [False, True, False, True]
+    assert result["tokens_used"].tolist() == [7, 0, 7, 0]
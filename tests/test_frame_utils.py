@@ -0,0 +1,56 @@
+"""Tests for reading back streamed results in cs4.utils.frame_utils."""
+
+import math
+
+import pandas as pd
+import pytest
+
+from cs4.utils.frame_utils import read_csv_records, stream_records
+from cs4.utils.record_writer import CsvWriter
+
+
+def test_csv_readback_keeps_empty_strings_and_nan_apart(tmp_path):
+    path = tmp_path / "out.csv"
+    with CsvWriter(path) as writer:
+        writer.write({"instruction_number": 1, "text": "", "rate": 0.5})
+        writer.write({"instruction_number": 2, "text": "b", "rate": float("nan")})
+    df = read_csv_records(path)
+    assert df["text"].tolist() == ["", "b"]
+    assert df["rate"].iloc[0] == 0.5
+    assert math.isnan(df["rate"].iloc[1])
+    # The plain pandas reader is what turned "" into NaN
+    assert pd.read_csv(path)["text"].isna().iloc[0]
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".jsonl"])
+def test_streamed_records_are_returned_as_written(tmp_path, suffix):
+    records = [
+        {"instruction_number": 1, "constraints": "1. a", "tokens_used": 10},
+        {"instruction_number": 2, "constraints": "", "tokens_used": 0},
+    ]
+    written = stream_records(iter(records), tmp_path / f"out{suffix}")
+    assert written.to_dict("records") == records
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".jsonl"])
+def test_append_reads_back_earlier_rows(tmp_path, suffix):
+    path = tmp_path / f"out{suffix}"
+    stream_records(iter([
+        {"instruction_number": 1, "constraints": "1. a", "tokens_used": 10},
+        {"instruction_number": 2, "constraints": "", "tokens_used": 0},
+    ]), path)
+
+    resumed = stream_records(
+        iter([{"instruction_number": 3, "constraints": "", "tokens_used": 5}]), path, append=True
+    )
+    assert resumed["instruction_number"].tolist() == [1, 2, 3]
+    assert resumed["constraints"].tolist() == ["1. a", "", ""]
+    assert resumed["tokens_used"].tolist() == [10, 0, 5]
+
+
+def test_append_with_nothing_left_returns_the_earlier_rows(tmp_path):
+    path = tmp_path / "out.csv"
+    stream_records(iter([{"instruction_number": 1, "constraints": ""}]), path)
+    resumed = stream_records(iter([]), path, append=True)
+    assert resumed["instruction_number"].tolist() == [1]
+    assert resumed["constraints"].tolist() == [""]
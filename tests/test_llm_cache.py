@@ -0,0 +1,96 @@
+"""Tests for cs4.utils.llm_cache."""
+
+import pytest
+
+from cs4.utils.llm_cache import LLMCache, SemanticLLMCache, make_cache_key, normalize_text
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LLMCache(tmp_path / "cache.sqlite")
+    yield cache
+    cache.close()
+
+
+def test_miss_then_hit(cache):
+    key = make_cache_key("model", "system", "user")
+    assert cache.get(key) is None
+    cache.set(key, {"text": "answer", "tokens": 12})
+    assert cache.get(key) == {"text": "answer", "tokens": 12}
+
+
+def test_entries_persist_across_instances(tmp_path):
+    key = make_cache_key("model", "prompt")
+    first = LLMCache(tmp_path / "cache.sqlite")
+    first.set(key, {"text": "kept"})
+    first.close()
+    second = LLMCache(tmp_path / "cache.sqlite")
+    assert second.get(key) == {"text": "kept"}
+    second.close()
+
+
+def test_cache_key_depends_on_every_part():
+    assert make_cache_key("model", "prompt") == make_cache_key("model", "prompt")
+    assert make_cache_key("model", "prompt") != make_cache_key("other", "prompt")
+    assert make_cache_key("model", "prompt") != make_cache_key("model", "prompt", 0)
+
+
+def test_expired_entry_is_a_miss(cache):
+    key = make_cache_key("model", "prompt")
+    cache.set(key, {"text": "old"}, ttl=-1)
+    assert cache.get(key) is None
+    cache.set(key, {"text": "new"}, ttl=60)
+    assert cache.get(key) == {"text": "new"}
+
+
+def test_hits_and_misses_are_counted(cache):
+    key = make_cache_key("model", "prompt")
+    cache.get(key)
+    cache.set(key, {"text": "answer"})
+    cache.get(key)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.stats() == "1 hits, 1 misses (50% hit rate)"
+
+
+def test_normalize_text_folds_whitespace_and_unicode_forms():
+    assert normalize_text("  Hello\r\n  world\t") == "Hello world"
+    assert normalize_text("ＡBC") == "ABC"
+
+
+# Toy embeddings: texts about cats point one way, texts about tax another
+_VECTORS = {
+    "cats": [1.0, 0.0, 0.0],
+    "cats!": [0.99, 0.1, 0.0],
+    "tax": [0.0, 1.0, 0.0],
+}
+
+
+@pytest.fixture
+def semantic_cache(tmp_path):
+    cache = SemanticLLMCache(_VECTORS.__getitem__, threshold=0.9, path=tmp_path / "cache.sqlite")
+    yield cache
+    cache.close()
+
+
+def test_semantic_hit_on_similar_text(semantic_cache):
+    semantic_cache.set("ns", "cats", {"constraints": "1. a"})
+    assert semantic_cache.get("ns", "cats!") == {"constraints": "1. a"}
+    assert semantic_cache.hits == 1
+
+
+def test_semantic_miss_on_dissimilar_text_or_other_namespace(semantic_cache):
+    assert semantic_cache.get("ns", "cats") is None
+    semantic_cache.set("ns", "cats", {"constraints": "1. a"})
+    assert semantic_cache.get("ns", "tax") is None
+    assert semantic_cache.get("other", "cats") is None
+    assert (semantic_cache.hits, semantic_cache.misses) == (0, 3)
+
+
+def test_semantic_entries_persist_across_instances(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    first = SemanticLLMCache(_VECTORS.__getitem__, path=path)
+    first.set("ns", "cats", {"constraints": "1. a"})
+    first.close()
+    second = SemanticLLMCache(_VECTORS.__getitem__, path=path)
+    assert second.get("ns", "cats!") == {"constraints": "1. a"}
+    second.close()
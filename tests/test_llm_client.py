@@ -0,0 +1,95 @@
+"""Tests for the provider adapters and helpers in cs4.utils.llm_client."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from cs4.utils.llm_client import (
+    AnthropicAdapter,
+    OpenAIAdapter,
+    anthropic_total_tokens,
+    cached_system_prompt,
+    get_adapter
+)
+
+
+def test_anthropic_total_tokens_without_caching():
+    usage = SimpleNamespace(input_tokens=100, output_tokens=20)
+    assert anthropic_total_tokens(usage) == 120
+
+
+def test_anthropic_total_tokens_counts_cache_writes_and_reads():
+    usage = SimpleNamespace(
+        input_tokens=10,
+        output_tokens=20,
+        cache_creation_input_tokens=1000,
+        cache_read_input_tokens=500
+    )
+    assert anthropic_total_tokens(usage) == 1530
+
+
+def test_anthropic_total_tokens_treats_none_cache_fields_as_zero():
+    usage = SimpleNamespace(
+        input_tokens=10,
+        output_tokens=20,
+        cache_creation_input_tokens=None,
+        cache_read_input_tokens=None
+    )
+    assert anthropic_total_tokens(usage) == 30
+
+
+def test_cached_system_prompt_marks_the_block_cacheable():
+    blocks = cached_system_prompt("You are an editor.")
+    assert blocks == [
+        {"type": "text", "text": "You are an editor.", "cache_control": {"type": "ephemeral"}}
+    ]
+
+
+class RecordingClient:
+    """Stand-in for OpenAIClient/AnthropicClient that records each request."""
+
+    def __init__(self, response):
+        self.response = response
+        self.requests = []
+
+    def chat_completion(self, **kwargs):
+        self.requests.append(kwargs)
+        return self.response
+
+    create_message = chat_completion
+
+    def get_response_text(self, response):
+        return response.text
+
+
+def test_openai_adapter_sends_system_then_user():
+    client = RecordingClient(SimpleNamespace(text="hi", usage=SimpleNamespace(total_tokens=42)))
+    assert OpenAIAdapter(client).chat(system="sys", user="msg", model="m", max_tokens=100) == ("hi", 42)
+    assert client.requests == [{
+        "messages": [{"role": "system", "content": "sys"}, {"role": "user", "content": "msg"}],
+        "model": "m",
+        "max_completion_tokens": 100,
+    }]
+
+
+def test_openai_adapter_without_system_prompt():
+    client = RecordingClient(SimpleNamespace(text="hi", usage=SimpleNamespace(total_tokens=1)))
+    OpenAIAdapter(client).chat(system=None, user="msg", model="m", max_tokens=100)
+    assert client.requests[0]["messages"] == [{"role": "user", "content": "msg"}]
+
+
+def test_anthropic_adapter_caches_the_system_prompt():
+    usage = SimpleNamespace(input_tokens=1, output_tokens=2, cache_read_input_tokens=30)
+    client = RecordingClient(SimpleNamespace(text="hi", usage=usage))
+    adapter = AnthropicAdapter(client)
+    assert adapter.chat(system="sys", user="msg", model="m", max_tokens=100) == ("hi", 33)
+    assert client.requests[0]["system"] == cached_system_prompt("sys")
+    adapter.chat(system=None, user="msg", model="m", max_tokens=100)
+    assert client.requests[1]["system"] is None
+
+
+def test_get_adapter_passes_llm_adapters_through():
+    adapter = OpenAIAdapter(None)
+    assert get_adapter(adapter) is adapter
+    with pytest.raises(ValueError):
+        get_adapter(object())
@@ -0,0 +1,62 @@
+"""Tests for the prompt helpers in cs4.core.prompts."""
+
+from cs4.core.prompts import get_marshaled_prompt, parse_task_response, split_marshaled_response
+
+
+def test_marshaled_prompt_numbers_every_input():
+    prompt = get_marshaled_prompt(["first", "second"], task_prompt="Summarize.")
+    assert prompt.startswith("Summarize.\n\n")
+    assert "### Input 1\nfirst" in prompt
+    assert "### Input 2\nsecond" in prompt
+
+
+def test_split_in_order():
+    response = "### Output 1\nalpha\n\n### Output 2\nbeta"
+    assert split_marshaled_response(response, 2) == ["alpha", "beta"]
+
+
+def test_split_out_of_order_sections_go_to_their_numbers():
+    response = "### Output 2\nbeta\n### Output 1\nalpha"
+    assert split_marshaled_response(response, 2) == ["alpha", "beta"]
+
+
+def test_split_missing_sections_are_none():
+    response = "### Output 1\nalpha\n### Output 3\ngamma"
+    assert split_marshaled_response(response, 3) == ["alpha", None, "gamma"]
+    assert split_marshaled_response("no headings at all", 2) == [None, None]
+
+
+def test_split_ignores_out_of_range_and_repeated_sections():
+    response = "### Output 1\nalpha\n### Output 5\nstray\n### Output 1\nagain"
+    assert split_marshaled_response(response, 2) == ["alpha", None]
+
+
+def test_split_accepts_heading_variants():
+    response = "## Output 1:\nalpha\n####  Output 2\nbeta"
+    assert split_marshaled_response(response, 2) == ["alpha", "beta"]
+
+
+
+def test_parse_task_response():
+    text = "Main Task: Write a blog.\n\nConstraints:\n1. a\n  2. b  \n"
+    assert parse_task_response(text) == ("Write a blog.", "1. a\n2. b")
+
+
+def test_parse_task_response_skips_blank_lines_and_preamble():
+    text = "Sure!\nMain Task: A\n\nConstraints:\n\n1. a\n\n2. b\n"
+    assert parse_task_response(text) == ("A", "1. a\n2. b")
+
+
+def test_parse_task_response_repeated_heading_uses_the_last_task():
+    text = "Main Task: A\nConstraints:\n1. a\nMain Task: B\n2. b"
+    assert parse_task_response(text) == ("B", "1. a\n2. b")
+
+
+def test_parse_task_response_without_headings():
+    assert parse_task_response("no headings") == ("", "")
+
+
+def test_parse_task_response_revised_heading():
+    text = "Main Task: Write a blog.\nRevised Constraints:\n1. a"
+    assert parse_task_response(text) == ("Write a blog.", "")
+    assert parse_task_response(text, allow_revised=True) == ("Write a blog.", "1. a")
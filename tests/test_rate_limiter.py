@@ -0,0 +1,101 @@
+"""Tests for cs4.utils.rate_limiter."""
+
+import pytest
+
+from cs4.utils import rate_limiter as rate_limiter_module
+from cs4.utils.rate_limiter import RateLimiter, limits_from_headers
+
+
+class FakeClock:
+    """Stand-in for the time module whose sleep() advances monotonic()."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept += seconds
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter_module, "time", fake)
+    return fake
+
+
+def test_acquire_debits_one_request_and_the_estimate(clock):
+    limiter = RateLimiter(requests_per_minute=10, tokens_per_minute=1000)
+    limiter.acquire(estimated_tokens=300)
+    assert limiter.available_request_capacity == 9
+    assert limiter.available_token_capacity == 700
+    assert clock.slept == 0
+
+
+def test_acquire_waits_for_the_token_bucket_to_refill(clock):
+    limiter = RateLimiter(tokens_per_minute=60)
+    limiter.acquire(estimated_tokens=60)
+    limiter.acquire(estimated_tokens=30)
+    # 60 TPM refills one token per second
+    assert clock.slept == pytest.approx(30)
+    assert limiter.available_token_capacity == pytest.approx(0)
+
+
+def test_acquire_waits_for_the_request_bucket_to_refill(clock):
+    limiter = RateLimiter(requests_per_minute=2)
+    limiter.acquire()
+    limiter.acquire()
+    limiter.acquire()
+    assert clock.slept == pytest.approx(30)
+
+
+def test_oversized_request_is_capped_at_the_budget(clock):
+    limiter = RateLimiter(tokens_per_minute=100)
+    limiter.acquire(estimated_tokens=500)
+    assert limiter.available_token_capacity == 0
+    assert clock.slept == 0
+
+
+def test_unlimited_limiter_never_waits(clock):
+    limiter = RateLimiter()
+    for _ in range(100):
+        limiter.acquire(estimated_tokens=10_000)
+    assert clock.slept == 0
+
+
+
+def test_reconcile_charges_tokens_beyond_the_estimate(clock):
+    limiter = RateLimiter(tokens_per_minute=1000)
+    limiter.acquire(estimated_tokens=100)
+    limiter.reconcile(estimated_tokens=100, actual_tokens=250)
+    assert limiter.available_token_capacity == 750
+
+
+def test_reconcile_refunds_unused_estimate_up_to_the_budget(clock):
+    limiter = RateLimiter(tokens_per_minute=1000)
+    limiter.acquire(estimated_tokens=400)
+    limiter.reconcile(estimated_tokens=400, actual_tokens=100)
+    assert limiter.available_token_capacity == 900
+    limiter.reconcile(estimated_tokens=400, actual_tokens=0)
+    assert limiter.available_token_capacity == 1000
+
+
+def test_reconcile_without_a_token_limit_is_a_no_op(clock):
+    limiter = RateLimiter(requests_per_minute=10)
+    limiter.acquire(estimated_tokens=10)
+    limiter.reconcile(estimated_tokens=10, actual_tokens=10_000)
+    limiter.acquire()
+    assert clock.slept == 0
+
+
+def test_limits_from_headers():
+    assert limits_from_headers({
+        "x-ratelimit-limit-requests": "500",
+        "x-ratelimit-limit-tokens": "30000",
+    }) == (500.0, 30000.0)
+    assert limits_from_headers({"anthropic-ratelimit-tokens-limit": "8000"}) == (None, 8000.0)
+    assert limits_from_headers({"x-ratelimit-limit-requests": "n/a"}) == (None, None)
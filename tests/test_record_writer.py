@@ -0,0 +1,74 @@
+"""Tests for the streaming writers in cs4.utils.record_writer."""
+
+import json
+
+import numpy as np
+
+from cs4.utils.record_writer import CsvWriter, JsonlWriter, completed_keys
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_jsonl_writes_one_line_per_record(tmp_path):
+    path = tmp_path / "out.jsonl"
+    with JsonlWriter(path) as writer:
+        writer.write({"instruction_number": 1, "text": "a\nmultiline"})
+        writer.write({"instruction_number": np.int64(2), "rate": np.float64(0.5)})
+    assert path.read_text(encoding="utf-8").count("\n") == 2
+    assert read_jsonl(path) == [
+        {"instruction_number": 1, "text": "a\nmultiline"},
+        {"instruction_number": 2, "rate": 0.5},
+    ]
+
+
+def test_jsonl_append_keeps_earlier_records(tmp_path):
+    path = tmp_path / "nested" / "out.jsonl"
+    with JsonlWriter(path) as writer:
+        writer.write({"instruction_number": 1})
+    with JsonlWriter(path, mode="a") as writer:
+        writer.write({"instruction_number": 2})
+    assert read_jsonl(path) == [{"instruction_number": 1}, {"instruction_number": 2}]
+
+
+def test_csv_header_comes_from_the_first_record(tmp_path):
+    path = tmp_path / "out.csv"
+    with CsvWriter(path) as writer:
+        writer.write({"instruction_number": 1, "text": "a,b"})
+        writer.write({"text": "c", "instruction_number": 2})
+    assert path.read_text(encoding="utf-8").splitlines() == [
+        "instruction_number,text", '1,"a,b"', "2,c"
+    ]
+
+
+def test_csv_append_reuses_the_existing_header(tmp_path):
+    path = tmp_path / "out.csv"
+    with CsvWriter(path) as writer:
+        writer.write({"instruction_number": 1, "text": "a"})
+    with CsvWriter(path, mode="a") as writer:
+        writer.write({"text": "b", "instruction_number": 2})
+    assert path.read_text(encoding="utf-8").splitlines() == [
+        "instruction_number,text", "1,a", "2,b"
+    ]
+    assert completed_keys(path) == {1, 2}
+
+
+def test_completed_keys_of_missing_file_or_column(tmp_path):
+    assert completed_keys(tmp_path / "missing.csv") == set()
+    path = tmp_path / "out.csv"
+    with CsvWriter(path) as writer:
+        writer.write({"id": 1})
+    assert completed_keys(path) == set()
+    assert completed_keys(path, column="id") == {1}
+
+
+def test_completed_keys_skips_a_truncated_jsonl_line(tmp_path):
+    path = tmp_path / "out.jsonl"
+    with JsonlWriter(path) as writer:
+        writer.write({"instruction_number": 1, "text": "a"})
+        writer.write({"instruction_number": 2, "text": "b\nwith newline"})
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"instruction_number": 3, "te')
+    assert completed_keys(path) == {1, 2}